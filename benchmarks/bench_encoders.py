@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片编码后端基准测试
+对比PIL与OpenCV在各格式、质量和尺寸下的编码速度和体积，
+加上 --pin 参数时为每种格式把最快的后端写入配置
+
+用法：python benchmarks/bench_encoders.py [--pin] [--repeats 5]
+"""
+
+import argparse
+
+import bench_utils  # 添加项目根目录到Python路径
+from src.image_encoder import benchmark_encoders, select_fastest_encoder
+
+
+SIZES = [(1280, 720), (1920, 1080), (3840, 2160)]
+CASES = [('jpg', 95, False, False), ('jpg', 85, True, True), ('png', 0, False, False), ('webp', 85, False, False)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片编码后端基准测试")
+    parser.add_argument("--repeats", type=int, default=5, help="每个后端重复编码次数")
+    parser.add_argument("--pin", action="store_true", help="将1080P下最快的后端写入配置")
+    args = parser.parse_args()
+    
+    print(f"{'格式':6s}{'质量':>6s}{'渐进/优化':>10s}{'尺寸':>12s}{'后端':>10s}{'ms/张':>10s}{'KB':>10s}")
+    for output_format, quality, progressive, optimize in CASES:
+        for size in SIZES:
+            results = benchmark_encoders(output_format, quality, size, args.repeats,
+                                         progressive=progressive, optimize=optimize)
+            for name, result in sorted(results.items(), key=lambda item: item[1]['seconds']):
+                print(f"{output_format:6s}{quality:6d}{str(progressive and optimize):>10s}"
+                      f"{size[0]:>6d}x{size[1]:<5d}{name:>10s}{result['seconds'] * 1000:10.2f}"
+                      f"{result['bytes'] / 1024:10.1f}")
+    
+    if args.pin:
+        for output_format, quality, progressive, optimize in CASES:
+            if progressive or optimize:
+                continue
+            fastest, _ = select_fastest_encoder(output_format, quality, (1920, 1080), args.repeats, pin=True)
+            print(f"已固定 {output_format}（质量 {quality}）的编码后端：{fastest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧缓冲池基准测试
+对比逐帧分配（extract_uniform_frames）与缓冲池复用（iter_uniform_frames）
+在提取过程中的内存分配总量、峰值内存和吞吐量
+
+用法：python benchmarks/bench_frame_buffer.py [--video 视频路径] [--frames 60]
+"""
+
+import os
+import argparse
+import tempfile
+import tracemalloc
+
+from bench_utils import make_test_video, Timer
+from src.frame_extractor import FrameExtractor
+
+
+class AllocationCounter:
+    """统计期间的峰值新增内存和结束时残留内存"""
+    
+    def __enter__(self):
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        return self
+    
+    def __exit__(self, *exc):
+        self.current, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return False
+
+
+def run_allocating(extractor, num_frames):
+    """每帧分配新的BGR和RGB数组，逐帧丢弃（模拟消费后释放）"""
+    for frame_pos in extractor.compute_uniform_positions(num_frames):
+        frame = extractor._read_frame(frame_pos)
+        if frame is not None:
+            rgb = frame[:, :, ::-1].copy()
+            del frame, rgb
+
+
+def run_pooled(extractor, num_frames, buffer_pool):
+    """使用缓冲池，逐帧读取后立即归还"""
+    for pooled in extractor.iter_uniform_frames(num_frames, buffer_pool=buffer_pool):
+        pooled.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帧缓冲池基准测试")
+    parser.add_argument("--video", help="测试视频路径（默认自动生成1080P测试视频）")
+    parser.add_argument("--frames", type=int, default=60, help="提取帧数")
+    args = parser.parse_args()
+    
+    video_path = args.video or make_test_video(os.path.join(tempfile.gettempdir(), "bench_1080p.mp4"),
+                                               seconds=20, size=(1920, 1080))
+    extractor = FrameExtractor(video_path)
+    if not extractor.initialize():
+        print(f"无法加载视频：{video_path}")
+        return
+    info = extractor.video_info
+    frame_bytes = info['width'] * info['height'] * 3
+    print(f"视频：{info['filename']}（{info['resolution']}），单帧 {frame_bytes / 1024 ** 2:.1f} MB，提取 {args.frames} 帧")
+    
+    # 预热解码器
+    run_allocating(extractor, 3)
+    
+    buffer_pool = extractor.create_buffer_pool(count=2)
+    cases = [
+        ("逐帧分配", lambda: run_allocating(extractor, args.frames)),
+        ("缓冲池复用", lambda: run_pooled(extractor, args.frames, buffer_pool)),
+    ]
+    
+    for name, func in cases:
+        # 吞吐量单独测量，避免tracemalloc开销影响
+        with Timer() as timer:
+            func()
+        with AllocationCounter() as counter:
+            func()
+        print(f"  {name:8s} 吞吐量：{args.frames / timer.elapsed:7.1f} 帧/秒  "
+              f"峰值新增内存：{counter.peak / 1024 ** 2:7.1f} MB  结束时残留：{counter.current / 1024 ** 2:6.1f} MB")
+    
+    # 逐帧统计分配次数：缓冲池稳定后每帧新增的numpy数组应为0
+    tracemalloc.start()
+    run_pooled(extractor, 5, buffer_pool)
+    snapshot_before = tracemalloc.take_snapshot()
+    run_pooled(extractor, args.frames, buffer_pool)
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename') if stat.size_diff > 0)
+    print(f"  缓冲池稳定后 {args.frames} 帧的净内存增长：{grown / 1024:.1f} KB（单帧为 {frame_bytes / 1024:.0f} KB）")
+    print(f"  缓冲池统计：{buffer_pool.stats}")
+    
+    extractor.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+宫格缩放质量档位基准测试
+对比 best / balanced / fast 三档在JPEG源图上的格子准备耗时，
+并以best档结果为参考计算PSNR，衡量画质损失
+
+用法：python benchmarks/bench_resize.py [--source-size 3840x2160] [--cell-size 480x270] [--images 12]
+"""
+
+import os
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from bench_utils import make_test_video, Timer
+from src.frame_extractor import FrameExtractor
+from src.grid_synthesizer import GridSynthesizer
+
+
+def psnr(reference, image):
+    """计算两张图片的峰值信噪比（dB）"""
+    a = np.asarray(reference, dtype=np.float64)
+    b = np.asarray(image, dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="宫格缩放质量档位基准测试")
+    parser.add_argument("--source-size", default="3840x2160", help="源图尺寸")
+    parser.add_argument("--cell-size", default="480x270", help="格子尺寸")
+    parser.add_argument("--images", type=int, default=12, help="源图数量")
+    args = parser.parse_args()
+    
+    source_size = tuple(map(int, args.source_size.lower().split("x")))
+    cell_width, cell_height = map(int, args.cell_size.lower().split("x"))
+    
+    # 从测试视频提取JPEG源图
+    work_dir = tempfile.mkdtemp(prefix="bench_resize_")
+    video_path = make_test_video(os.path.join(tempfile.gettempdir(), f"bench_{args.source_size}.mp4"),
+                                 seconds=10, size=source_size)
+    extractor = FrameExtractor(video_path)
+    extractor.initialize()
+    image_paths = extractor.extract_to_dir(work_dir, num_frames=args.images, output_format='jpg', quality=90)
+    extractor.release()
+    
+    synthesizer = GridSynthesizer()
+    results = {}
+    for resize_quality in ('best', 'balanced', 'fast'):
+        tiles = []
+        with Timer() as timer:
+            for path in image_paths:
+                with Image.open(path) as img:
+                    tiles.append(synthesizer.center_crop(img, cell_width, cell_height, resize_quality))
+        results[resize_quality] = (timer.elapsed, tiles)
+    
+    best_time, best_tiles = results['best']
+    print(f"源图：{len(image_paths)} 张 {source_size[0]}×{source_size[1]} JPEG，格子：{cell_width}×{cell_height}")
+    print(f"{'档位':10s}{'ms/张':>10s}{'加速':>8s}{'PSNR(dB)':>12s}")
+    for resize_quality, (elapsed, tiles) in results.items():
+        values = [psnr(ref, tile) for ref, tile in zip(best_tiles, tiles)]
+        mean_psnr = np.mean(values) if resize_quality != 'best' else float('inf')
+        print(f"{resize_quality:10s}{elapsed / len(tiles) * 1000:10.1f}{best_time / elapsed:8.1f}x{mean_psnr:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场景检测基准测试
+对比ffmpeg滤镜（select(scene)、scdet）与OpenCV逐帧差分循环在相同视频上的耗时和检测到的切换点
+
+用法：python benchmarks/bench_scene_detection.py [--video 视频路径 ...] [--seconds 60]
+未指定视频时生成场景切换位置已知的测试视频，并统计各方法的命中情况
+"""
+
+import os
+import shutil
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+from bench_utils import make_test_video, Timer
+from src.ffmpeg_scene import DEFAULT_THRESHOLDS, score_scenes, detect_cuts
+
+
+def opencv_scores(video_path, scale_width=160):
+    """
+    OpenCV逐帧差分：逐帧解码并缩小为灰度图，分数为与上一帧的平均像素差（0-1）
+
+    Returns:
+        tuple: (时间点数组, 变化分数数组)
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    timestamps = []
+    scores = []
+    previous = None
+    frame_index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        height = max(2, round(frame.shape[0] * scale_width / frame.shape[1]))
+        gray = cv2.cvtColor(cv2.resize(frame, (scale_width, height), interpolation=cv2.INTER_AREA),
+                            cv2.COLOR_BGR2GRAY)
+        score = 0.0 if previous is None else float(cv2.absdiff(gray, previous).mean()) / 255.0
+        timestamps.append(frame_index / fps)
+        scores.append(score)
+        previous = gray
+        frame_index += 1
+    cap.release()
+    return np.asarray(timestamps), np.asarray(scores, dtype=np.float32)
+
+
+def match_cuts(detected, expected, tolerance):
+    """
+    统计检测结果与已知切换点的匹配情况
+
+    Returns:
+        tuple: (命中数, 误报数, 漏检数)
+    """
+    hits = 0
+    for cut in expected:
+        if len(detected) and np.min(np.abs(detected - cut)) <= tolerance:
+            hits += 1
+    false_alarms = sum(1 for cut in detected if not len(expected) or np.min(np.abs(expected - cut)) > tolerance)
+    return hits, false_alarms, len(expected) - hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="场景检测基准测试")
+    parser.add_argument('--video', nargs='*', default=None, help="视频路径，未指定则生成测试视频")
+    parser.add_argument('--seconds', type=int, default=60, help="测试视频时长（秒）")
+    parser.add_argument('--scene-seconds', type=int, default=3, help="测试视频每个场景的时长（秒）")
+    parser.add_argument('--scale-width', type=int, default=160, help="计算分数时的宽度")
+    parser.add_argument('--ffmpeg-threshold', type=float, default=None,
+                        help="ffmpeg分数阈值（默认：select为0.3，scdet为0.1）")
+    parser.add_argument('--opencv-threshold', type=float, default=0.1, help="OpenCV帧差分数阈值")
+    args = parser.parse_args()
+
+    fps = 25
+    expected = None
+    videos = args.video
+    if not videos:
+        video_path = os.path.join(tempfile.gettempdir(), f"bench_scene_{args.seconds}s_{args.scene_seconds}.mp4")
+        make_test_video(video_path, seconds=args.seconds, fps=fps, scene_seconds=args.scene_seconds)
+        videos = [video_path]
+        expected = np.arange(args.scene_seconds, args.seconds, args.scene_seconds, dtype=np.float64)
+
+    methods = [('opencv', args.opencv_threshold,
+                lambda path: opencv_scores(path, args.scale_width))]
+    if shutil.which('ffmpeg'):
+        for backend in ('select', 'scdet'):
+            threshold = args.ffmpeg_threshold if args.ffmpeg_threshold is not None else DEFAULT_THRESHOLDS[backend]
+            methods.append((f"ffmpeg-{backend}", threshold,
+                            lambda path, backend=backend: score_scenes(path, backend, args.scale_width)))
+    else:
+        print("未找到ffmpeg，只测试OpenCV逐帧差分")
+
+    for video_path in videos:
+        print(f"\n视频：{video_path}")
+        print(f"{'方法':14s} {'耗时s':>8s} {'帧数':>7s} {'切换点':>6s} {'命中':>5s} {'误报':>5s} {'漏检':>5s}")
+        for name, threshold, run in methods:
+            with Timer() as timer:
+                timestamps, scores = run(video_path)
+            cuts = detect_cuts(timestamps, scores, threshold)
+            line = f"{name:14s} {timer.elapsed:8.2f} {len(scores):7d} {len(cuts):6d}"
+            if expected is not None:
+                hits, false_alarms, misses = match_cuts(cuts, expected, tolerance=1.5 / fps)
+                line += f" {hits:5d} {false_alarms:5d} {misses:5d}"
+            print(line)
+            print(f"{'':14s} 切换点：{', '.join(f'{t:.2f}' for t in cuts[:12])}{' ...' if len(cuts) > 12 else ''}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试公共工具
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2
+import numpy as np
+
+
+def make_test_video(path, seconds=10, fps=25, size=(1280, 720), scene_seconds=2):
+    """
+    生成测试视频（彩色场景 + 运动物体，每隔scene_seconds秒切换一次场景）
+    
+    Args:
+        path (str): 输出路径（.mp4）
+        seconds (int): 时长（秒）
+        fps (int): 帧率
+        size (tuple): 分辨率 (width, height)
+        scene_seconds (int): 每个场景的时长（秒）
+        
+    Returns:
+        str: 视频路径
+    """
+    if os.path.exists(path):
+        return path
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    rng = np.random.default_rng(0)
+    background = None
+    
+    for i in range(int(seconds * fps)):
+        if i % int(scene_seconds * fps) == 0:
+            # 新场景：随机色块背景
+            blocks = rng.integers(0, 255, (9, 16, 3), dtype=np.uint8)
+            background = cv2.resize(blocks, size, interpolation=cv2.INTER_NEAREST)
+        frame = background.copy()
+        x = int((i * 7) % width)
+        cv2.circle(frame, (x, height // 2), height // 8, (255, 255, 255), -1)
+        cv2.putText(frame, f"{i}", (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 4)
+        writer.write(frame)
+    
+    writer.release()
+    return path
+
+
+class Timer:
+    """计时上下文管理器"""
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ffmpeg场景检测解析检查
+用ffmpeg 7.0实际输出的metadata=print文本（select(scene)和scdet两种后端，截取场景切换附近的帧）
+检查元数据解析、分数换算和切换点判定；找到ffmpeg时再对生成的测试视频实际运行一遍
+
+用法：python benchmarks/check_ffmpeg_scene.py
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from bench_utils import make_test_video
+from src.ffmpeg_scene import DEFAULT_THRESHOLDS, parse_scene_metadata, score_scenes, detect_cuts
+
+
+# scale=160:-2:flags=fast_bilinear,select='gte(scene,0)',metadata=mode=print:file=-
+SELECT_OUTPUT = """\
+frame:0    pts:0       pts_time:0
+lavfi.scene_score=0.000000
+frame:1    pts:512     pts_time:0.04
+lavfi.scene_score=0.002453
+frame:2    pts:1024    pts_time:0.08
+lavfi.scene_score=0.000419
+frame:74   pts:37888   pts_time:2.96
+lavfi.scene_score=0.000561
+frame:75   pts:38400   pts_time:3
+lavfi.scene_score=0.455776
+frame:76   pts:38912   pts_time:3.04
+lavfi.scene_score=0.003636
+"""
+
+# scale=160:-2:flags=fast_bilinear,scdet=threshold=100,metadata=mode=print:file=-
+SCDET_OUTPUT = """\
+frame:0    pts:0       pts_time:0
+lavfi.scd.mafd=0.000
+lavfi.scd.score=0.000
+frame:1    pts:512     pts_time:0.04
+lavfi.scd.mafd=0.096
+lavfi.scd.score=0.096
+frame:74   pts:37888   pts_time:2.96
+lavfi.scd.mafd=0.174
+lavfi.scd.score=0.022
+frame:75   pts:38400   pts_time:3
+lavfi.scd.mafd=17.977
+lavfi.scd.score=17.804
+frame:76   pts:38912   pts_time:3.04
+lavfi.scd.mafd=0.142
+lavfi.scd.score=0.142
+"""
+
+
+def check_parser():
+    """解析两种后端的输出，分数换算到0-1，各自的默认阈值只判定出3秒处的切换"""
+    for backend, output, expected_times, expected_scores in (
+            ('select', SELECT_OUTPUT, [0.0, 0.04, 0.08, 2.96, 3.0, 3.04],
+             [0.0, 0.002453, 0.000419, 0.000561, 0.455776, 0.003636]),
+            ('scdet', SCDET_OUTPUT, [0.0, 0.04, 2.96, 3.0, 3.04],
+             [0.0, 0.00096, 0.00022, 0.17804, 0.00142])):
+        # 逐行读取管道时每行带换行符
+        timestamps, scores = parse_scene_metadata(output.splitlines(keepends=True), backend)
+        assert np.allclose(timestamps, expected_times), (backend, timestamps)
+        assert np.allclose(scores, expected_scores, atol=1e-6), (backend, scores)
+        cuts = detect_cuts(timestamps, scores, DEFAULT_THRESHOLDS[backend])
+        assert cuts.tolist() == [3.0], (backend, cuts)
+        print(f"{backend}：解析 {len(scores)} 帧，切换点 {cuts.tolist()}")
+
+    # 缺少分数或时间无法解析的帧被跳过
+    timestamps, scores = parse_scene_metadata(["frame:0 pts:0 pts_time:N/A", "lavfi.scene_score=0.5",
+                                               "frame:1 pts:1 pts_time:0.04", "lavfi.scene_score=nan?"])
+    assert len(timestamps) == 0 and len(scores) == 0
+
+
+def check_ffmpeg():
+    """实际运行ffmpeg，场景每3秒切换一次的测试视频应检测到全部切换点"""
+    temp_dir = tempfile.mkdtemp(prefix='ffmpeg_scene_')
+    try:
+        video_path = make_test_video(os.path.join(temp_dir, 'clip.mp4'), seconds=12, size=(320, 180),
+                                     scene_seconds=3)
+        for backend in ('select', 'scdet'):
+            timestamps, scores = score_scenes(video_path, backend)
+            cuts = detect_cuts(timestamps, scores, DEFAULT_THRESHOLDS[backend])
+            assert np.allclose(cuts, [3.0, 6.0, 9.0]), (backend, cuts)
+            print(f"{backend}（ffmpeg实际运行）：{len(scores)} 帧，切换点 {cuts.tolist()}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    check_parser()
+    if shutil.which('ffmpeg'):
+        check_ffmpeg()
+    else:
+        print("未找到ffmpeg，跳过实际运行")
+    print("通过")
+
+
+if __name__ == '__main__':
+    main()
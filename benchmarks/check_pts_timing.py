@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+显示时间戳计时检查
+1. 用构造的可变帧率时间戳（前半段30fps、后半段120fps）比较按帧序号和按时间均匀采样的时间分布；
+2. 在恒定帧率测试视频上检查按时间戳定位与按帧序号定位得到相同画面，并比较首次扫描与读取缓存的耗时；
+3. 找到ffmpeg时生成可变帧率视频（前2秒30fps、后2秒120fps），检查定位后解码出的帧与顺序解码的同一帧画面一致，
+   且OpenCV报告的帧时间（CAP_PROP_POS_MSEC）等于索引中的显示时间
+
+用法：python benchmarks/check_pts_timing.py [--video path.mp4] [--frames 6]
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import cv2
+import numpy as np
+
+from bench_utils import make_test_video
+from src.pts_index import TIME_TOLERANCE, PtsIndex, load_pts_index
+from src.frame_extractor import FrameExtractor
+
+
+def check_synthetic(num_frames):
+    """构造的可变帧率时间戳：按时间采样的间隔应均匀，按帧序号采样会集中在高帧率段"""
+    timestamps = np.concatenate([np.arange(0, 10, 1 / 30), 10 + np.arange(0, 10, 1 / 120)])
+    # 打乱顺序模拟按解码顺序输出的数据包，并加上起始偏移
+    index = PtsIndex(np.random.default_rng(0).permutation(timestamps) + 1.5)
+    assert index.frame_count == len(timestamps)
+    assert abs(index.duration - 20.0) < 1e-6
+    assert index.is_variable()
+
+    by_time = [index.time_of(p) for p in index.uniform_positions(num_frames)]
+    interval = index.frame_count // (num_frames - 1)
+    by_index = [index.time_of(min(i * interval, index.frame_count - 1)) for i in range(num_frames)]
+    print(f"按帧序号采样时间点：{', '.join(f'{t:.2f}' for t in by_index)}")
+    print(f"按时间采样时间点：  {', '.join(f'{t:.2f}' for t in by_time)}")
+    # 每个采样点取该时刻正在显示的帧，偏差不超过一个帧间隔
+    gaps = np.diff(by_time)
+    assert gaps.max() - gaps.min() <= 2 * np.diff(index.timestamps).max() + 1e-9, gaps
+
+
+def check_video(video_path, num_frames):
+    """恒定帧率视频：两种定位方式画面一致，缓存命中时无需再扫描"""
+    start = time.perf_counter()
+    load_pts_index(video_path)
+    scan_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index = load_pts_index(video_path)
+    cached_seconds = time.perf_counter() - start
+    print(f"时间戳来源：{index.source}，首次扫描 {scan_seconds * 1000:.1f} ms，读取缓存 {cached_seconds * 1000:.1f} ms")
+
+    plain = FrameExtractor(video_path)
+    timed = FrameExtractor(video_path)
+    try:
+        assert plain.initialize() and timed.initialize() and timed.enable_pts_timing()
+        positions = timed.compute_uniform_positions(num_frames)
+        for frame_pos in positions:
+            assert np.array_equal(plain._read_frame(frame_pos), timed._read_frame(frame_pos)), frame_pos
+        print(f"帧数 {timed.video_info['total_frames']}，时长 {timed.video_info['duration']:.3f} 秒，"
+              f"采样帧 {positions} 画面一致")
+    finally:
+        plain.release()
+        timed.release()
+
+
+def make_vfr_video(output_path):
+    """
+    生成可变帧率测试视频：从120fps的测试图案中取前60帧按30fps显示，再取240帧按120fps显示
+
+    Args:
+        output_path (str): 输出路径
+
+    Returns:
+        str: 输出路径
+    """
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc2=size=320x180:rate=120:duration=4',
+        '-vf', "select='lt(n,60)+gte(n,240)',setpts='if(lt(N,60),N/30,2+(N-60)/120)/TB'",
+        '-fps_mode', 'passthrough', '-c:v', 'libx264', '-g', '48', '-pix_fmt', 'yuv420p', output_path
+    ], check=True)
+    return output_path
+
+
+def check_vfr_seek(video_path, num_frames):
+    """可变帧率视频：定位后读到的帧与顺序解码的同一帧一致，解码器报告的时间等于索引中的显示时间"""
+    cap = cv2.VideoCapture(video_path)
+    reference = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        reference.append(frame)
+    cap.release()
+
+    extractor = FrameExtractor(video_path)
+    try:
+        assert extractor.initialize() and extractor.enable_pts_timing()
+        assert extractor.video_info['variable_frame_rate']
+        # 帧率切换前后的帧和按时间均匀采样的帧
+        positions = sorted(set([1, 30, 59, 60, 61, 150, len(reference) - 1] +
+                               extractor.compute_uniform_positions(num_frames)))
+        start = time.perf_counter()
+        for frame_pos in positions:
+            frame = extractor._read_frame(frame_pos)
+            decoded_time = extractor.video_processor.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            assert np.array_equal(frame, reference[frame_pos]), frame_pos
+            assert abs(decoded_time - extractor.timestamp_of(frame_pos)) <= TIME_TOLERANCE, (frame_pos, decoded_time)
+        elapsed = time.perf_counter() - start
+        print(f"可变帧率：{len(reference)} 帧，定位 {len(positions)} 次共 {elapsed * 1000:.1f} ms，"
+              f"帧 {positions} 画面与时间一致")
+    finally:
+        extractor.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="显示时间戳计时检查")
+    parser.add_argument('--video', default=None, help="测试视频，不指定则生成")
+    parser.add_argument('--frames', type=int, default=6, help="采样帧数")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='pts_timing_')
+    # 缓存写入临时目录，不影响用户目录
+    os.environ['VIDEO_KEYFRAME_TOOL_HOME'] = temp_dir
+    try:
+        check_synthetic(args.frames)
+        video_path = args.video or make_test_video(os.path.join(temp_dir, 'clip.mp4'), seconds=8, size=(320, 180))
+        check_video(video_path, args.frames)
+        if shutil.which('ffmpeg'):
+            check_vfr_seek(make_vfr_video(os.path.join(temp_dir, 'vfr.mp4')), args.frames)
+        else:
+            print("未找到ffmpeg，跳过可变帧率定位检查")
+        print("通过")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
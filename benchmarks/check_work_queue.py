@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享目录任务队列检查
+在临时目录中生成测试视频并入队，启动多个工作进程同时领取任务，
+其中一个进程领取任务后被强制结束（模拟机器宕机），检查每个任务恰好完成一次、队列中没有遗留任务
+
+用法：python benchmarks/check_work_queue.py [--videos 12] [--workers 4] [--lease-timeout 3] [--no-kill]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+
+from bench_utils import PROJECT_ROOT, make_test_video
+from src.work_queue import WorkQueue
+
+
+def start_worker(queue_dir, worker_id, lease_timeout):
+    """启动一个工作进程（子进程）"""
+    command = [sys.executable, os.path.join(PROJECT_ROOT, 'simple_cli.py'), 'worker', '--queue', queue_dir,
+               '--worker-id', worker_id, '--lease-timeout', str(lease_timeout), '--poll-interval', '0.2',
+               '--exit-when-empty']
+    return subprocess.Popen(command, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def claimed_names(queue_dir):
+    """处理中的任务文件名"""
+    return os.listdir(os.path.join(queue_dir, 'claimed'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共享目录任务队列检查")
+    parser.add_argument('--videos', type=int, default=12, help="测试视频数")
+    parser.add_argument('--workers', type=int, default=4, help="工作进程数")
+    parser.add_argument('--lease-timeout', type=float, default=3.0, help="租约超时（秒）")
+    parser.add_argument('--no-kill', action='store_true', help="不强制结束工作进程")
+    parser.add_argument('--timeout', type=float, default=300.0, help="等待全部完成的最长时间（秒）")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='work_queue_')
+    try:
+        queue_dir = os.path.join(temp_dir, 'queue')
+        output_dir = os.path.join(temp_dir, 'output')
+        queue = WorkQueue(queue_dir, lease_timeout=args.lease_timeout)
+
+        print(f"生成 {args.videos} 个测试视频...")
+        job_ids = []
+        for i in range(args.videos):
+            video_path = make_test_video(os.path.join(temp_dir, f"clip_{i:02d}.mp4"), seconds=4, size=(320, 180))
+            job_ids.append(queue.enqueue(video_path, output_dir=output_dir, num_frames=4))
+        # 重复入队应被忽略
+        assert queue.enqueue(os.path.join(temp_dir, 'clip_00.mp4'), output_dir=output_dir, num_frames=4) is None
+
+        print(f"启动 {args.workers} 个工作进程（租约超时 {args.lease_timeout} 秒）...")
+        start = time.perf_counter()
+        workers = [start_worker(queue_dir, f"w{i}", args.lease_timeout) for i in range(args.workers)]
+
+        killed = False
+        deadline = time.monotonic() + args.timeout
+        while any(p.poll() is None for p in workers) and time.monotonic() < deadline:
+            if not killed and not args.no_kill and any('.w0.' in name for name in claimed_names(queue_dir)):
+                # 模拟宕机：w0领取任务后被强制结束，该任务只能等租约超时后被其他进程收回
+                workers[0].kill()
+                killed = True
+                print("  w0领取任务后已被强制结束")
+            time.sleep(0.02)
+        for p in workers:
+            if p.poll() is None:
+                p.kill()
+        elapsed = time.perf_counter() - start
+
+        counts = queue.counts()
+        with open(os.path.join(queue_dir, 'completed.log'), 'r', encoding='utf-8') as f:
+            completions = [line.split() for line in f if line.strip()]
+        per_job = Counter(job_id for job_id, _, _ in completions)
+        per_worker = Counter(worker for _, worker, _ in completions)
+        retried = sum(1 for _, _, attempt in completions if int(attempt) > 1)
+
+        print(f"\n耗时 {elapsed:.1f} 秒；队列状态：{counts}")
+        print(f"各工作进程完成数：{dict(sorted(per_worker.items()))}；重新执行后完成的任务：{retried}")
+
+        errors = []
+        if counts['done'] != args.videos or counts['pending'] or counts['claimed'] or counts['failed']:
+            errors.append(f"队列状态不符：{counts}")
+        missing = [job_id for job_id in job_ids if per_job[job_id] == 0]
+        duplicated = [job_id for job_id, n in per_job.items() if n > 1]
+        if missing:
+            errors.append(f"未完成的任务：{missing}")
+        if duplicated:
+            errors.append(f"重复完成的任务：{duplicated}")
+        for i in range(args.videos):
+            grid_path = os.path.join(output_dir, f"clip_{i:02d}", f"clip_{i:02d}_宫格图.jpg")
+            if not os.path.isfile(grid_path):
+                errors.append(f"缺少宫格图：{grid_path}")
+
+        if errors:
+            print("❌ 检查失败：")
+            for error in errors:
+                print(f"  {error}")
+            return 1
+        print("✅ 每个任务恰好完成一次")
+        return 0
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地HTTP服务压力测试
+启动一个本地服务实例，并发发送 /info、/extract、/grid 请求，
+统计吞吐量、耗时分位数（含排队和503重试）和被拒绝（503）的次数
+
+用法：python benchmarks/load_test_http.py [--video 视频路径] [--requests 200] [--concurrency 16]
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import make_test_video, Timer
+from src.http_service import ThumbnailService
+
+
+def post(base_url, path, params):
+    """发送JSON请求，返回 (状态码, 响应内容)"""
+    request = urllib.request.Request(
+        base_url + path, data=json.dumps(params).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地HTTP服务压力测试")
+    parser.add_argument("--video", help="测试视频路径（默认自动生成）")
+    parser.add_argument("--requests", type=int, default=200, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--workers", type=int, default=None, help="服务工作进程数")
+    parser.add_argument("--queue-size", type=int, default=None, help="服务等待队列长度")
+    parser.add_argument("--max-retries", type=int, default=1000, help="被拒绝(503)后的最大重试次数")
+    parser.add_argument("--retry-delay", type=float, default=0.05, help="重试间隔（秒）")
+    args = parser.parse_args()
+    
+    work_dir = tempfile.mkdtemp(prefix="load_test_")
+    video_path = args.video or make_test_video(os.path.join(work_dir, "load_test.mp4"))
+    
+    service = ThumbnailService(port=0, workers=args.workers, queue_size=args.queue_size)
+    service.start()
+    base_url = f"http://{service.address[0]}:{service.address[1]}"
+    print(f"服务地址：{base_url}，工作进程：{service.workers}，等待队列：{service.queue_size}")
+    
+    # 预先提取一组帧用于 /grid 请求
+    status, body = post(base_url, '/extract', {'video_path': video_path, 'output_dir': os.path.join(work_dir, 'seed'),
+                                               'num_frames': 9})
+    grid_inputs = body['result']['paths']
+    
+    def one_request(i):
+        kind = i % 3
+        if kind == 0:
+            path, params = '/info', {'video_path': video_path}
+        elif kind == 1:
+            path, params = '/extract', {'video_path': video_path, 'num_frames': 5,
+                                        'output_dir': os.path.join(work_dir, f'extract_{i}')}
+        else:
+            path, params = '/grid', {'image_paths': grid_inputs, 'output_path': os.path.join(work_dir, f'grid_{i}.jpg')}
+        
+        # 被拒绝(503)时稍后重试，记录重试次数
+        rejected = 0
+        with Timer() as timer:
+            status, _ = post(base_url, path, params)
+            while status == 503 and rejected < args.max_retries:
+                rejected += 1
+                time.sleep(args.retry_delay)
+                status, _ = post(base_url, path, params)
+        return path.lstrip('/'), status, timer.elapsed, rejected
+    
+    try:
+        with Timer() as total:
+            with ThreadPoolExecutor(args.concurrency) as executor:
+                results = list(executor.map(one_request, range(args.requests)))
+    finally:
+        metrics = json.loads(urllib.request.urlopen(base_url + '/metrics').read())
+        service.shutdown()
+    
+    ok = [r for r in results if r[1] == 200]
+    rejected = [r for r in results if r[1] == 503]
+    print(f"\n请求总数：{len(results)}，成功：{len(ok)}，最终被拒绝(503)：{len(rejected)}，"
+          f"其他错误：{len(results) - len(ok) - len(rejected)}，503重试次数：{sum(r[3] for r in results)}")
+    print(f"总耗时：{total.elapsed:.2f}秒，吞吐量：{len(ok) / total.elapsed:.1f} 请求/秒")
+    for kind in ('info', 'extract', 'grid'):
+        latencies = [r[2] * 1000 for r in ok if r[0] == kind]
+        if latencies:
+            print(f"  {kind:8s} 次数={len(latencies):4d}  p50={percentile(latencies, 0.5):8.1f}ms  "
+                  f"p95={percentile(latencies, 0.95):8.1f}ms  max={max(latencies):8.1f}ms")
+    print("\n服务端指标：")
+    print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
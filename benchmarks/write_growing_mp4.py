@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+录制中视频的本地测试
+用ffmpeg按实时速度逐步写出分片MP4（frag_keyframe+empty_moov），
+同时用LiveContactSheet跟随该文件，输出每次检查新解码的帧数和重绘的格子数
+
+用法：python benchmarks/write_growing_mp4.py [--seconds 60] [--interval 5] [--output-dir 目录]
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import bench_utils  # 添加项目根目录到Python路径
+from src.live_follow import LiveContactSheet
+
+
+def start_writer(path, seconds, fps, size, ffmpeg_cmd='ffmpeg'):
+    """
+    启动ffmpeg，按实时速度写出分片MP4
+
+    Args:
+        path (str): 输出路径
+        seconds (int): 录制时长（秒）
+        fps (int): 帧率
+        size (tuple): 分辨率 (width, height)
+        ffmpeg_cmd (str): ffmpeg命令
+
+    Returns:
+        subprocess.Popen: ffmpeg进程
+    """
+    width, height = size
+    cmd = [
+        ffmpeg_cmd, '-y', '-loglevel', 'error', '-re',
+        '-f', 'lavfi', '-i', f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-g', str(fps), '-pix_fmt', 'yuv420p',
+        # 每个关键帧开始新分片，moov中不含样本表，写出的部分随时可读
+        '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+        path
+    ]
+    return subprocess.Popen(cmd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制中视频的实时宫格图测试")
+    parser.add_argument('--seconds', type=int, default=60, help="录制时长（秒）")
+    parser.add_argument('--fps', type=int, default=25, help="帧率")
+    parser.add_argument('--size', default='1280x720', help="分辨率，如1280x720")
+    parser.add_argument('--interval', type=float, default=5.0, help="采样间隔（秒）")
+    parser.add_argument('--refresh', type=float, default=2.0, help="检查间隔（秒）")
+    parser.add_argument('--cells', type=int, default=9, help="格子数")
+    parser.add_argument('--output-dir', default=None, help="输出目录，默认使用临时目录")
+    args = parser.parse_args()
+
+    if shutil.which('ffmpeg') is None:
+        print("未找到ffmpeg，无法生成录制中的分片MP4")
+        return 1
+
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix='live_follow_')
+    os.makedirs(output_dir, exist_ok=True)
+    video_path = os.path.join(output_dir, 'recording.mp4')
+    sheet_path = os.path.join(output_dir, 'live.jpg')
+    if os.path.exists(video_path):
+        os.remove(video_path)
+
+    width, height = map(int, args.size.lower().split('x'))
+    writer = start_writer(video_path, args.seconds, args.fps, (width, height))
+    sheet = LiveContactSheet(video_path, sheet_path, cells=args.cells, sample_interval=args.interval)
+
+    print(f"录制中：{video_path}（{args.seconds} 秒）")
+    print(f"{'时间':>6s} {'文件大小':>10s} {'新解码帧':>8s} {'累计帧':>8s} {'重绘格子':>8s} {'耗时ms':>8s}")
+    start = time.monotonic()
+    try:
+        while True:
+            finished = writer.poll() is not None
+            decoded_before = sheet.stats['decoded_frames']
+            with bench_utils.Timer() as timer:
+                redrawn = sheet.update()
+            size = sheet.last_size if sheet.last_size > 0 else 0
+            print(f"{time.monotonic() - start:6.1f} {size / 1024:9.0f}K "
+                  f"{sheet.stats['decoded_frames'] - decoded_before:8d} {sheet.next_frame:8d} "
+                  f"{redrawn:8d} {timer.elapsed * 1000:8.1f}")
+            if finished:
+                break
+            time.sleep(args.refresh)
+    finally:
+        if writer.poll() is None:
+            writer.terminate()
+        writer.wait()
+
+    expected = args.seconds * args.fps
+    # 每帧只解码一次时，解码总数等于录制帧数
+    print(f"\n共解码 {sheet.stats['decoded_frames']} 帧（录制 {expected} 帧），"
+          f"检查 {sheet.stats['polls']} 次，更新宫格图 {sheet.stats['renders']} 次")
+    print(f"宫格图：{sheet_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
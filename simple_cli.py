@@ -8,8 +8,11 @@
 
 import os
 import sys
+import argparse
 from src.frame_extractor import FrameExtractor
 from src.grid_synthesizer import GridSynthesizer
+from src.strip_synthesizer import StripSynthesizer
+from src.video_processor import format_timestamp
 
 
 def print_welcome():
@@ -83,13 +86,13 @@ def get_extraction_params():
         num_frames = default_num_frames
     
     # 图片格式
-    img_format = input(f"图片格式（默认：{default_format}，可选：jpg/png）：").strip().lower()
-    if img_format not in ["jpg", "png"]:
+    img_format = input(f"图片格式（默认：{default_format}，可选：jpg/png/webp）：").strip().lower()
+    if img_format not in ["jpg", "png", "webp"]:
         img_format = default_format
     
-    # 图片质量（仅jpg有效）
+    # 图片质量（jpg和webp有效）
     quality = default_quality
-    if img_format == "jpg":
+    if img_format in ["jpg", "webp"]:
         try:
             quality_input = input(f"图片质量（默认：{default_quality}，0-100）：").strip()
             quality = int(quality_input) if quality_input else default_quality
@@ -101,7 +104,13 @@ def get_extraction_params():
     save_dir = input(f"保存目录（默认：{default_save_dir}）：").strip()
     save_dir = save_dir if save_dir else default_save_dir
     
-    return num_frames, img_format, quality, save_dir
+    # 重复画面去除（适合PPT、访谈等画面变化少的视频）
+    dedup = input(f"是否去除重复画面？（y/n，默认n）：").strip().lower() in ["y", "yes", "是"]
+    
+    # 清晰画面挑选（避开运动模糊和转场画面）
+    sharpest = input(f"是否在采样点附近自动挑选最清晰的画面？（y/n，默认n）：").strip().lower() in ["y", "yes", "是"]
+    
+    return num_frames, img_format, quality, save_dir, dedup, sharpest
 
 
 def get_grid_params():
@@ -140,13 +149,645 @@ def get_grid_params():
     except ValueError:
         pass
     
-    return layout, spacing
+    # 标题
+    title = input(f"宫格图标题（默认：无标题）：").strip() or None
+    
+    # 时间戳标注
+    show_timestamps = input(f"是否在每格标注时间戳？（y/n，默认n）：").strip().lower() in ["y", "yes", "是"]
+    
+    return layout, spacing, title, show_timestamps
+
+
+def cmd_serve(args):
+    """
+    启动本地HTTP服务
+    """
+    from src.http_service import ThumbnailService
+    
+    service = ThumbnailService(args.host, args.port, workers=args.workers, queue_size=args.queue_size)
+    host, port = service.address[:2]
+    print(f"🌐 服务已启动：http://{host}:{port}（工作进程：{service.workers}，等待队列：{service.queue_size}）")
+    print("接口：POST /info、/extract、/grid，GET /metrics、/health，按 Ctrl+C 停止")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+    return 0
+
+
+def cmd_select_encoder(args):
+    """
+    基准测试编码后端，并将最快的后端写入配置
+    """
+    from src.image_encoder import select_fastest_encoder
+    
+    width, height = map(int, args.size.lower().split("x"))
+    fastest, results = select_fastest_encoder(args.format, args.quality, (width, height), args.repeats,
+                                              pin=not args.dry_run)
+    print(f"📊 编码后端基准测试（{args.format}，质量 {args.quality}，{width}×{height}）：")
+    for name, result in sorted(results.items(), key=lambda item: item[1]['seconds']):
+        print(f"  {name:8s} {result['seconds'] * 1000:8.2f} ms/张  {result['bytes'] / 1024:8.1f} KB")
+    print(f"✅ 最快的后端：{fastest}" + ("" if args.dry_run else "（已写入配置）"))
+    return 0
+
+
+def cmd_follow(args):
+    """
+    跟随录制中的视频，持续更新滚动宫格图
+    """
+    from src.live_follow import LiveContactSheet
+    
+    width, height = map(int, args.cell_size.lower().split("x"))
+    sheet = LiveContactSheet(args.video, args.output, cells=args.cells, sample_interval=args.interval,
+                             cell_size=(width, height), quality=args.quality)
+    print(f"👀 正在跟随：{args.video}（每 {args.refresh} 秒检查一次，停止增长 {args.idle_timeout} 秒后结束）")
+    
+    def on_update(redrawn):
+        print(f"  已解码到第 {sheet.next_frame} 帧，重绘 {redrawn} 格 → {args.output}")
+    
+    try:
+        stats = sheet.follow(args.refresh, args.idle_timeout, on_update)
+    except KeyboardInterrupt:
+        stats = sheet.stats
+    print(f"✅ 跟随结束：解码 {stats['decoded_frames']} 帧，采样 {stats['samples']} 帧，"
+          f"更新宫格图 {stats['renders']} 次")
+    return 0
+
+
+def cmd_merge(args):
+    """
+    从多个视频并行提取关键帧并合成宫格图
+    """
+    from src.multi_video import merge_videos_to_grids
+    
+    cell_size = None
+    if args.cell_size:
+        cell_size = tuple(map(int, args.cell_size.lower().split("x")))
+    print(f"🎞️ 正在从 {len(args.videos)} 个视频提取关键帧（每个 {args.frames} 张）...")
+    
+    def on_progress(added, total):
+        print(f"\r  已合成 {added}/{total} 格", end="", flush=True)
+    
+    grid_paths = merge_videos_to_grids(args.videos, args.output, num_frames=args.frames, order=args.order,
+                                       max_per_grid=args.max_per_grid, frames_dir=args.frames_dir,
+                                       cell_size=cell_size, show_captions=not args.no_captions,
+                                       quality=args.quality, max_workers=args.workers, callback=on_progress)
+    print()
+    if not grid_paths:
+        print("❌ 没有提取到任何关键帧")
+        return 1
+    for path in grid_paths:
+        print(f"✅ 宫格图：{path}")
+    return 0
+
+
+def cmd_signature(args):
+    """
+    生成视频特征摘要，并按摘要规划和提取关键帧
+    """
+    import time
+    from src.signature_sidecar import VideoSignature, build_signature
+    from src.frame_extractor import FrameExtractor
+    
+    signature = None if args.rebuild else VideoSignature.load(args.video)
+    if signature is None:
+        print(f"🔍 正在分析视频（每秒 {args.samples_per_second} 个采样点）...")
+        start = time.perf_counter()
+        signature = build_signature(args.video, samples_per_second=args.samples_per_second)
+        if signature is None:
+            print(f"❌ 无法分析视频：{args.video}")
+            return 1
+        print(f"✅ 特征摘要已生成：{signature.signature_dir}（{time.perf_counter() - start:.1f} 秒）")
+    
+    start = time.perf_counter()
+    frame_indices = signature.plan(args.mode, args.frames)
+    print(f"📋 {args.mode} 模式规划了 {len(frame_indices)} 帧（{(time.perf_counter() - start) * 1000:.2f} 毫秒）："
+          f"{', '.join(format_timestamp(i / signature.fps) for i in frame_indices)}")
+    
+    if args.preview:
+        signature.save_preview(frame_indices, args.preview)
+        print(f"🖼️ 预览图：{args.preview}")
+    
+    if args.output_dir:
+        # 只解码规划选中的帧
+        extractor = FrameExtractor(args.video)
+        try:
+            if not extractor.initialize():
+                print(f"❌ 无法加载视频：{args.video}")
+                return 1
+            saved_paths = extractor.extract_positions_to_dir(args.output_dir, frame_indices, args.format, args.quality)
+        finally:
+            extractor.release()
+        print(f"✅ 已提取 {len(saved_paths)} 张关键帧到：{args.output_dir}")
+    return 0
+
+
+def cmd_sprites(args):
+    """
+    生成播放器拖动预览用的雪碧图和WebVTT文件
+    """
+    import time
+    from src.sprite_thumbnails import SpriteThumbnailGenerator
+    
+    generator = SpriteThumbnailGenerator(args.video, interval=args.interval, thumb_width=args.width,
+                                         columns=args.columns, rows=args.rows, output_format=args.format,
+                                         quality=args.quality, workers=args.workers, backend=args.backend,
+                                         fast_decode=not args.exact_frames)
+    
+    def on_progress(done, total):
+        print(f"\r  已处理 {done}/{total} 帧", end="", flush=True)
+    
+    start = time.perf_counter()
+    try:
+        result = generator.generate(args.output_dir, base_url=args.base_url, callback=on_progress)
+    except RuntimeError as e:
+        print(f"\n❌ {e}")
+        return 1
+    print()
+    if result is None:
+        print(f"❌ 无法加载视频：{args.video}")
+        return 1
+    print(f"✅ 已生成 {result['thumbnails']} 张缩略图、{len(result['sprites'])} 张雪碧图"
+          f"（{result['backend']}，{time.perf_counter() - start:.1f} 秒）")
+    print(f"📄 WebVTT：{result['vtt']}")
+    return 0
+
+
+def cmd_export_npy(args):
+    """
+    提取关键帧并追加到帧数组存储
+    """
+    from src.frame_store import FrameStoreWriter
+    
+    try:
+        writer = FrameStoreWriter(args.store, chunk_frames=args.chunk_frames, downscale_width=args.downscale_width,
+                                  keep_full=not args.small_only)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    with writer:
+        for video_path in args.videos:
+            extractor = FrameExtractor(video_path)
+            try:
+                if not extractor.initialize():
+                    print(f"❌ 无法加载视频：{video_path}")
+                    continue
+                indices = extractor.extract_to_store(writer, args.frames)
+            except ValueError as e:
+                # 帧尺寸与存储不一致
+                print(f"❌ {video_path}：{e}")
+                continue
+            finally:
+                extractor.release()
+            print(f"✅ {video_path}：已写入 {len(indices)} 帧")
+        print(f"📦 帧存储：{args.store}（共 {writer.count} 帧）")
+    return 0
+
+
+def cmd_batch(args):
+    """
+    可断点续跑的批量处理：已完成的阶段直接跳过，只重做未完成的阶段
+    """
+    from src.batch_manifest import BatchManifest, BatchRunner
+    
+    manifest = BatchManifest(args.manifest or os.path.join(args.output_dir, "batch_manifest.sqlite"))
+    runner = BatchRunner(manifest, args.output_dir, num_frames=args.frames, output_format=args.format,
+                         quality=args.quality, make_grid=not args.no_grid, show_timestamps=args.timestamps,
+                         verify="exists" if args.no_checksum else "checksum")
+    
+    labels = {"skipped": "⏭️ 跳过", "done": "✅ 完成", "failed": "❌ 失败"}
+    
+    def on_stage(video_path, stage, outcome):
+        print(f"  {labels[outcome]} {os.path.basename(video_path)} [{stage}]")
+    
+    try:
+        result = runner.run(args.videos, callback=on_stage)
+    finally:
+        manifest.close()
+    print(f"\n📊 完成 {len(result['done'])} 个视频，失败 {len(result['failed'])} 个；"
+          f"执行 {result['ran']} 个阶段，跳过 {result['skipped']} 个已完成的阶段")
+    return 0 if not result['failed'] else 1
+
+
+def cmd_enqueue(args):
+    """
+    向共享目录任务队列添加视频
+    """
+    from src.work_queue import WorkQueue
+    
+    queue = WorkQueue(args.queue)
+    added = 0
+    for video_path in args.videos:
+        if not os.path.isfile(video_path):
+            print(f"❌ 视频文件不存在：{video_path}")
+            continue
+        job_id = queue.enqueue(video_path, output_dir=os.path.abspath(args.output_dir) if args.output_dir else None,
+                               num_frames=args.frames, output_format=args.format, quality=args.quality,
+                               make_grid=not args.no_grid, show_timestamps=args.timestamps)
+        if job_id:
+            added += 1
+            print(f"  ➕ {os.path.basename(video_path)} -> {job_id}")
+        else:
+            print(f"  ⏭️ 已在队列中：{os.path.basename(video_path)}")
+    counts = queue.counts()
+    print(f"\n📊 新增 {added} 个任务；待处理 {counts['pending']}，处理中 {counts['claimed']}，"
+          f"已完成 {counts['done']}，失败 {counts['failed']}")
+    return 0
+
+
+def cmd_worker(args):
+    """
+    作为队列工作进程运行：领取任务，提取关键帧并合成宫格图
+    """
+    from src.work_queue import WorkQueue, QueueWorker
+    
+    queue = WorkQueue(args.queue, lease_timeout=args.lease_timeout, max_attempts=args.max_attempts)
+    worker = QueueWorker(queue, worker_id=args.worker_id, poll_interval=args.poll_interval)
+    labels = {"done": "✅ 完成", "pending": "🔁 失败，稍后重试", "failed": "❌ 失败", "lost": "⚠️ 租约已超时，结果丢弃"}
+    
+    def on_job(job, outcome):
+        print(f"  {labels[outcome]} {os.path.basename(job.payload['video_path'])}（第{job.attempt}次）")
+    
+    print(f"👷 工作进程 {worker.worker_id} 已启动，队列：{args.queue}")
+    try:
+        stats = worker.run(max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty, callback=on_job)
+    except KeyboardInterrupt:
+        print("\n⏹️ 已停止（处理中的任务将在租约超时后由其他工作进程接手）")
+        return 1
+    print(f"\n📊 完成 {stats['completed']} 个，重试 {stats['retried']} 个，失败 {stats['failed']} 个，"
+          f"租约超时 {stats['lost']} 个")
+    return 0
+
+
+def cmd_watch(args):
+    """
+    监视文件夹：文件写入完成后自动提取关键帧并合成宫格图
+    """
+    import time
+    from src.hot_folder import HotFolderWatcher
+    
+    options = {"num_frames": args.frames, "output_format": args.format, "quality": args.quality,
+               "make_grid": not args.no_grid, "show_timestamps": args.timestamps}
+    watcher = HotFolderWatcher(args.folder, args.output_dir, workers=args.workers, settle_seconds=args.settle,
+                               pipeline_options=options, done_dir=args.done_dir, failed_dir=args.failed_dir)
+    labels = {"started": "▶️ 开始", "done": "✅ 完成", "failed": "❌ 失败"}
+    last_report = [time.monotonic()]
+    
+    def on_event(event, path, info):
+        message = f"  {labels[event]} {os.path.basename(path)}"
+        if event == "failed":
+            message += f"：{info}"
+        print(message)
+        if args.stats_interval and time.monotonic() - last_report[0] >= args.stats_interval:
+            last_report[0] = time.monotonic()
+            stats = watcher.stats()
+            print(f"  📊 排队 {stats['queue_depth']}，处理中 {stats['in_flight']}/{stats['workers']}，"
+                  f"监视中 {stats['watching']}，吞吐量 {stats['throughput_per_min']} 个/分钟")
+    
+    print(f"👀 正在监视：{args.folder}（文件 {args.settle} 秒内无变化后处理，同时处理 {watcher.workers} 个，按 Ctrl+C 停止）")
+    try:
+        stats = watcher.run(poll_interval=args.poll, callback=on_event, idle_exit=args.idle_exit)
+    except KeyboardInterrupt:
+        stats = watcher.stats()
+    print(f"\n📊 完成 {stats['processed']} 个，失败 {stats['failed']} 个；合并重复事件 {stats['coalesced']} 次，"
+          f"平均延迟 {stats['mean_latency']} 秒")
+    return 0 if not stats['failed'] else 1
+
+
+def cmd_analyze(args):
+    """
+    单次解码运行多个逐帧分析器，按列导出CSV或NPZ
+    """
+    from src.frame_analyzers import AnalysisPipeline, get_analyzer
+    
+    try:
+        analyzers = [get_analyzer(name.strip()) for name in args.analyzers.split(",") if name.strip()]
+        pipeline = AnalysisPipeline(analyzers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    def on_progress(done, total):
+        print(f"\r  已读取 {done}/{total} 帧", end="", flush=True)
+    
+    print(f"🔍 正在分析：{args.video}（{', '.join(a.name for a in analyzers)}）")
+    try:
+        result = pipeline.run(args.video, step=args.step, sample_fps=args.sample_fps, callback=on_progress)
+        result.save(args.output)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        return 1
+    print(f"\n✅ 已分析 {len(result)} 帧，共 {len(result.columns)} 列 → {args.output}")
+    print("⏱️ 耗时：" + "，".join(f"{name} {seconds:.2f}s" for name, seconds in result.timings.items()))
+    return 0
+
+
+def cmd_audio_peaks(args):
+    """
+    按音频峰值（掌声、讲话开始、巨响等）提取关键帧
+    """
+    from src.audio_keyframes import extract_audio_keyframes
+    
+    print(f"🔊 正在分析音轨：{args.video}")
+    try:
+        result = extract_audio_keyframes(args.video, args.output_dir, num_frames=args.frames, mode=args.mode,
+                                         min_gap=args.min_gap, output_format=args.format, quality=args.quality)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+    if not result['paths']:
+        print("❌ 没有提取到任何关键帧")
+        return 1
+    for path, timestamp in zip(result['paths'], result['frame_timestamps']):
+        print(f"  [{format_timestamp(timestamp)}] {path}")
+    print(f"✅ 已按音频峰值提取 {len(result['paths'])} 张关键帧 → {args.output_dir}")
+    return 0
+
+
+def cmd_pack(args):
+    """
+    提取关键帧并与宫格图一起直接写入zip/tar归档（可输出到标准输出）
+    """
+    from src.archive_sink import ArchiveSink, pack_videos
+    
+    # 归档写到标准输出时，提示信息输出到标准错误
+    log = sys.stderr if args.output == "-" else sys.stdout
+    
+    def on_video(video_path, names):
+        if names is None:
+            print(f"  ❌ 无法处理：{video_path}", file=log)
+        else:
+            print(f"  ✅ {os.path.basename(video_path)}：{len(names)} 个文件", file=log)
+    
+    try:
+        with ArchiveSink(args.output, args.archive_format) as sink:
+            results = pack_videos(args.videos, sink, num_frames=args.frames, output_format=args.format,
+                                  quality=args.quality, make_grid=not args.no_grid,
+                                  show_timestamps=args.timestamps, pts_timing=args.pts_timing,
+                                  callback=on_video)
+    except ValueError as e:
+        print(f"❌ {e}", file=log)
+        return 1
+    failed = sum(1 for names in results.values() if names is None)
+    print(f"📦 已写入 {len(sink.names)} 个文件（{sink.bytes_written / 1024 / 1024:.1f} MB）→ {args.output}", file=log)
+    return 0 if not failed else 1
+
+
+def cmd_timing(args):
+    """
+    按实际显示时间戳报告视频时长和帧率，可按时间均匀提取关键帧（适用于可变帧率视频）
+    """
+    extractor = FrameExtractor(args.video)
+    try:
+        if not extractor.initialize():
+            print(f"❌ 无法加载视频：{args.video}")
+            return 1
+        nominal = dict(extractor.video_info)
+        if not extractor.enable_pts_timing(allow_decode=not args.no_decode):
+            print("❌ 无法获取显示时间戳（需要ffprobe，或去掉--no-decode以逐帧解码读取）")
+            return 1
+        pts_index = extractor.pts_index
+        low, high = pts_index.fps_range()
+        source = "ffprobe数据包扫描" if pts_index.source == "ffprobe" else "逐帧解码"
+        print(f"⏱️ 时间戳来源：{source}（已缓存）")
+        print(f"  时长：{format_timestamp(pts_index.duration)}（按帧率估算：{format_timestamp(nominal.get('duration', 0))}）")
+        print(f"  帧数：{pts_index.frame_count}（容器标称：{nominal.get('total_frames', 0)}）")
+        print(f"  帧率：平均 {pts_index.average_fps:.3f}fps，范围 {low:.3f}-{high:.3f}fps（标称：{nominal.get('fps', 0):.3f}fps）")
+        print(f"  可变帧率：{'是' if pts_index.is_variable() else '否'}")
+        
+        if args.output_dir:
+            paths = extractor.extract_to_dir(args.output_dir, num_frames=args.frames, output_format=args.format,
+                                             quality=args.quality)
+            if not paths:
+                print("❌ 没有提取到任何关键帧")
+                return 1
+            for path, timestamp in zip(paths, extractor.frame_timestamps):
+                print(f"  [{format_timestamp(timestamp)}] {path}")
+            print(f"✅ 已按时间均匀提取 {len(paths)} 张关键帧 → {args.output_dir}")
+    finally:
+        extractor.release()
+    return 0
+
+
+def build_arg_parser():
+    """
+    构建命令行参数解析器（非交互模式）
+    """
+    parser = argparse.ArgumentParser(description="视频关键帧提取与宫格合成工具（不带参数运行进入交互模式）")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    # 本地HTTP服务
+    serve_parser = subparsers.add_parser("serve", help="启动本地HTTP服务")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认：127.0.0.1）")
+    serve_parser.add_argument("--port", type=int, default=8765, help="监听端口（默认：8765）")
+    serve_parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认：CPU核心数）")
+    serve_parser.add_argument("--queue-size", type=int, default=None, help="等待队列长度（默认：工作进程数的2倍）")
+    serve_parser.set_defaults(func=cmd_serve)
+    
+    # 编码后端选择
+    encoder_parser = subparsers.add_parser("select-encoder", help="基准测试图片编码后端并固定最快的后端")
+    encoder_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    encoder_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    encoder_parser.add_argument("--size", default="1920x1080", help="图片尺寸，如1920x1080")
+    encoder_parser.add_argument("--repeats", type=int, default=5, help="每个后端重复编码次数（默认：5）")
+    encoder_parser.add_argument("--dry-run", action="store_true", help="只测试，不写入配置")
+    encoder_parser.set_defaults(func=cmd_select_encoder)
+    
+    # 跟随录制中的视频
+    follow_parser = subparsers.add_parser("follow", help="跟随录制中的视频并持续更新滚动宫格图")
+    follow_parser.add_argument("video", help="视频文件路径（建议使用分片MP4）")
+    follow_parser.add_argument("--output", required=True, help="宫格图输出路径")
+    follow_parser.add_argument("--cells", type=int, default=9, help="格子数（默认：9）")
+    follow_parser.add_argument("--interval", type=float, default=10.0, help="采样间隔，单位秒（默认：10）")
+    follow_parser.add_argument("--cell-size", default="320x180", help="格子尺寸（默认：320x180）")
+    follow_parser.add_argument("--quality", type=int, default=85, help="图片质量（默认：85）")
+    follow_parser.add_argument("--refresh", type=float, default=5.0, help="检查间隔，单位秒（默认：5）")
+    follow_parser.add_argument("--idle-timeout", type=float, default=60.0, help="文件停止增长多久后结束，单位秒（默认：60）")
+    follow_parser.set_defaults(func=cmd_follow)
+    
+    # 多视频合并宫格图
+    merge_parser = subparsers.add_parser("merge", help="从多个视频并行提取关键帧并合成宫格图")
+    merge_parser.add_argument("videos", nargs="+", help="视频文件路径")
+    merge_parser.add_argument("--output", required=True, help="宫格图输出路径")
+    merge_parser.add_argument("--frames", type=int, default=5, help="每个视频提取的帧数（默认：5）")
+    merge_parser.add_argument("--order", default="grouped", choices=["grouped", "interleaved"],
+                              help="排列顺序：grouped按视频分组，interleaved按时间点交错（默认：grouped）")
+    merge_parser.add_argument("--max-per-grid", type=int, default=None, help="每张宫格图最多的格子数（默认：合成为一张）")
+    merge_parser.add_argument("--frames-dir", default=None, help="关键帧保存目录（默认：输出路径旁的xxx_frames目录）")
+    merge_parser.add_argument("--cell-size", default=None, help="格子尺寸，如320x180（默认：关键帧原始尺寸）")
+    merge_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    merge_parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认：CPU核心数）")
+    merge_parser.add_argument("--no-captions", action="store_true", help="不标注视频序号和时间戳")
+    merge_parser.set_defaults(func=cmd_merge)
+    
+    # 视频特征摘要
+    signature_parser = subparsers.add_parser("signature", help="生成视频特征摘要，并按摘要即时规划和提取关键帧")
+    signature_parser.add_argument("video", help="视频文件路径")
+    signature_parser.add_argument("--mode", default="uniform", choices=["uniform", "scene", "hybrid"],
+                                  help="提取模式（默认：uniform）")
+    signature_parser.add_argument("--frames", type=int, default=5, help="帧数（默认：5）")
+    signature_parser.add_argument("--preview", default=None, help="用摘要缩略图合成预览宫格图的输出路径")
+    signature_parser.add_argument("--output-dir", default=None, help="提取关键帧的保存目录，不指定则只规划")
+    signature_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    signature_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    signature_parser.add_argument("--samples-per-second", type=float, default=1.0, help="每秒采样数（默认：1）")
+    signature_parser.add_argument("--rebuild", action="store_true", help="重新生成特征摘要")
+    signature_parser.set_defaults(func=cmd_signature)
+    
+    # 拖动预览雪碧图
+    sprites_parser = subparsers.add_parser("sprites", help="生成播放器拖动预览用的雪碧图和WebVTT文件")
+    sprites_parser.add_argument("video", help="视频文件路径")
+    sprites_parser.add_argument("--output-dir", required=True, help="输出目录")
+    sprites_parser.add_argument("--interval", type=float, default=10.0, help="缩略图间隔，单位秒（默认：10）")
+    sprites_parser.add_argument("--width", type=int, default=160, help="缩略图宽度（默认：160）")
+    sprites_parser.add_argument("--columns", type=int, default=10, help="每张雪碧图的列数（默认：10）")
+    sprites_parser.add_argument("--rows", type=int, default=10, help="每张雪碧图的行数（默认：10）")
+    sprites_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    sprites_parser.add_argument("--quality", type=int, default=75, help="图片质量（默认：75）")
+    sprites_parser.add_argument("--base-url", default="", help="WebVTT中雪碧图地址的前缀（默认：相对文件名）")
+    sprites_parser.add_argument("--workers", type=int, default=None, help="并行编码线程数（默认：CPU核心数，最多4）")
+    sprites_parser.add_argument("--backend", default="auto", choices=["auto", "ffmpeg", "opencv"],
+                                help="采样帧读取方式（默认：找到ffmpeg时用ffmpeg抽帧缩小，否则用OpenCV）")
+    sprites_parser.add_argument("--exact-frames", action="store_true",
+                                help="ffmpeg完整解码每一帧，缩略图严格对应采样时间点（默认跳过不被参考的帧以加快解码）")
+    sprites_parser.set_defaults(func=cmd_sprites)
+    
+    # 导出帧数组存储
+    npy_parser = subparsers.add_parser("export-npy", help="提取关键帧并追加到内存映射的帧数组存储（.npy分块）")
+    npy_parser.add_argument("videos", nargs="+", help="视频文件路径")
+    npy_parser.add_argument("--store", required=True, help="存储目录（已存在时继续追加）")
+    npy_parser.add_argument("--frames", type=int, default=5, help="每个视频提取的帧数（默认：5）")
+    npy_parser.add_argument("--chunk-frames", type=int, default=256, help="每个块文件的帧数（默认：256）")
+    npy_parser.add_argument("--downscale-width", type=int, default=None, help="同时保存缩小副本的宽度")
+    npy_parser.add_argument("--small-only", action="store_true", help="只保存缩小副本")
+    npy_parser.set_defaults(func=cmd_export_npy)
+    
+    # 可断点续跑的批量处理
+    batch_parser = subparsers.add_parser("batch", help="批量提取关键帧并合成宫格图（中断后重新运行只重做未完成的阶段）")
+    batch_parser.add_argument("videos", nargs="+", help="视频文件路径")
+    batch_parser.add_argument("--output-dir", required=True, help="输出根目录")
+    batch_parser.add_argument("--manifest", default=None, help="清单数据库路径（默认：输出目录下的batch_manifest.sqlite）")
+    batch_parser.add_argument("--frames", type=int, default=5, help="每个视频提取的帧数（默认：5）")
+    batch_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    batch_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    batch_parser.add_argument("--timestamps", action="store_true", help="宫格图每格标注时间戳")
+    batch_parser.add_argument("--no-grid", action="store_true", help="不合成宫格图")
+    batch_parser.add_argument("--no-checksum", action="store_true", help="跳过阶段前只检查输出文件存在，不校验内容")
+    batch_parser.set_defaults(func=cmd_batch)
+    
+    # 共享目录任务队列
+    enqueue_parser = subparsers.add_parser("enqueue", help="向共享目录任务队列添加视频")
+    enqueue_parser.add_argument("videos", nargs="+", help="视频文件路径（各工作进程都需能以该路径访问）")
+    enqueue_parser.add_argument("--queue", required=True, help="队列目录（多台机器处理时放在共享存储上）")
+    enqueue_parser.add_argument("--output-dir", default=None, help="输出根目录（默认：视频所在目录）")
+    enqueue_parser.add_argument("--frames", type=int, default=5, help="每个视频提取的帧数（默认：5）")
+    enqueue_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    enqueue_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    enqueue_parser.add_argument("--timestamps", action="store_true", help="宫格图每格标注时间戳")
+    enqueue_parser.add_argument("--no-grid", action="store_true", help="不合成宫格图")
+    enqueue_parser.set_defaults(func=cmd_enqueue)
+    
+    worker_parser = subparsers.add_parser("worker", help="作为队列工作进程运行（可在多台机器上同时运行）")
+    worker_parser.add_argument("--queue", required=True, help="队列目录")
+    worker_parser.add_argument("--worker-id", default=None, help="工作进程标识（默认：主机名-进程号）")
+    worker_parser.add_argument("--lease-timeout", type=float, default=300.0,
+                               help="租约超时，单位秒，超时未心跳的任务重新排队（默认：300）")
+    worker_parser.add_argument("--max-attempts", type=int, default=3, help="每个任务最多执行次数（默认：3）")
+    worker_parser.add_argument("--poll-interval", type=float, default=2.0, help="队列为空时的等待间隔，单位秒（默认：2）")
+    worker_parser.add_argument("--max-jobs", type=int, default=None, help="处理多少个任务后退出（默认：不限）")
+    worker_parser.add_argument("--exit-when-empty", action="store_true", help="队列中没有待处理和处理中的任务时退出")
+    worker_parser.set_defaults(func=cmd_worker)
+    
+    # 监视文件夹
+    watch_parser = subparsers.add_parser("watch", help="监视文件夹，视频写入完成后自动提取关键帧并合成宫格图")
+    watch_parser.add_argument("folder", help="监视目录")
+    watch_parser.add_argument("--output-dir", required=True, help="输出根目录")
+    watch_parser.add_argument("--workers", type=int, default=None, help="同时处理的视频数（默认：CPU核心数）")
+    watch_parser.add_argument("--settle", type=float, default=5.0, help="文件多久无变化后视为写入完成，单位秒（默认：5）")
+    watch_parser.add_argument("--poll", type=float, default=1.0, help="扫描间隔，单位秒（默认：1）")
+    watch_parser.add_argument("--frames", type=int, default=5, help="每个视频提取的帧数（默认：5）")
+    watch_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    watch_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    watch_parser.add_argument("--timestamps", action="store_true", help="宫格图每格标注时间戳")
+    watch_parser.add_argument("--no-grid", action="store_true", help="不合成宫格图")
+    watch_parser.add_argument("--done-dir", default=None, help="处理成功后将视频移入的目录（默认：保留在原处）")
+    watch_parser.add_argument("--failed-dir", default=None, help="处理失败后将视频移入的目录（默认：保留在原处）")
+    watch_parser.add_argument("--stats-interval", type=float, default=30.0, help="输出统计的最短间隔，单位秒（默认：30，0为不输出）")
+    watch_parser.add_argument("--idle-exit", type=float, default=None, help="没有待处理文件多久后退出，单位秒（默认：一直运行）")
+    watch_parser.set_defaults(func=cmd_watch)
+    
+    # 逐帧分析
+    analyze_parser = subparsers.add_parser("analyze", help="单次解码运行多个逐帧分析器（亮度、直方图、主色、运动能量）")
+    analyze_parser.add_argument("video", help="视频文件路径")
+    analyze_parser.add_argument("--output", required=True, help="结果输出路径（.csv或.npz）")
+    analyze_parser.add_argument("--analyzers", default="brightness,histogram,dominant,motion",
+                                help="分析器，逗号分隔（默认：brightness,histogram,dominant,motion）")
+    analyze_parser.add_argument("--step", type=int, default=1, help="每隔多少帧分析一帧（默认：1）")
+    analyze_parser.add_argument("--sample-fps", type=float, default=None, help="每秒分析的帧数，指定时覆盖--step")
+    analyze_parser.set_defaults(func=cmd_analyze)
+    
+    # 音频驱动关键帧
+    audio_parser = subparsers.add_parser("audio-peaks", help="按音频峰值（掌声、讲话开始、巨响等）提取关键帧")
+    audio_parser.add_argument("video", help="视频文件路径")
+    audio_parser.add_argument("--output-dir", required=True, help="输出目录")
+    audio_parser.add_argument("--frames", type=int, default=5, help="提取的帧数（默认：5）")
+    audio_parser.add_argument("--mode", default="combined", choices=["rms", "onset", "combined"],
+                              help="选点依据：rms响度，onset起音强度，combined两者结合（默认：combined）")
+    audio_parser.add_argument("--min-gap", type=float, default=2.0, help="相邻关键帧的最小间隔，单位秒（默认：2）")
+    audio_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    audio_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    audio_parser.set_defaults(func=cmd_audio_peaks)
+    
+    # 打包保存
+    pack_parser = subparsers.add_parser("pack", help="提取关键帧并与宫格图一起直接写入zip/tar归档（不生成中间文件）")
+    pack_parser.add_argument("videos", nargs="+", help="视频文件路径")
+    pack_parser.add_argument("--output", required=True, help="归档路径（.zip、.tar、.tar.gz），“-”表示输出到标准输出")
+    pack_parser.add_argument("--archive-format", default=None, choices=["zip", "tar", "tar.gz"],
+                             help="归档格式（默认：按扩展名判断，标准输出为zip）")
+    pack_parser.add_argument("--frames", type=int, default=5, help="每个视频提取的帧数（默认：5）")
+    pack_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    pack_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    pack_parser.add_argument("--timestamps", action="store_true", help="宫格图每格标注时间戳")
+    pack_parser.add_argument("--no-grid", action="store_true", help="不合成宫格图")
+    pack_parser.add_argument("--pts-timing", action="store_true", help="按实际显示时间戳均匀采样（可变帧率视频）")
+    pack_parser.set_defaults(func=cmd_pack)
+    
+    # 显示时间戳计时
+    timing_parser = subparsers.add_parser("timing", help="按实际显示时间戳报告时长和帧率，可按时间均匀提取关键帧（可变帧率视频）")
+    timing_parser.add_argument("video", help="视频文件路径")
+    timing_parser.add_argument("--output-dir", default=None, help="输出目录，指定时按时间均匀提取关键帧")
+    timing_parser.add_argument("--frames", type=int, default=5, help="提取的帧数（默认：5）")
+    timing_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="图片格式（默认：jpg）")
+    timing_parser.add_argument("--quality", type=int, default=95, help="图片质量（默认：95）")
+    timing_parser.add_argument("--no-decode", action="store_true", help="ffprobe不可用时不退回逐帧解码")
+    timing_parser.set_defaults(func=cmd_timing)
+    
+    return parser
+
+
+def run_command(argv):
+    """
+    执行命令行子命令
+    """
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return 1
+    return args.func(args)
 
 
 def main():
     """
     主函数
     """
+    # 带参数时执行子命令，否则进入交互模式
+    if len(sys.argv) > 1:
+        return run_command(sys.argv[1:])
+    
     print_welcome()
     
     # 1. 获取视频路径
@@ -161,7 +802,7 @@ def main():
         return 1
     
     # 2. 获取提取参数
-    num_frames, img_format, quality, save_dir = get_extraction_params()
+    num_frames, img_format, quality, save_dir, dedup, sharpest = get_extraction_params()
     
     # 3. 初始化提取器
     print(f"\n🔍 正在加载视频...")
@@ -177,7 +818,12 @@ def main():
     
     # 4. 提取关键帧
     print(f"\n🎬 正在提取 {num_frames} 张关键帧...")
-    frames = extractor.extract_uniform_frames(num_frames=num_frames)
+    frames = extractor.extract_uniform_frames(
+        num_frames=num_frames,
+        dedup_threshold=5 if dedup else None,
+        backfill=dedup,
+        quality_window=5 if sharpest else 1
+    )
     if not frames:
         print(f"❌ 错误：提取关键帧失败")
         return 1
@@ -195,17 +841,38 @@ def main():
     for path in saved_paths:
         print(f"  - {os.path.basename(path)}")
     
-    # 6. 询问是否合成宫格图
+    # 6. 询问是否合成长图
+    make_strip = input(f"\n📜 是否要将这些关键帧拼接为长图？（y/n，默认n）：").strip().lower()
+    if make_strip in ["y", "yes", "是"]:
+        direction = input(f"拼接方向（默认：纵向，输入h为横向）：").strip().lower()
+        direction = "horizontal" if direction in ["h", "横向"] else "vertical"
+        
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        strip_output_path = os.path.join(save_dir, f"{video_name}_长图.{img_format}")
+        strip_paths = StripSynthesizer().synthesize_strip(
+            saved_paths,
+            strip_output_path,
+            direction=direction,
+            quality=quality
+        )
+        if strip_paths:
+            print(f"✅ 成功合成 {len(strip_paths)} 张长图")
+            for path in strip_paths:
+                print(f"  - {os.path.basename(path)}")
+        else:
+            print(f"❌ 错误：合成长图失败")
+    
+    # 7. 询问是否合成宫格图
     make_grid = input(f"\n🔗 是否要将这些关键帧合成为宫格图？（y/n）：").strip().lower()
     if make_grid not in ["y", "yes", "是", ""]:
         print(f"\n🎉 操作完成！")
         print(f"📁 关键帧已保存到：{save_dir}")
         return 0
     
-    # 7. 获取宫格参数
-    layout, spacing = get_grid_params()
+    # 8. 获取宫格参数
+    layout, spacing, title, show_timestamps = get_grid_params()
     
-    # 8. 合成宫格图
+    # 9. 合成宫格图
     print(f"\n🖼️  正在合成宫格图...")
     synthesizer = GridSynthesizer()
     
@@ -219,7 +886,9 @@ def main():
         layout=layout,
         spacing=spacing,
         border=1,
-        border_color=(200, 200, 200)
+        border_color=(200, 200, 200),
+        title=title,
+        captions=[format_timestamp(t) for t in extractor.frame_timestamps] if show_timestamps else None
     )
     
     if result_path:
@@ -229,7 +898,7 @@ def main():
         print(f"❌ 错误：合成宫格图失败")
         return 1
     
-    # 9. 完成提示
+    # 10. 完成提示
     print(f"\n🎉 所有操作完成！")
     print(f"📁 输出目录：{save_dir}")
     print(f"📖 你可以在该目录中查看提取的关键帧和合成的宫格图")
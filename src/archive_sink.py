@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+归档输出模块
+编码后的图片直接写入流式zip或tar包（文件或标准输出），不经过临时图片文件，
+已压缩的图片格式在zip中以存储模式写入，不再重复压缩
+"""
+
+import io
+import os
+import sys
+import time
+import tarfile
+import zipfile
+import threading
+import cv2
+from PIL import Image
+from src.atomic_file import partial_path
+from src.frame_extractor import FrameExtractor
+from src.grid_synthesizer import GridSynthesizer
+from src.image_encoder import get_encoder
+from src.video_processor import format_timestamp
+
+
+# 支持的归档格式及对应的扩展名
+ARCHIVE_FORMATS = {
+    'zip': ('.zip',),
+    'tar': ('.tar',),
+    'tar.gz': ('.tar.gz', '.tgz')
+}
+
+# 本身已压缩的格式，在zip中以存储模式写入
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.npz')
+
+
+def detect_archive_format(path):
+    """
+    根据扩展名判断归档格式
+
+    Args:
+        path (str): 归档路径
+
+    Returns:
+        str: 归档格式，无法判断返回None
+    """
+    lower = path.lower()
+    for archive_format, extensions in ARCHIVE_FORMATS.items():
+        if lower.endswith(extensions):
+            return archive_format
+    return None
+
+
+class ArchiveSink:
+    """归档输出类，可被多个线程同时写入"""
+
+    def __init__(self, target, archive_format=None):
+        """
+        初始化并开始写入归档
+
+        Args:
+            target (str|file): 归档路径，'-'表示标准输出，也可以是可写的二进制文件对象
+            archive_format (str): 'zip'、'tar'或'tar.gz'，None则按扩展名判断（标准输出默认zip）
+
+        Raises:
+            ValueError: 归档格式不支持
+        """
+        self.target = target
+        self.temp_path = None
+        self.own_file = False
+
+        if isinstance(target, str) and target != '-':
+            archive_format = archive_format or detect_archive_format(target)
+            output_dir = os.path.dirname(target)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            # 写入临时文件，完成后再替换，中断时不会留下损坏的归档
+            self.temp_path = partial_path(target)
+            self.fileobj = open(self.temp_path, 'wb')
+            self.own_file = True
+        elif target == '-':
+            self.fileobj = sys.stdout.buffer
+        else:
+            self.fileobj = target
+
+        self.archive_format = archive_format or 'zip'
+        if self.archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"不支持的归档格式：{self.archive_format}")
+
+        # 标准输出等不可定位的流也能写入：zip使用数据描述符，tar使用流模式
+        if self.archive_format == 'zip':
+            self.archive = zipfile.ZipFile(self.fileobj, 'w')
+        else:
+            mode = 'w|gz' if self.archive_format == 'tar.gz' else 'w|'
+            self.archive = tarfile.open(fileobj=self.fileobj, mode=mode)
+
+        self.lock = threading.Lock()
+        self.names = []
+        self.bytes_written = 0
+        self.closed = False
+
+    def write(self, name, data):
+        """
+        写入一个文件
+
+        Args:
+            name (str): 归档内的路径（使用“/”分隔）
+            data (bytes): 文件内容
+
+        Returns:
+            str: 归档内的路径
+        """
+        name = name.replace(os.sep, '/').lstrip('/')
+        with self.lock:
+            if self.archive_format == 'zip':
+                info = zipfile.ZipInfo(name, time.localtime()[:6])
+                info.external_attr = 0o644 << 16
+                if name.lower().endswith(STORED_EXTENSIONS):
+                    info.compress_type = zipfile.ZIP_STORED
+                else:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                self.archive.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = time.time()
+                info.mode = 0o644
+                self.archive.addfile(info, io.BytesIO(data))
+            self.names.append(name)
+            self.bytes_written += len(data)
+        return name
+
+    def close(self, abort=False):
+        """
+        结束归档
+
+        Args:
+            abort (bool): 出错中止时为True，写入文件时删除未完成的归档
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.archive.close()
+        finally:
+            if self.own_file:
+                self.fileobj.close()
+            else:
+                self.fileobj.flush()
+
+        if self.temp_path is not None:
+            if abort:
+                os.remove(self.temp_path)
+            else:
+                os.replace(self.temp_path, self.target)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(abort=exc_type is not None)
+        return False
+
+
+def pack_videos(video_paths, sink, num_frames=5, output_format='jpg', quality=95, make_grid=True,
+                show_timestamps=False, pts_timing=False, callback=None):
+    """
+    提取多个视频的关键帧并与宫格图一起写入归档，每个视频一个目录；
+    帧只编码一次写入归档，宫格图直接由内存中的帧合成，不落盘也不再解码
+
+    Args:
+        video_paths (list): 视频文件路径列表
+        sink (ArchiveSink): 归档输出
+        num_frames (int): 每个视频提取的帧数
+        output_format (str): 图片格式
+        quality (int): 图片质量，0-100
+        make_grid (bool): 是否合成宫格图
+        show_timestamps (bool): 宫格图是否标注时间戳
+        pts_timing (bool): 是否按实际显示时间戳均匀采样（可变帧率视频）
+        callback (callable): 每个视频结束后的回调函数，参数为(视频路径, 归档内路径列表或None)
+
+    Returns:
+        dict: 视频路径 -> 归档内路径列表，处理失败的视频为None
+    """
+    results = {}
+    for video_path in video_paths:
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        extractor = FrameExtractor(video_path)
+        names = None
+        try:
+            if extractor.initialize():
+                if pts_timing:
+                    extractor.enable_pts_timing()
+                size = (extractor.video_info.get('width', 0), extractor.video_info.get('height', 0))
+                encoder = get_encoder(None, output_format, quality, size)
+                frames = extractor.extract_uniform_frames(num_frames, color=encoder.native_color)
+                timestamps = list(extractor.frame_timestamps)
+                names = extractor.save_frames(frames, video_name, output_format, quality, encoder.native_color,
+                                              encoder, sink=sink)
+                if make_grid and frames:
+                    if encoder.native_color == 'bgr':
+                        images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in frames]
+                    else:
+                        images = [Image.fromarray(frame) for frame in frames]
+                    captions = [format_timestamp(t) for t in timestamps] if show_timestamps else None
+                    grid_name = f"{video_name}/{video_name}_宫格图.{output_format}"
+                    names.append(GridSynthesizer().synthesize_grid(images, grid_name, captions=captions,
+                                                                   quality=quality, sink=sink))
+        finally:
+            extractor.release()
+        results[video_path] = names
+        if callback:
+            callback(video_path, names)
+    return results
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步接口模块
+为视频信息解析、关键帧提取和宫格合成提供asyncio协程接口，
+ffprobe以异步子进程运行，解码和图像处理放到执行器中运行，不阻塞事件循环
+"""
+
+import os
+import json
+import asyncio
+from src.video_processor import VideoProcessor
+from src.frame_extractor import FrameExtractor
+from src.grid_synthesizer import GridSynthesizer
+from src.capture_pool import get_default_pool
+
+
+# 全局同时解码（含ffprobe子进程）的最大数量
+MAX_CONCURRENT_DECODERS = os.cpu_count() or 4
+
+# 全局解码信号量，按事件循环创建
+_decoder_semaphore = None
+_decoder_semaphore_loop = None
+
+
+def set_max_concurrent_decoders(max_decoders):
+    """
+    设置全局同时解码的最大数量（对之后创建的信号量生效）
+    
+    Args:
+        max_decoders (int): 最大数量，至少为1
+    """
+    global MAX_CONCURRENT_DECODERS, _decoder_semaphore
+    MAX_CONCURRENT_DECODERS = max(1, int(max_decoders))
+    _decoder_semaphore = None
+
+
+def _get_decoder_semaphore():
+    """
+    获取当前事件循环的全局解码信号量
+    
+    Returns:
+        asyncio.Semaphore: 解码信号量
+    """
+    global _decoder_semaphore, _decoder_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _decoder_semaphore is None or _decoder_semaphore_loop is not loop:
+        _decoder_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DECODERS)
+        _decoder_semaphore_loop = loop
+    return _decoder_semaphore
+
+
+async def probe_video(video_path, ffprobe_cmd='ffprobe'):
+    """
+    以异步子进程运行ffprobe获取视频元数据
+    
+    Args:
+        video_path (str): 视频文件路径
+        ffprobe_cmd (str): ffprobe命令
+        
+    Returns:
+        dict: ffprobe的JSON结果（与ffmpeg.probe一致）
+        
+    Raises:
+        RuntimeError: ffprobe运行失败
+    """
+    process = await asyncio.create_subprocess_exec(
+        ffprobe_cmd, '-v', 'error', '-show_format', '-show_streams', '-of', 'json', video_path,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffprobe运行失败：{stderr.decode('utf-8', 'replace').strip()}")
+    return json.loads(stdout.decode('utf-8'))
+
+
+def _extract_to_dir(video_path, output_dir, num_frames, output_format, quality, extract_options):
+    """
+    在执行器中运行的关键帧提取任务
+    
+    Returns:
+        dict: 提取结果，包含保存路径、帧序号、时间点和视频信息
+    """
+    extractor = FrameExtractor(video_path, capture_pool=get_default_pool())
+    try:
+        if not extractor.initialize():
+            raise ValueError(f"无法加载视频文件：{video_path}")
+        saved_paths = extractor.extract_to_dir(output_dir, num_frames=num_frames, output_format=output_format,
+                                               quality=quality, **extract_options)
+        return {
+            'paths': saved_paths,
+            'frame_indices': list(extractor.frame_indices),
+            'frame_timestamps': list(extractor.frame_timestamps),
+            'video_info': dict(extractor.video_info)
+        }
+    finally:
+        extractor.release()
+
+
+class AsyncVideoAPI:
+    """异步视频处理接口类"""
+    
+    def __init__(self, executor=None):
+        """
+        初始化
+        
+        Args:
+            executor (concurrent.futures.Executor): 运行解码和图像处理的执行器，
+                None则使用事件循环的默认线程池（OpenCV解码和PIL编码会释放GIL）
+        """
+        self.executor = executor
+    
+    async def _run(self, func, *args):
+        """在执行器中运行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def get_video_info(self, video_path):
+        """
+        获取视频信息
+        
+        Args:
+            video_path (str): 视频文件路径
+            
+        Returns:
+            dict: 视频信息字典，加载失败返回空字典
+        """
+        async with _get_decoder_semaphore():
+            processor = VideoProcessor(get_default_pool())
+            try:
+                # 打开视频与ffprobe子进程同时进行
+                load_task = asyncio.ensure_future(self._run(processor.load_video, video_path))
+                try:
+                    probe = await probe_video(video_path)
+                except (OSError, RuntimeError, ValueError):
+                    probe = None
+                
+                if not await load_task:
+                    return {}
+                
+                if probe is None:
+                    # ffprobe不可用时回退到同步解析（内部使用OpenCV信息兜底）
+                    return await self._run(processor.get_video_info)
+                return await self._run(processor.get_video_info, probe)
+            finally:
+                await self._run(processor.release)
+    
+    async def extract_frames(self, video_path, output_dir, num_frames=5, output_format='jpg', quality=95,
+                             **extract_options):
+        """
+        均匀间隔模式提取关键帧并保存
+        
+        Args:
+            video_path (str): 视频文件路径
+            output_dir (str): 输出目录
+            num_frames (int): 提取的帧数
+            output_format (str): 输出图片格式，jpg或png
+            quality (int): 图片质量，0-100，仅对jpg有效
+            **extract_options: 传给extract_uniform_frames的其他参数
+            
+        Returns:
+            dict: 提取结果，包含'paths'、'frame_indices'、'frame_timestamps'和'video_info'
+        """
+        async with _get_decoder_semaphore():
+            return await self._run(_extract_to_dir, video_path, output_dir, num_frames, output_format,
+                                   quality, extract_options)
+    
+    async def synthesize_grid(self, image_paths, output_path, **grid_options):
+        """
+        合成宫格图
+        
+        Args:
+            image_paths (list): 图片路径列表
+            output_path (str): 输出路径
+            **grid_options: 传给GridSynthesizer.synthesize_grid的其他参数
+            
+        Returns:
+            str: 合成的宫格图路径
+        """
+        synthesizer = GridSynthesizer()
+        return await self._run(lambda: synthesizer.synthesize_grid(image_paths, output_path, **grid_options))
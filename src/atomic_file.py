@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+原子写入模块
+输出文件先写入同目录下的临时文件，完成后再重命名为目标文件，
+中断时只会留下可识别的临时文件，不会留下写了一半的目标文件
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+
+# 临时文件名：“原文件名.part进程号-线程号.扩展名”，保留扩展名以便按扩展名判断格式的库正常写入
+_PARTIAL_PATTERN = re.compile(r'\.part\d+-\d+(\.[^.]*)?$')
+
+
+def partial_path(output_path):
+    """
+    获取输出文件对应的临时文件路径
+
+    Args:
+        output_path (str): 输出路径
+
+    Returns:
+        str: 临时文件路径
+    """
+    base, ext = os.path.splitext(output_path)
+    return f"{base}.part{os.getpid()}-{threading.get_ident()}{ext}"
+
+
+def is_partial_file(filename):
+    """
+    判断文件是否为未完成的临时文件
+
+    Args:
+        filename (str): 文件名或路径
+
+    Returns:
+        bool: 是否为临时文件
+    """
+    return bool(_PARTIAL_PATTERN.search(os.path.basename(filename)))
+
+
+@contextmanager
+def atomic_output(output_path):
+    """
+    原子写入上下文：在临时文件中写入，正常结束后替换目标文件，出错时删除临时文件
+
+    替换的是目录项，目标文件原来是硬链接（如帧图片缓存）时，被链接的内容不受影响。
+
+    Args:
+        output_path (str): 输出路径
+
+    Yields:
+        str: 实际写入的临时文件路径
+    """
+    temp_path = partial_path(output_path)
+    try:
+        yield temp_path
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def cleanup_partial_files(directory):
+    """
+    删除目录中上次中断时遗留的临时文件
+
+    Args:
+        directory (str): 目录路径
+
+    Returns:
+        list: 删除的文件路径列表
+    """
+    removed = []
+    if not os.path.isdir(directory):
+        return removed
+    for name in os.listdir(directory):
+        if is_partial_file(name):
+            path = os.path.join(directory, name)
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                pass
+    return removed
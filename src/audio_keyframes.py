@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+音频驱动关键帧模块
+通过ffmpeg管道以低采样率单声道PCM流式读取音轨，分块计算响度（RMS）和起音强度包络，
+按峰值（掌声、讲话开始、巨响等）选取时间点，只在这些时间点解码视频帧
+"""
+
+import tempfile
+import subprocess
+import numpy as np
+from src.frame_extractor import FrameExtractor
+
+
+# 选点依据：响度、起音强度或两者（各自标准化后相加）
+AUDIO_MODES = ('rms', 'onset', 'combined')
+
+
+def build_audio_command(video_path, sample_rate=8000, ffmpeg_cmd='ffmpeg'):
+    """
+    构建将音轨输出为单声道16位PCM的ffmpeg命令
+
+    Args:
+        video_path (str): 视频文件路径
+        sample_rate (int): 输出采样率（Hz），响度包络不需要高采样率
+        ffmpeg_cmd (str): ffmpeg命令
+
+    Returns:
+        list: 命令参数列表
+    """
+    return [
+        ffmpeg_cmd, '-hide_banner', '-nostats', '-loglevel', 'error',
+        '-vn', '-sn', '-dn', '-i', video_path,
+        '-ac', '1', '-ar', str(sample_rate),
+        '-f', 's16le', '-acodec', 'pcm_s16le', '-'
+    ]
+
+
+def compute_envelope(stream, sample_rate=8000, hop_seconds=0.05, chunk_seconds=30.0):
+    """
+    分块读取PCM流并计算RMS包络，内存占用与音频时长无关（只保留每个窗口一个数值）
+
+    Args:
+        stream (file): 二进制流，内容为单声道16位小端PCM
+        sample_rate (int): 采样率（Hz）
+        hop_seconds (float): 包络窗口长度（秒）
+        chunk_seconds (float): 每次读取的音频长度（秒）
+
+    Returns:
+        tuple: (窗口中心时间数组（秒，float64）, RMS数组（0-1，float32）)
+    """
+    hop = max(1, int(round(sample_rate * hop_seconds)))
+    # 每次读取整数个窗口，剩余不足一个窗口的样本留到下一块
+    chunk_bytes = max(1, int(chunk_seconds * sample_rate) // hop) * hop * 2
+    remainder = b''
+    values = []
+
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            break
+        data = remainder + data
+        usable = len(data) // (hop * 2) * hop * 2
+        remainder = data[usable:]
+        if not usable:
+            continue
+        samples = np.frombuffer(data[:usable], dtype='<i2').astype(np.float32).reshape(-1, hop)
+        samples *= 1.0 / 32768.0
+        values.append(np.sqrt(np.einsum('ij,ij->i', samples, samples) / hop))
+
+    if len(remainder) >= 2:
+        # 结尾不足一个窗口的样本单独计算
+        tail = np.frombuffer(remainder[:len(remainder) // 2 * 2], dtype='<i2').astype(np.float32) / 32768.0
+        values.append(np.array([np.sqrt(np.mean(tail * tail))], dtype=np.float32))
+
+    rms = np.concatenate(values).astype(np.float32) if values else np.zeros(0, dtype=np.float32)
+    times = (np.arange(len(rms), dtype=np.float64) + 0.5) * hop / sample_rate
+    return times, rms
+
+
+def onset_strength(rms, floor_db=-60.0):
+    """
+    由RMS包络计算起音强度：相邻窗口响度（dB）的增量，只保留上升部分
+
+    Args:
+        rms (numpy.ndarray): RMS包络
+        floor_db (float): 响度下限（dB），低于该值视为静音，避免静音段的噪声起伏
+
+    Returns:
+        numpy.ndarray: 起音强度数组（dB，float32），与rms等长
+    """
+    if len(rms) == 0:
+        return np.zeros(0, dtype=np.float32)
+    loudness = 20.0 * np.log10(np.maximum(rms, 1e-10))
+    np.maximum(loudness, floor_db, out=loudness)
+    onset = np.empty_like(loudness)
+    onset[0] = 0.0
+    np.subtract(loudness[1:], loudness[:-1], out=onset[1:])
+    np.maximum(onset, 0.0, out=onset)
+    return onset.astype(np.float32)
+
+
+def score_audio(video_path, sample_rate=8000, hop_seconds=0.05, ffmpeg_cmd='ffmpeg'):
+    """
+    由ffmpeg流式解码音轨并计算响度和起音强度包络
+
+    Args:
+        video_path (str): 视频文件路径
+        sample_rate (int): 解码采样率（Hz）
+        hop_seconds (float): 包络窗口长度（秒）
+        ffmpeg_cmd (str): ffmpeg命令
+
+    Returns:
+        tuple: (时间点数组（秒）, RMS数组, 起音强度数组)
+
+    Raises:
+        RuntimeError: ffmpeg不存在、运行失败或视频没有音轨
+    """
+    command = build_audio_command(video_path, sample_rate, ffmpeg_cmd)
+    # 错误输出写入临时文件，避免管道写满后ffmpeg阻塞（读取stdout的一方也随之卡住）
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+        except OSError as e:
+            raise RuntimeError(f"无法运行ffmpeg：{e}")
+        try:
+            times, rms = compute_envelope(process.stdout, sample_rate, hop_seconds)
+            process.wait()
+        finally:
+            # 计算包络出错或被中断时结束ffmpeg，不留下僵尸进程
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode('utf-8', errors='replace')
+            raise RuntimeError(f"ffmpeg运行失败：{stderr.strip()}")
+    if len(rms) == 0:
+        raise RuntimeError("视频没有可用的音轨")
+    return times, rms, onset_strength(rms)
+
+
+def combine_envelopes(rms, onset, mode='combined'):
+    """
+    按选点依据得到用于选峰的分数曲线
+
+    Args:
+        rms (numpy.ndarray): RMS包络
+        onset (numpy.ndarray): 起音强度
+        mode (str): 'rms'、'onset'或'combined'
+
+    Returns:
+        numpy.ndarray: 分数曲线
+
+    Raises:
+        ValueError: 选点依据不支持
+    """
+    if mode not in AUDIO_MODES:
+        raise ValueError(f"不支持的选点依据：{mode}")
+    if mode == 'rms':
+        return rms.astype(np.float32)
+    if mode == 'onset':
+        return onset.astype(np.float32)
+
+    def standardize(values):
+        std = values.std()
+        return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+    return (standardize(rms.astype(np.float32)) + standardize(onset.astype(np.float32))).astype(np.float32)
+
+
+def pick_peaks(times, scores, num_peaks=5, min_gap=2.0, smooth_seconds=0.25):
+    """
+    选取分数曲线上最高的若干个峰，相邻峰至少间隔min_gap秒
+
+    Args:
+        times (numpy.ndarray): 时间点数组（秒）
+        scores (numpy.ndarray): 分数曲线
+        num_peaks (int): 峰的数量
+        min_gap (float): 相邻峰的最小间隔（秒）
+        smooth_seconds (float): 选峰前的滑动平均窗口（秒），减少单个窗口的噪声尖峰
+
+    Returns:
+        numpy.ndarray: 峰的时间点数组（秒，按时间排序）
+    """
+    if len(scores) == 0 or num_peaks <= 0:
+        return np.zeros(0, dtype=np.float64)
+
+    hop = times[1] - times[0] if len(times) > 1 else 1.0
+    window = max(1, int(round(smooth_seconds / hop)))
+    if window > 1:
+        scores = np.convolve(scores, np.ones(window, dtype=np.float32) / window, mode='same')
+
+    # 局部极大值（平台取第一个点）
+    padded = np.concatenate(([-np.inf], scores, [-np.inf]))
+    candidates = np.flatnonzero((padded[1:-1] > padded[:-2]) & (padded[1:-1] >= padded[2:]))
+    if len(candidates) == 0:
+        candidates = np.array([int(np.argmax(scores))])
+
+    # 从高到低依次选取，与已选峰过近的跳过
+    chosen = []
+    for index in candidates[np.argsort(scores[candidates], kind='stable')[::-1]]:
+        if all(abs(times[index] - times[c]) >= min_gap for c in chosen):
+            chosen.append(index)
+            if len(chosen) >= num_peaks:
+                break
+    return np.sort(times[np.asarray(chosen, dtype=np.int64)])
+
+
+def extract_audio_keyframes(video_path, output_dir, num_frames=5, mode='combined', min_gap=2.0, output_format='jpg',
+                            quality=95, encoder=None, sample_rate=8000, hop_seconds=0.05, ffmpeg_cmd='ffmpeg'):
+    """
+    按音频峰值选取时间点并保存对应的视频帧
+
+    Args:
+        video_path (str): 视频文件路径
+        output_dir (str): 输出目录
+        num_frames (int): 提取的帧数
+        mode (str): 选点依据，'rms'、'onset'或'combined'
+        min_gap (float): 相邻关键帧的最小间隔（秒）
+        output_format (str): 图片格式
+        quality (int): 图片质量，0-100
+        encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端
+        sample_rate (int): 音频解码采样率（Hz）
+        hop_seconds (float): 包络窗口长度（秒）
+        ffmpeg_cmd (str): ffmpeg命令
+
+    Returns:
+        dict: paths（图片路径）、frame_indices、frame_timestamps和peak_times（音频峰值时间）
+
+    Raises:
+        ValueError: 视频无法加载
+        RuntimeError: 音轨分析失败
+    """
+    extractor = FrameExtractor(video_path)
+    try:
+        if not extractor.initialize():
+            raise ValueError(f"无法加载视频文件：{video_path}")
+        fps = extractor.video_info.get('fps', 0)
+        total_frames = extractor.video_info.get('total_frames', 0)
+        if fps <= 0 or total_frames <= 0:
+            raise ValueError(f"无法获取视频帧率：{video_path}")
+
+        times, rms, onset = score_audio(video_path, sample_rate, hop_seconds, ffmpeg_cmd)
+        # 音轨可能比画面长，只在有画面的范围内选峰
+        in_range = times < total_frames / fps
+        peak_times = pick_peaks(times[in_range], combine_envelopes(rms[in_range], onset[in_range], mode),
+                                num_frames, min_gap)
+        positions = [min(total_frames - 1, int(t * fps)) for t in peak_times]
+        paths = extractor.extract_positions_to_dir(output_dir, positions, output_format, quality, encoder=encoder)
+        return {
+            'paths': paths,
+            'frame_indices': list(extractor.frame_indices),
+            'frame_timestamps': list(extractor.frame_timestamps),
+            'peak_times': peak_times.tolist()
+        }
+    finally:
+        extractor.release()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量处理模块
+用SQLite清单记录每个视频各阶段（解析、规划、保存、合成）的完成情况、运行参数和输出文件校验值，
+中断后重新运行时跳过已完成的阶段，只重做未完成、参数已变化或输出已损坏的阶段
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from src.frame_extractor import FrameExtractor
+from src.grid_synthesizer import GridSynthesizer
+from src.video_processor import video_fingerprint, format_timestamp
+from src.atomic_file import cleanup_partial_files
+
+
+# 处理阶段，按执行顺序排列；某一阶段重做时其后的阶段也全部重做
+STAGES = ('probe', 'extract', 'save', 'grid')
+
+
+def file_checksum(file_path, block_size=1 << 20):
+    """
+    计算文件的SHA-1校验值
+
+    Args:
+        file_path (str): 文件路径
+        block_size (int): 每次读取的字节数
+
+    Returns:
+        str: 校验值（十六进制）
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_hash(params):
+    """
+    计算阶段运行参数的校验值
+
+    Args:
+        params (dict): 运行参数（可JSON序列化）
+
+    Returns:
+        str: 校验值（十六进制）
+    """
+    data = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class BatchManifest:
+    """批量处理清单类"""
+
+    def __init__(self, db_path):
+        """
+        初始化并打开清单数据库（不存在则创建）
+
+        Args:
+            db_path (str): 数据库文件路径
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS stages ('
+            'video_path TEXT NOT NULL, stage TEXT NOT NULL, fingerprint TEXT, status TEXT NOT NULL, '
+            'outputs TEXT, data TEXT, error TEXT, updated REAL, params TEXT, PRIMARY KEY (video_path, stage))'
+        )
+        # 旧版清单没有运行参数列，补上后旧记录的参数为空，视为未完成
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(stages)')]
+        if 'params' not in columns:
+            self.conn.execute('ALTER TABLE stages ADD COLUMN params TEXT')
+        self.conn.commit()
+
+    def get_stage(self, video_path, stage):
+        """
+        获取阶段记录
+
+        Args:
+            video_path (str): 视频文件路径
+            stage (str): 阶段名称
+
+        Returns:
+            dict: 记录（status、fingerprint、params、outputs、data、error），不存在返回None
+        """
+        row = self.conn.execute(
+            'SELECT status, fingerprint, outputs, data, error, params FROM stages WHERE video_path = ? AND stage = ?',
+            (os.path.realpath(video_path), stage)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'status': row[0],
+            'fingerprint': row[1],
+            'outputs': json.loads(row[2] or '[]'),
+            'data': json.loads(row[3] or 'null'),
+            'error': row[4],
+            'params': row[5]
+        }
+
+    def is_done(self, video_path, stage, fingerprint, params=None, verify='checksum'):
+        """
+        判断阶段是否已完成且输出完好
+
+        Args:
+            video_path (str): 视频文件路径
+            stage (str): 阶段名称
+            fingerprint (str): 视频当前指纹，与记录不一致说明视频已变化
+            params (str): 本次运行参数的校验值（params_hash），与记录不一致说明参数已变化
+            verify (str): 输出检查方式，'checksum'校验内容，'exists'只检查文件存在
+
+        Returns:
+            bool: 是否可以跳过该阶段
+        """
+        record = self.get_stage(video_path, stage)
+        if record is None or record['status'] != 'done' or record['fingerprint'] != fingerprint:
+            return False
+        if record['params'] != params:
+            return False
+
+        for path, checksum in record['outputs']:
+            if not os.path.isfile(path):
+                return False
+            if verify == 'checksum' and file_checksum(path) != checksum:
+                return False
+        return True
+
+    def mark_done(self, video_path, stage, fingerprint, outputs=(), data=None, params=None):
+        """
+        记录阶段完成
+
+        Args:
+            video_path (str): 视频文件路径
+            stage (str): 阶段名称
+            fingerprint (str): 视频指纹
+            outputs (list): 输出文件路径列表，记录时计算校验值
+            data (object): 阶段结果（可JSON序列化），供后续阶段使用
+            params (str): 运行参数的校验值（params_hash）
+        """
+        checksums = [(path, file_checksum(path)) for path in outputs]
+        self._write(video_path, stage, fingerprint, 'done', checksums, data, None, params)
+
+    def mark_failed(self, video_path, stage, fingerprint, error, params=None):
+        """
+        记录阶段失败
+
+        Args:
+            video_path (str): 视频文件路径
+            stage (str): 阶段名称
+            fingerprint (str): 视频指纹
+            error (str): 错误信息
+            params (str): 运行参数的校验值（params_hash）
+        """
+        self._write(video_path, stage, fingerprint, 'failed', [], None, error, params)
+
+    def _write(self, video_path, stage, fingerprint, status, outputs, data, error, params):
+        """写入阶段记录（每次写入立即提交，进程中断不丢失已完成的阶段）"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO stages '
+            '(video_path, stage, fingerprint, status, outputs, data, error, updated, params) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (os.path.realpath(video_path), stage, fingerprint, status, json.dumps(outputs, ensure_ascii=False),
+             json.dumps(data, ensure_ascii=False), error, time.time(), params)
+        )
+        self.conn.commit()
+
+    def summary(self):
+        """
+        统计各阶段的完成情况
+
+        Returns:
+            dict: 阶段 -> {状态: 数量}
+        """
+        result = {stage: {} for stage in STAGES}
+        for stage, status, count in self.conn.execute(
+                'SELECT stage, status, COUNT(*) FROM stages GROUP BY stage, status'):
+            result.setdefault(stage, {})[status] = count
+        return result
+
+    def close(self):
+        """关闭数据库"""
+        self.conn.close()
+
+
+class BatchRunner:
+    """可断点续跑的批量处理类"""
+
+    def __init__(self, manifest, output_dir, num_frames=5, output_format='jpg', quality=95, make_grid=True,
+                 show_timestamps=False, grid_options=None, verify='checksum'):
+        """
+        初始化
+
+        Args:
+            manifest (BatchManifest): 批量处理清单
+            output_dir (str): 输出根目录，每个视频保存在以"文件名_路径校验值"命名的子目录中
+            num_frames (int): 每个视频提取的帧数
+            output_format (str): 图片格式
+            quality (int): 图片质量，0-100
+            make_grid (bool): 是否合成宫格图
+            show_timestamps (bool): 宫格图是否标注时间戳
+            grid_options (dict): 传给synthesize_grid的其他参数
+            verify (str): 跳过阶段前的输出检查方式，'checksum'或'exists'
+        """
+        self.manifest = manifest
+        self.output_dir = output_dir
+        self.num_frames = num_frames
+        self.output_format = output_format
+        self.quality = quality
+        self.make_grid = make_grid
+        self.show_timestamps = show_timestamps
+        self.grid_options = grid_options or {}
+        self.verify = verify
+
+    def stage_params(self, stage):
+        """
+        获取影响阶段输出的运行参数，记录在清单中，参数变化后该阶段及其后的阶段重做
+
+        Args:
+            stage (str): 阶段名称
+
+        Returns:
+            str: 参数校验值
+        """
+        params = {}
+        if stage in ('extract', 'save'):
+            params['num_frames'] = self.num_frames
+        if stage in ('save', 'grid'):
+            params.update(output_format=self.output_format, quality=self.quality)
+        if stage == 'grid':
+            params.update(show_timestamps=self.show_timestamps, grid_options=self.grid_options)
+        return params_hash(params)
+
+    def run(self, video_paths, callback=None):
+        """
+        批量处理视频；单个视频失败时记录到清单并继续处理下一个
+
+        Args:
+            video_paths (list): 视频文件路径列表
+            callback (callable): 每个阶段结束后的回调函数，参数为(视频路径, 阶段, 结果)，
+                结果为'skipped'、'done'或'failed'
+
+        Returns:
+            dict: 统计，包括done/failed（视频路径列表）和各结果的阶段数
+        """
+        result = {'done': [], 'failed': [], 'skipped': 0, 'ran': 0}
+        for video_path in video_paths:
+            outcomes = self.process(video_path, callback)
+            result['skipped'] += sum(1 for _, outcome in outcomes if outcome == 'skipped')
+            result['ran'] += sum(1 for _, outcome in outcomes if outcome == 'done')
+            if outcomes and outcomes[-1][1] == 'failed':
+                result['failed'].append(video_path)
+            else:
+                result['done'].append(video_path)
+        return result
+
+    def process(self, video_path, callback=None):
+        """
+        处理单个视频的全部阶段
+
+        Args:
+            video_path (str): 视频文件路径
+            callback (callable): 阶段回调函数
+
+        Returns:
+            list: [(阶段, 结果), ...]
+        """
+        try:
+            fingerprint = video_fingerprint(video_path)
+        except OSError as e:
+            self.manifest.mark_failed(video_path, STAGES[0], None, str(e))
+            if callback:
+                callback(video_path, STAGES[0], 'failed')
+            return [(STAGES[0], 'failed')]
+
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        # 目录名带上实际路径的短校验值，不同目录下的同名视频互不覆盖
+        path_tag = hashlib.sha1(os.path.realpath(video_path).encode('utf-8')).hexdigest()[:8]
+        frames_dir = os.path.join(self.output_dir, f"{video_name}_{path_tag}")
+        context = {
+            'video_path': video_path,
+            'frames_dir': frames_dir,
+            'grid_path': os.path.join(frames_dir, f"{video_name}_宫格图.{self.output_format}")
+        }
+        stages = STAGES if self.make_grid else STAGES[:-1]
+        # 清理上次中断时遗留的临时文件（目标文件只在写完后才会被替换，不受影响）
+        cleanup_partial_files(context['frames_dir'])
+
+        outcomes = []
+        rerun = False
+        for stage in stages:
+            params = self.stage_params(stage)
+            # 前一阶段重做后，之后的阶段结果不再可信
+            if not rerun and self.manifest.is_done(video_path, stage, fingerprint, params, self.verify):
+                context[stage] = self.manifest.get_stage(video_path, stage)['data']
+                outcomes.append((stage, 'skipped'))
+                if callback:
+                    callback(video_path, stage, 'skipped')
+                continue
+
+            rerun = True
+            previous = self.manifest.get_stage(video_path, stage)
+            try:
+                outputs, data = getattr(self, f"_stage_{stage}")(context)
+            except Exception as e:
+                self.manifest.mark_failed(video_path, stage, fingerprint, str(e), params)
+                outcomes.append((stage, 'failed'))
+                if callback:
+                    callback(video_path, stage, 'failed')
+                break
+
+            self.manifest.mark_done(video_path, stage, fingerprint, outputs, data, params)
+            # 参数变化后（如帧数减少、格式改变）上次的输出不再属于本次结果，删除以免与新输出混在一起
+            if previous is not None:
+                for path, _ in previous['outputs']:
+                    if path not in outputs and os.path.isfile(path):
+                        os.remove(path)
+            context[stage] = data
+            outcomes.append((stage, 'done'))
+            if callback:
+                callback(video_path, stage, 'done')
+        return outcomes
+
+    def _stage_probe(self, context):
+        """解析阶段：获取视频信息"""
+        extractor = FrameExtractor(context['video_path'])
+        try:
+            if not extractor.initialize():
+                raise ValueError(f"无法加载视频文件：{context['video_path']}")
+            return [], dict(extractor.video_info)
+        finally:
+            extractor.release()
+
+    def _stage_extract(self, context):
+        """规划阶段：根据视频信息计算采样帧位置"""
+        extractor = FrameExtractor(context['video_path'])
+        extractor.video_info = context['probe']
+        return [], {'positions': extractor.compute_uniform_positions(self.num_frames)}
+
+    def _stage_save(self, context):
+        """保存阶段：解码并保存规划的帧"""
+        frames_dir = context['frames_dir']
+        extractor = FrameExtractor(context['video_path'])
+        try:
+            if not extractor.initialize():
+                raise ValueError(f"无法加载视频文件：{context['video_path']}")
+            paths = extractor.extract_positions_to_dir(frames_dir, context['extract']['positions'],
+                                                       self.output_format, self.quality)
+            if not paths:
+                raise RuntimeError("没有成功保存任何关键帧")
+            data = {
+                'paths': paths,
+                'frame_indices': list(extractor.frame_indices),
+                'frame_timestamps': list(extractor.frame_timestamps)
+            }
+            return paths, data
+        finally:
+            extractor.release()
+
+    def _stage_grid(self, context):
+        """合成阶段：将保存的帧合成为宫格图"""
+        saved = context['save']
+        captions = None
+        if self.show_timestamps:
+            captions = [format_timestamp(t) for t in saved['frame_timestamps']]
+        grid_path = GridSynthesizer().synthesize_grid(saved['paths'], context['grid_path'], captions=captions,
+                                                      quality=self.quality, **self.grid_options)
+        if not grid_path:
+            raise RuntimeError("宫格图合成失败")
+        return [grid_path], {'path': grid_path}
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频解码句柄池模块
+负责在进程内复用已打开的cv2.VideoCapture，避免反复打开同一视频文件
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+import cv2
+
+
+class CaptureLease:
+    """解码句柄租约类，持有期间独占使用该句柄"""
+
+    def __init__(self, pool, entry):
+        """
+        初始化
+
+        Args:
+            pool (CapturePool): 所属句柄池
+            entry (dict): 句柄池条目
+        """
+        self.pool = pool
+        self.entry = entry
+        self.cap = entry['cap']
+        self.video_path = entry['path']
+
+    @property
+    def video_info(self):
+        """该文件缓存的视频信息，未缓存返回None"""
+        return self.pool.get_info(self.entry)
+
+    @video_info.setter
+    def video_info(self, info):
+        self.pool.set_info(self.entry, info)
+
+    def release(self):
+        """归还句柄（可重复调用）"""
+        if self.cap is not None:
+            self.cap = None
+            self.pool.release(self.entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class CapturePool:
+    """解码句柄池类（线程安全）"""
+
+    def __init__(self, max_handles=8):
+        """
+        初始化
+
+        Args:
+            max_handles (int): 最多同时打开的句柄数，超出时按最近最少使用淘汰空闲句柄
+        """
+        self.max_handles = max(1, max_handles)
+        self.condition = threading.Condition()
+        # 空闲句柄，按最近使用顺序排列（最久未用的在前）
+        self.idle = OrderedDict()
+        # 在用句柄
+        self.leased = {}
+        # 已打开（含正在打开）的句柄总数
+        self.open_count = 0
+        # 每个文件的视频信息缓存：路径 -> (文件标识, 信息)
+        self.info_cache = {}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _identity(video_path):
+        """文件标识：修改时间和大小，文件变化后句柄失效"""
+        stat = os.stat(video_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def acquire(self, video_path, timeout=None):
+        """
+        租用视频文件的解码句柄
+
+        Args:
+            video_path (str): 视频文件路径
+            timeout (float): 句柄数已满且全部在用时的最长等待时间（秒），None则一直等待
+
+        Returns:
+            CaptureLease: 句柄租约，打开失败或等待超时返回None
+        """
+        path = os.path.realpath(video_path)
+        try:
+            identity = self._identity(path)
+        except OSError:
+            return None
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self._invalidate_changed(path, identity)
+
+            while True:
+                # 优先复用同一文件的空闲句柄
+                for key, entry in self.idle.items():
+                    if entry['path'] == path:
+                        del self.idle[key]
+                        self.leased[key] = entry
+                        self.stats['hits'] += 1
+                        return CaptureLease(self, entry)
+
+                if self.open_count < self.max_handles:
+                    break
+
+                # 句柄已满时淘汰最久未用的空闲句柄
+                if self.idle:
+                    _, entry = self.idle.popitem(last=False)
+                    self._close(entry)
+                    self.stats['evictions'] += 1
+                    continue
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+            # 先占用名额，在锁外打开文件
+            self.open_count += 1
+            self.stats['misses'] += 1
+
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            cap.release()
+            with self.condition:
+                self.open_count -= 1
+                self.condition.notify()
+            return None
+
+        entry = {'path': path, 'identity': identity, 'cap': cap, 'stale': False}
+        with self.condition:
+            self.leased[id(entry)] = entry
+        return CaptureLease(self, entry)
+
+    def release(self, entry):
+        """
+        归还句柄（由CaptureLease调用）
+
+        Args:
+            entry (dict): 句柄池条目
+        """
+        with self.condition:
+            self.leased.pop(id(entry), None)
+            if entry['stale']:
+                self._close(entry)
+            else:
+                self.idle[id(entry)] = entry
+            self.condition.notify()
+
+    def get_info(self, entry):
+        """
+        获取条目对应文件缓存的视频信息
+
+        Args:
+            entry (dict): 句柄池条目
+
+        Returns:
+            dict: 视频信息，未缓存或文件已变化返回None
+        """
+        with self.condition:
+            cached = self.info_cache.get(entry['path'])
+            if cached and cached[0] == entry['identity']:
+                return dict(cached[1])
+        return None
+
+    def set_info(self, entry, info):
+        """
+        缓存条目对应文件的视频信息
+
+        Args:
+            entry (dict): 句柄池条目
+            info (dict): 视频信息
+        """
+        if info:
+            with self.condition:
+                self.info_cache[entry['path']] = (entry['identity'], dict(info))
+
+    def invalidate(self, video_path=None):
+        """
+        使句柄失效（空闲句柄立即关闭，在用句柄归还时关闭）
+
+        Args:
+            video_path (str): 视频文件路径，None则使全部句柄失效
+        """
+        path = os.path.realpath(video_path) if video_path else None
+        with self.condition:
+            self._invalidate_changed(path, None)
+
+    def _invalidate_changed(self, path, identity):
+        """
+        关闭与当前文件标识不一致的空闲句柄，在用句柄标记为失效（需持有锁）
+
+        Args:
+            path (str): 文件路径，None表示全部文件
+            identity (tuple): 当前文件标识，None表示无条件失效
+        """
+        for key, entry in list(self.idle.items()):
+            if (path is None or entry['path'] == path) and entry['identity'] != identity:
+                del self.idle[key]
+                self._close(entry)
+                self.stats['invalidations'] += 1
+        for cached_path, (cached_identity, _) in list(self.info_cache.items()):
+            if (path is None or cached_path == path) and cached_identity != identity:
+                del self.info_cache[cached_path]
+        # 在用句柄无法立即关闭，标记后在归还时关闭
+        for entry in self.leased.values():
+            if (path is None or entry['path'] == path) and entry['identity'] != identity:
+                entry['stale'] = True
+
+    def _close(self, entry):
+        """关闭句柄（需持有锁）"""
+        entry['cap'].release()
+        self.open_count -= 1
+
+    def close(self):
+        """关闭全部空闲句柄，在用句柄归还时关闭"""
+        self.invalidate()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """
+    获取进程内共享的默认句柄池
+
+    Returns:
+        CapturePool: 默认句柄池
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = CapturePool()
+        return _default_pool
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+配置管理模块
+负责用户目录下的程序数据目录、缓存目录和配置文件
+"""
+
+import os
+import json
+
+
+# 程序数据目录名，位于用户目录下
+APP_DIR_NAME = '.video_keyframe_tool'
+
+
+def get_app_dir():
+    """
+    获取程序数据目录（不存在则创建）
+    
+    可通过环境变量 VIDEO_KEYFRAME_TOOL_HOME 指定其他位置。
+    
+    Returns:
+        str: 程序数据目录路径
+    """
+    app_dir = os.environ.get('VIDEO_KEYFRAME_TOOL_HOME') or os.path.join(os.path.expanduser("~"), APP_DIR_NAME)
+    os.makedirs(app_dir, exist_ok=True)
+    return app_dir
+
+
+def get_cache_dir(name):
+    """
+    获取指定用途的缓存目录（不存在则创建）
+    
+    Args:
+        name (str): 缓存用途名称，如'frame_hashes'
+        
+    Returns:
+        str: 缓存目录路径
+    """
+    cache_dir = os.path.join(get_app_dir(), 'cache', name)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_config_path():
+    """
+    获取配置文件路径
+    
+    Returns:
+        str: 配置文件路径
+    """
+    return os.path.join(get_app_dir(), 'config.json')
+
+
+def load_config():
+    """
+    加载配置
+    
+    Returns:
+        dict: 配置字典，文件不存在或损坏时返回空字典
+    """
+    try:
+        with open(get_config_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_config(config):
+    """
+    保存配置
+    
+    Args:
+        config (dict): 配置字典
+    """
+    config_path = get_config_path()
+    temp_path = config_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, config_path)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ffmpeg场景检测模块
+由ffmpeg的select(scene)或scdet滤镜在低分辨率下计算每帧的画面变化分数，
+Python只解析滤镜输出的元数据，不参与逐帧解码和计算
+"""
+
+import tempfile
+import subprocess
+import numpy as np
+
+
+# 后端与对应的元数据键、分数换算比例（scdet的分数为百分比）
+SCENE_BACKENDS = {
+    'select': ('lavfi.scene_score', 1.0),
+    'scdet': ('lavfi.scd.score', 0.01)
+}
+
+# 各后端默认的切换点阈值（换算到0-1后）：两种分数的分布不同，scdet对同一切换的分数明显更低，
+# 取其滤镜默认阈值10（百分比）
+DEFAULT_THRESHOLDS = {
+    'select': 0.3,
+    'scdet': 0.1
+}
+
+
+def build_scene_command(video_path, backend='select', scale_width=160, ffmpeg_cmd='ffmpeg'):
+    """
+    构建计算画面变化分数的ffmpeg命令
+
+    Args:
+        video_path (str): 视频文件路径
+        backend (str): 'select'（select滤镜的scene变量）或'scdet'
+        scale_width (int): 计算分数前缩小到的宽度，None则使用原始分辨率
+        ffmpeg_cmd (str): ffmpeg命令
+
+    Returns:
+        list: 命令参数列表
+
+    Raises:
+        ValueError: 后端不支持
+    """
+    if backend not in SCENE_BACKENDS:
+        raise ValueError(f"不支持的场景检测后端：{backend}")
+
+    filters = []
+    if scale_width:
+        # 缩小后再计算分数，高度按比例取偶数
+        filters.append(f"scale={scale_width}:-2:flags=fast_bilinear")
+    if backend == 'select':
+        # gte(scene,0)选中全部帧，只为计算并输出每帧的scene分数
+        filters.append("select='gte(scene,0)'")
+    else:
+        filters.append("scdet=threshold=100")
+    filters.append("metadata=mode=print:file=-")
+
+    return [
+        ffmpeg_cmd, '-hide_banner', '-nostats', '-loglevel', 'error',
+        '-an', '-sn', '-dn', '-i', video_path,
+        '-vf', ','.join(filters),
+        '-f', 'null', '-'
+    ]
+
+
+def parse_scene_metadata(lines, backend='select'):
+    """
+    解析metadata滤镜输出的逐帧元数据
+
+    输出格式为每帧一行“frame:0    pts:0    pts_time:0”，之后是该帧的“键=值”行。
+
+    Args:
+        lines (iterable): 输出的文本行
+        backend (str): 'select'或'scdet'
+
+    Returns:
+        tuple: (时间点数组（秒，float64）, 变化分数数组（0-1，float32）)
+    """
+    key, scale = SCENE_BACKENDS[backend]
+    prefix = key + '='
+    timestamps = []
+    scores = []
+    current_time = None
+
+    for line in lines:
+        line = line.strip()
+        if line.startswith('frame:'):
+            current_time = None
+            for field in line.split():
+                if field.startswith('pts_time:'):
+                    try:
+                        current_time = float(field[9:])
+                    except ValueError:
+                        current_time = None
+        elif line.startswith(prefix) and current_time is not None:
+            try:
+                score = float(line[len(prefix):])
+            except ValueError:
+                continue
+            timestamps.append(current_time)
+            scores.append(score * scale)
+            current_time = None
+
+    return np.asarray(timestamps, dtype=np.float64), np.asarray(scores, dtype=np.float32)
+
+
+def score_scenes(video_path, backend='select', scale_width=160, ffmpeg_cmd='ffmpeg'):
+    """
+    由ffmpeg计算每帧的画面变化分数
+
+    Args:
+        video_path (str): 视频文件路径
+        backend (str): 'select'或'scdet'
+        scale_width (int): 计算分数前缩小到的宽度，None则使用原始分辨率
+        ffmpeg_cmd (str): ffmpeg命令
+
+    Returns:
+        tuple: (时间点数组（秒，float64）, 变化分数数组（0-1，float32）)
+
+    Raises:
+        RuntimeError: ffmpeg不存在或运行失败
+    """
+    command = build_scene_command(video_path, backend, scale_width, ffmpeg_cmd)
+    # 错误输出写入临时文件，避免损坏的视频输出大量错误信息写满管道后ffmpeg阻塞（解析一方也随之卡住）
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file,
+                                       universal_newlines=True, encoding='utf-8', errors='replace')
+        except OSError as e:
+            raise RuntimeError(f"无法运行ffmpeg：{e}")
+        try:
+            # 逐行解析标准输出，长视频也不必缓存全部输出文本
+            result = parse_scene_metadata(process.stdout, backend)
+            process.wait()
+        finally:
+            # 解析出错或被中断时结束ffmpeg，不留下僵尸进程
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode('utf-8', errors='replace')
+            raise RuntimeError(f"ffmpeg运行失败：{stderr.strip()}")
+    return result
+
+
+def detect_cuts(timestamps, scores, threshold=0.3, min_gap=0.5):
+    """
+    根据画面变化分数判定场景切换点
+
+    Args:
+        timestamps (numpy.ndarray): 时间点数组（秒）
+        scores (numpy.ndarray): 变化分数数组（0-1）
+        threshold (float): 分数阈值
+        min_gap (float): 相邻切换点的最小间隔（秒），间隔内只保留分数最高的一个
+
+    Returns:
+        numpy.ndarray: 切换点时间数组（秒）
+    """
+    candidates = np.flatnonzero(scores >= threshold)
+    cuts = []
+    for index in candidates:
+        if cuts and timestamps[index] - timestamps[cuts[-1]] < min_gap:
+            # 与上一个切换点过近时保留分数较高的一个
+            if scores[index] > scores[cuts[-1]]:
+                cuts[-1] = index
+            continue
+        cuts.append(index)
+    return timestamps[np.asarray(cuts, dtype=np.int64)]
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+逐帧分析模块
+多个分析器（亮度、颜色直方图、主色、运动能量等）共享同一次顺序解码，
+每个分析器声明所需的分辨率和颜色空间，相同的缩放和颜色转换每帧只做一次，
+结果按列保存为CSV或NPZ，并统计各分析器的耗时
+"""
+
+import os
+import csv
+import time
+import cv2
+import numpy as np
+from src.video_processor import VideoProcessor
+from src.atomic_file import atomic_output
+
+
+# 支持的颜色空间及从BGR转换的方式
+COLOR_CONVERSIONS = {
+    'bgr': None,
+    'rgb': cv2.COLOR_BGR2RGB,
+    'gray': cv2.COLOR_BGR2GRAY,
+    'hsv': cv2.COLOR_BGR2HSV
+}
+
+
+class FrameAnalyzer:
+    """帧分析器基类
+
+    子类设置name、width、color，实现columns()和analyze()；需要跨帧状态的分析器实现reset()。
+    """
+
+    # 分析器名称
+    name = None
+    # 所需的帧宽度（高度按比例），None为原始尺寸
+    width = 160
+    # 所需的颜色空间：'bgr'、'rgb'、'gray'或'hsv'
+    color = 'bgr'
+
+    def columns(self):
+        """
+        输出列名
+
+        Returns:
+            list: 列名列表
+        """
+        raise NotImplementedError
+
+    def analyze(self, frame):
+        """
+        分析一帧（帧由流水线共享，不要修改）
+
+        Args:
+            frame (numpy.ndarray): 按width和color转换后的帧
+
+        Returns:
+            list: 与columns()对应的数值
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """开始分析新视频前重置状态"""
+        pass
+
+
+class BrightnessAnalyzer(FrameAnalyzer):
+    """亮度分析器：灰度均值和标准差（0-255）"""
+
+    name = 'brightness'
+    color = 'gray'
+
+    def columns(self):
+        return ['brightness_mean', 'brightness_std']
+
+    def analyze(self, frame):
+        mean, std = cv2.meanStdDev(frame)
+        return [float(mean[0, 0]), float(std[0, 0])]
+
+
+class ColorHistogramAnalyzer(FrameAnalyzer):
+    """颜色直方图分析器：HSV色相、饱和度、明度各通道的归一化直方图"""
+
+    name = 'histogram'
+    color = 'hsv'
+
+    def __init__(self, bins=8):
+        """
+        初始化
+
+        Args:
+            bins (int): 每个通道的直方图区间数
+        """
+        self.bins = bins
+
+    def columns(self):
+        return [f"hist_{channel}_{i}" for channel in ('h', 's', 'v') for i in range(self.bins)]
+
+    def analyze(self, frame):
+        pixels = frame.shape[0] * frame.shape[1]
+        values = []
+        # OpenCV的8位HSV中色相范围为0-179
+        for channel, upper in ((0, 180), (1, 256), (2, 256)):
+            hist = cv2.calcHist([frame], [channel], None, [self.bins], [0, upper])
+            values.extend((hist.ravel() / pixels).tolist())
+        return values
+
+
+class DominantColorAnalyzer(FrameAnalyzer):
+    """主色分析器：将颜色量化后统计占比最高的几种颜色（各取该区间像素的平均色）"""
+
+    name = 'dominant'
+    width = 64
+    color = 'rgb'
+
+    def __init__(self, colors=3, levels=4):
+        """
+        初始化
+
+        Args:
+            colors (int): 输出的主色数量
+            levels (int): 每个通道的量化级数（共levels³种颜色）
+        """
+        self.colors = colors
+        self.levels = levels
+
+    def columns(self):
+        return [f"dominant_{i}_{part}" for i in range(self.colors) for part in ('r', 'g', 'b', 'share')]
+
+    def analyze(self, frame):
+        pixels = frame.reshape(-1, 3)
+        quantized = (pixels.astype(np.uint16) * self.levels) >> 8
+        codes = (quantized[:, 0] * self.levels + quantized[:, 1]) * self.levels + quantized[:, 2]
+        counts = np.bincount(codes, minlength=self.levels ** 3)
+        sums = np.stack([np.bincount(codes, weights=pixels[:, c], minlength=self.levels ** 3) for c in range(3)],
+                        axis=1)
+
+        values = []
+        for code in np.argsort(counts)[::-1][:self.colors]:
+            count = counts[code]
+            if count == 0:
+                values.extend([np.nan] * 4)
+                continue
+            values.extend((sums[code] / count).tolist())
+            values.append(count / len(codes))
+        return values
+
+
+class MotionEnergyAnalyzer(FrameAnalyzer):
+    """运动能量分析器：与上一个分析帧的平均灰度差（0-1），第一帧为0"""
+
+    name = 'motion'
+    color = 'gray'
+
+    def __init__(self):
+        self.previous = None
+
+    def columns(self):
+        return ['motion_energy']
+
+    def reset(self):
+        self.previous = None
+
+    def analyze(self, frame):
+        if self.previous is None:
+            energy = 0.0
+        else:
+            energy = float(cv2.norm(frame, self.previous, cv2.NORM_L1)) / (frame.size * 255.0)
+        # 流水线每帧会生成新的数组，可以直接保留引用
+        self.previous = frame
+        return [energy]
+
+
+# 可用的分析器
+ANALYZERS = {
+    BrightnessAnalyzer.name: BrightnessAnalyzer,
+    ColorHistogramAnalyzer.name: ColorHistogramAnalyzer,
+    DominantColorAnalyzer.name: DominantColorAnalyzer,
+    MotionEnergyAnalyzer.name: MotionEnergyAnalyzer
+}
+
+
+def get_analyzer(name, **options):
+    """
+    按名称创建分析器
+
+    Args:
+        name (str): 分析器名称，见ANALYZERS
+        **options: 分析器参数
+
+    Returns:
+        FrameAnalyzer: 分析器
+
+    Raises:
+        ValueError: 未知的分析器名称
+    """
+    analyzer_class = ANALYZERS.get(name)
+    if analyzer_class is None:
+        raise ValueError(f"未知的分析器：{name}（可选：{', '.join(ANALYZERS)}）")
+    return analyzer_class(**options)
+
+
+class FrameConversions:
+    """单帧的共享转换缓存类，相同的(宽度, 颜色空间)只转换一次"""
+
+    def __init__(self, frame):
+        """
+        初始化
+
+        Args:
+            frame (numpy.ndarray): 解码得到的BGR帧
+        """
+        self.frame = frame
+        self.cache = {(None, 'bgr'): frame}
+
+    def get(self, width, color):
+        """
+        获取指定宽度和颜色空间的帧
+
+        Args:
+            width (int): 宽度，None或不小于原始宽度时为原始尺寸
+            color (str): 颜色空间
+
+        Returns:
+            numpy.ndarray: 转换后的帧
+        """
+        height, frame_width = self.frame.shape[:2]
+        if width is not None and width >= frame_width:
+            width = None
+        key = (width, color)
+        converted = self.cache.get(key)
+        if converted is not None:
+            return converted
+
+        if color == 'bgr':
+            new_height = max(1, int(round(height * width / frame_width)))
+            converted = cv2.resize(self.frame, (width, new_height), interpolation=cv2.INTER_AREA)
+        else:
+            code = COLOR_CONVERSIONS.get(color)
+            if code is None and color not in COLOR_CONVERSIONS:
+                raise ValueError(f"不支持的颜色空间：{color}")
+            converted = cv2.cvtColor(self.get(width, 'bgr'), code)
+        self.cache[key] = converted
+        return converted
+
+
+class AnalysisResult:
+    """逐帧分析结果类（按列保存）"""
+
+    def __init__(self, frame_indices, timestamps, columns, timings, video_info):
+        """
+        初始化
+
+        Args:
+            frame_indices (numpy.ndarray): 分析帧的序号
+            timestamps (numpy.ndarray): 分析帧的时间点（秒）
+            columns (dict): 列名 -> 数值数组，与帧一一对应
+            timings (dict): 耗时统计（秒），包括decode、convert和各分析器
+            video_info (dict): 视频信息
+        """
+        self.frame_indices = frame_indices
+        self.timestamps = timestamps
+        self.columns = columns
+        self.timings = timings
+        self.video_info = video_info
+
+    def __len__(self):
+        return len(self.frame_indices)
+
+    def save_csv(self, output_path):
+        """
+        保存为CSV（每帧一行）
+
+        Args:
+            output_path (str): 输出路径
+        """
+        names = list(self.columns)
+        with atomic_output(output_path) as temp_path:
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['frame_index', 'timestamp'] + names)
+                data = [self.columns[name] for name in names]
+                for row, frame_index in enumerate(self.frame_indices):
+                    writer.writerow([int(frame_index), f"{self.timestamps[row]:.3f}"] +
+                                    [f"{column[row]:.6g}" for column in data])
+
+    def save_npz(self, output_path):
+        """
+        保存为NPZ（每列一个数组，另含frame_index和timestamp）
+
+        Args:
+            output_path (str): 输出路径（.npz）
+        """
+        with atomic_output(output_path) as temp_path:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, frame_index=self.frame_indices, timestamp=self.timestamps, **self.columns)
+
+    def save(self, output_path):
+        """
+        按扩展名保存为CSV或NPZ
+
+        Args:
+            output_path (str): 输出路径（.csv或.npz）
+
+        Raises:
+            ValueError: 不支持的扩展名
+        """
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if output_path.lower().endswith('.csv'):
+            self.save_csv(output_path)
+        elif output_path.lower().endswith('.npz'):
+            self.save_npz(output_path)
+        else:
+            raise ValueError("分析结果只支持保存为.csv或.npz")
+
+
+class AnalysisPipeline:
+    """单次解码的多分析器流水线类"""
+
+    def __init__(self, analyzers):
+        """
+        初始化
+
+        Args:
+            analyzers (list): 分析器列表（FrameAnalyzer实例）
+
+        Raises:
+            ValueError: 分析器列表为空或列名重复
+        """
+        if not analyzers:
+            raise ValueError("至少需要一个分析器")
+        self.analyzers = list(analyzers)
+        names = [column for analyzer in self.analyzers for column in analyzer.columns()]
+        if len(names) != len(set(names)):
+            raise ValueError("分析器的输出列名重复")
+
+    def run(self, video_path, step=1, sample_fps=None, callback=None):
+        """
+        顺序解码视频并运行全部分析器；未被分析的帧只grab（仍需解码），跳过retrieve中的像素格式转换和复制
+
+        Args:
+            video_path (str): 视频文件路径
+            step (int): 每隔多少帧分析一帧
+            sample_fps (float): 每秒分析的帧数，指定时覆盖step
+            callback (callable): 进度回调函数，参数为(已读取的帧数, 总帧数)
+
+        Returns:
+            AnalysisResult: 分析结果
+
+        Raises:
+            ValueError: 视频无法加载
+        """
+        processor = VideoProcessor()
+        if not processor.load_video(video_path):
+            raise ValueError(f"无法加载视频文件：{video_path}")
+        try:
+            video_info = processor.get_video_info()
+            fps = video_info.get('fps') or 25.0
+            total_frames = video_info.get('total_frames', 0)
+            if sample_fps:
+                step = max(1, int(round(fps / sample_fps)))
+            step = max(1, int(step))
+
+            for analyzer in self.analyzers:
+                analyzer.reset()
+            rows = [[] for _ in self.analyzers]
+            frame_indices = []
+            timings = {'decode': 0.0, 'convert': 0.0}
+            timings.update({analyzer.name: 0.0 for analyzer in self.analyzers})
+
+            cap = processor.cap
+            frame_index = 0
+            while True:
+                start = time.perf_counter()
+                if not cap.grab():
+                    break
+                if frame_index % step:
+                    timings['decode'] += time.perf_counter() - start
+                    frame_index += 1
+                    continue
+                ret, frame = cap.retrieve()
+                timings['decode'] += time.perf_counter() - start
+                if not ret:
+                    frame_index += 1
+                    continue
+
+                conversions = FrameConversions(frame)
+                for i, analyzer in enumerate(self.analyzers):
+                    start = time.perf_counter()
+                    converted = conversions.get(analyzer.width, analyzer.color)
+                    middle = time.perf_counter()
+                    rows[i].append(analyzer.analyze(converted))
+                    timings['convert'] += middle - start
+                    timings[analyzer.name] += time.perf_counter() - middle
+
+                frame_indices.append(frame_index)
+                frame_index += 1
+                if callback and frame_index % 100 == 0:
+                    callback(frame_index, total_frames)
+        finally:
+            processor.release()
+
+        columns = {}
+        for analyzer, analyzer_rows in zip(self.analyzers, rows):
+            names = analyzer.columns()
+            values = np.array(analyzer_rows, dtype=np.float64).reshape(len(analyzer_rows), len(names))
+            for j, name in enumerate(names):
+                columns[name] = values[:, j]
+
+        frame_indices = np.array(frame_indices, dtype=np.int64)
+        return AnalysisResult(frame_indices, frame_indices / fps, columns, timings, video_info)
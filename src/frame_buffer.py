@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧缓冲池模块
+预先分配固定数量的帧数组，解码和颜色转换直接写入其中并循环复用，
+稳定提取时不再为每一帧分配新内存
+"""
+
+import threading
+import numpy as np
+
+
+class PooledFrame:
+    """缓冲池中的帧，使用完毕后必须调用release归还"""
+
+    def __init__(self, pool, array):
+        """
+        初始化
+
+        Args:
+            pool (FrameBufferPool): 所属缓冲池
+            array (numpy.ndarray): 帧数组
+        """
+        self.pool = pool
+        self.array = array
+        # 帧信息，由提取器填写
+        self.frame_index = None
+        self.timestamp = None
+        self.released = False
+
+    def release(self):
+        """归还缓冲区（可重复调用），归还后不能再访问array"""
+        if not self.released:
+            self.released = True
+            self.pool.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class FrameBufferPool:
+    """帧缓冲池类（线程安全）"""
+
+    def __init__(self, shape, count=4, dtype=np.uint8):
+        """
+        初始化并预先分配缓冲区
+
+        Args:
+            shape (tuple): 帧数组形状，如 (height, width, 3)
+            count (int): 缓冲区数量，即同时可被使用的帧数
+            dtype: 数组类型
+        """
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.count = max(1, count)
+        self.condition = threading.Condition()
+        self.free = [np.empty(self.shape, dtype) for _ in range(self.count)]
+        # 解码时的中间缓冲区（如BGR转RGB前的原始帧），由提取器独占使用
+        self.scratch = np.empty(self.shape, dtype)
+        self.stats = {'acquired': 0, 'waits': 0, 'reallocations': 0}
+
+    def acquire(self, timeout=None):
+        """
+        取出一个空闲缓冲区
+
+        Args:
+            timeout (float): 全部缓冲区都在使用时的最长等待时间（秒），None则一直等待
+
+        Returns:
+            PooledFrame: 帧
+
+        Raises:
+            RuntimeError: 等待超时（通常是使用方没有归还帧）
+        """
+        with self.condition:
+            if not self.free:
+                self.stats['waits'] += 1
+                if not self.condition.wait_for(lambda: self.free, timeout):
+                    raise RuntimeError("帧缓冲区已全部占用，请确认已对使用完毕的帧调用release")
+            self.stats['acquired'] += 1
+            return PooledFrame(self, self.free.pop())
+
+    def release(self, pooled_frame):
+        """
+        归还缓冲区（由PooledFrame调用）
+
+        Args:
+            pooled_frame (PooledFrame): 帧
+        """
+        array = pooled_frame.array
+        pooled_frame.array = None
+        with self.condition:
+            # 解码器输出尺寸与预期不符（如带旋转信息的视频）时会另行分配数组，
+            # 保留新数组并改用其尺寸，之后的缓冲区逐步统一为实际尺寸
+            if array.shape != self.shape:
+                self.shape = array.shape
+                self.stats['reallocations'] += 1
+            self.free.append(array)
+            self.condition.notify()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧图片缓存模块
+按视频指纹、帧序号、图片格式、质量和编码后端缓存已编码的帧图片，
+相同参数再次提取时直接链接或复制到输出目录，无需重新解码和编码
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from src.config import get_cache_dir
+
+
+# 默认缓存大小上限（字节）
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class FrameCache:
+    """帧图片缓存类（线程安全）"""
+    
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        初始化
+        
+        Args:
+            cache_dir (str): 缓存目录，None则使用用户目录下的默认缓存目录
+            max_bytes (int): 缓存大小上限（字节），超出后按最近最少使用淘汰
+        """
+        self.cache_dir = cache_dir or get_cache_dir('frames')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self.total_bytes = sum(os.path.getsize(path) for path in self._iter_entries())
+    
+    def _iter_entries(self):
+        """遍历所有缓存文件路径"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    yield os.path.join(root, name)
+    
+    def _entry_path(self, fingerprint, frame_index, output_format, quality, backend=None):
+        """
+        计算缓存文件路径
+        
+        Args:
+            fingerprint (str): 视频指纹
+            frame_index (int): 帧序号
+            output_format (str): 图片格式
+            quality (int): 图片质量（png忽略）
+            backend (str): 编码后端名称（不同后端相同质量下编码结果不同）
+            
+        Returns:
+            str: 缓存文件路径
+        """
+        output_format = output_format.lower()
+        if output_format == 'png':
+            quality = 0
+        key = f"{fingerprint}:{frame_index}:{output_format}:{quality}:{backend}"
+        key = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{output_format}")
+    
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """
+        优先创建硬链接，跨磁盘等情况下回退为复制
+        
+        先链接或复制到临时文件名再替换目标，src不存在（缓存未命中或已被淘汰）时目标文件保持不变。
+        
+        Raises:
+            OSError: src不存在或无法写入目标
+        """
+        temp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        try:
+            try:
+                os.link(src, temp_path)
+            except OSError:
+                if not os.path.exists(src):
+                    raise
+                shutil.copyfile(src, temp_path)
+            os.replace(temp_path, dst)
+        except OSError:
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def fetch(self, fingerprint, frame_index, output_format, quality, output_path, backend=None):
+        """
+        从缓存取出帧图片到输出路径
+        
+        Args:
+            fingerprint (str): 视频指纹
+            frame_index (int): 帧序号
+            output_format (str): 图片格式
+            quality (int): 图片质量
+            output_path (str): 输出路径
+            backend (str): 编码后端名称
+            
+        Returns:
+            bool: 是否命中缓存
+        """
+        entry_path = self._entry_path(fingerprint, frame_index, output_format, quality, backend)
+        try:
+            self._link_or_copy(entry_path, output_path)
+            # 更新修改时间，作为最近使用时间
+            os.utime(entry_path)
+        except OSError:
+            with self.lock:
+                self.stats['misses'] += 1
+            return False
+        
+        with self.lock:
+            self.stats['hits'] += 1
+        return True
+    
+    def store(self, fingerprint, frame_index, output_format, quality, image_path, backend=None):
+        """
+        将已保存的帧图片加入缓存
+        
+        Args:
+            fingerprint (str): 视频指纹
+            frame_index (int): 帧序号
+            output_format (str): 图片格式
+            quality (int): 图片质量
+            image_path (str): 已保存的帧图片路径
+            backend (str): 编码后端名称
+        """
+        entry_path = self._entry_path(fingerprint, frame_index, output_format, quality, backend)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        
+        # 先写临时文件再重命名，避免并发读取到不完整的缓存
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._link_or_copy(image_path, temp_path)
+            existed = os.path.exists(entry_path)
+            old_size = os.path.getsize(entry_path) if existed else 0
+            os.replace(temp_path, entry_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        
+        with self.lock:
+            self.stats['stores'] += 1
+            self.total_bytes += os.path.getsize(entry_path) - old_size
+            need_evict = self.total_bytes > self.max_bytes
+        
+        if need_evict:
+            self.evict()
+    
+    def evict(self):
+        """按最近使用时间淘汰缓存，直到总大小降到上限的90%以下"""
+        entries = []
+        for path in self._iter_entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        
+        with self.lock:
+            self.total_bytes = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if self.total_bytes <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.total_bytes -= size
+                self.stats['evictions'] += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            for path in list(self._iter_entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.total_bytes = 0
@@ -8,24 +8,37 @@
 
 import os
 import cv2
-from PIL import Image
 import numpy as np
-from src.video_processor import VideoProcessor
+from src.video_processor import VideoProcessor, video_fingerprint
+from src.perceptual_hash import FrameHashCache, compute_dhash, is_duplicate
+from src.frame_quality import score_frame_quality
+from src.image_encoder import get_encoder
+from src.frame_buffer import FrameBufferPool
+from src.atomic_file import atomic_output
+from src.pts_index import load_pts_index
 
 
 class FrameExtractor:
     """关键帧提取器类"""
     
-    def __init__(self, video_path):
+    def __init__(self, video_path, capture_pool=None):
         """
         初始化
         
         Args:
             video_path (str): 视频文件路径
+            capture_pool (CapturePool): 解码句柄池，None则独立打开视频
         """
         self.video_path = video_path
-        self.video_processor = VideoProcessor()
+        self.video_processor = VideoProcessor(capture_pool)
         self.video_info = {}
+        # 最近一次提取的帧序号和时间点（秒），与提取结果一一对应
+        self.frame_indices = []
+        self.frame_timestamps = []
+        # 最近一次去重提取的帧哈希
+        self.frame_hashes = []
+        # 显示时间戳索引，启用后按实际显示时间定位和计时（见enable_pts_timing）
+        self.pts_index = None
     
     def initialize(self):
         """
@@ -40,7 +53,83 @@ class FrameExtractor:
         self.video_info = self.video_processor.get_video_info()
         return len(self.video_info) > 0
     
-    def extract_uniform_frames(self, num_frames=5, output_format='jpg', quality=95):
+    def enable_pts_timing(self, ffprobe_cmd='ffprobe', allow_decode=True):
+        """
+        启用按显示时间戳（PTS）计时，适用于可变帧率视频
+        
+        启用后视频时长和总帧数以实际时间戳为准，均匀间隔模式按时间（而非帧序号）均匀采样，
+        帧按时间戳定位，返回的逐帧时间点为实际显示时间。时间戳扫描结果有缓存，
+        同一视频只扫描一次。
+        
+        Args:
+            ffprobe_cmd (str): ffprobe命令
+            allow_decode (bool): ffprobe不可用时是否允许逐帧解码读取时间戳
+            
+        Returns:
+            bool: 是否启用成功（无法获取时间戳时保持按帧率计时）
+        """
+        if not self.video_info:
+            return False
+        
+        pts_index = load_pts_index(self.video_path, ffprobe_cmd, allow_decode)
+        if pts_index is None or pts_index.frame_count == 0:
+            return False
+        
+        self.pts_index = pts_index
+        # 复制一份再修改，句柄池中缓存的视频信息保持不变
+        self.video_info = dict(self.video_info, duration=pts_index.duration, total_frames=pts_index.frame_count,
+                               average_fps=pts_index.average_fps, variable_frame_rate=pts_index.is_variable())
+        return True
+    
+    def timestamp_of(self, frame_pos):
+        """
+        获取帧的时间点
+        
+        Args:
+            frame_pos (int): 帧序号
+            
+        Returns:
+            float: 时间点（秒），启用时间戳计时时为实际显示时间，否则按帧率换算
+        """
+        if self.pts_index is not None:
+            return self.pts_index.time_of(frame_pos)
+        fps = self.video_info.get('fps', 0)
+        return frame_pos / fps if fps > 0 else 0.0
+    
+    def _seek(self, frame_pos):
+        """
+        定位到指定帧，之后读取的下一帧即为该帧
+        
+        可变帧率视频中OpenCV按标称帧率换算帧序号和时间，按帧序号或按时间定位都可能落到别的帧上。
+        启用时间戳计时时先按前一帧的显示时间定位，用解码出的帧时间核对：越过了就往前退（退的距离逐次加倍），
+        再逐帧grab到前一帧为止。恒定帧率视频通常一次定位即到位，只多grab一帧。
+        
+        Args:
+            frame_pos (int): 帧序号
+        """
+        cap = self.video_processor.cap
+        if self.pts_index is None or frame_pos <= 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, max(0, frame_pos))
+            return
+        
+        index = self.pts_index
+        target = min(frame_pos, index.frame_count) - 1
+        seek_time, backoff = index.time_of(target), 1.0
+        while True:
+            cap.set(cv2.CAP_PROP_POS_MSEC, seek_time * 1000.0)
+            if not cap.grab():
+                return
+            current = index.nearest_index(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+            if current <= target or seek_time <= 0:
+                break
+            seek_time = max(0.0, index.time_of(target) - backoff)
+            backoff *= 2
+        
+        while current < target and cap.grab():
+            current = index.nearest_index(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+    
+    def extract_uniform_frames(self, num_frames=5, output_format='jpg', quality=95, dedup_threshold=None,
+                               backfill=False, quality_window=1, color='rgb'):
         """
         均匀间隔模式提取关键帧
         
@@ -48,9 +137,15 @@ class FrameExtractor:
             num_frames (int): 提取的帧数，默认为5
             output_format (str): 输出图片格式，jpg或png
             quality (int): 图片质量，0-100，仅对jpg有效
+            dedup_threshold (int): 近似重复判定的汉明距离阈值（0-64，建议5左右），
+                None则不去重；去重时与已提取画面近似的帧会被丢弃
+            backfill (bool): 去重丢弃帧时，是否在该帧与下一采样点之间另选画面补位
+            quality_window (int): 每个采样点附近参与比较的连续帧数，大于1时
+                从中挑选清晰度和曝光最佳的一帧，避开运动模糊和转场画面
+            color (str): 返回帧的通道顺序，'rgb'，或'bgr'（解码器原生顺序，省去颜色转换）
             
         Returns:
-            list: 提取的帧图像路径列表
+            list: 提取的帧图像列表
         """
         if not self.video_processor.cap or not self.video_processor.cap.isOpened():
             return []
@@ -61,64 +156,438 @@ class FrameExtractor:
         # 计算间隔帧数
         total_frames = self.video_info['total_frames']
         interval = total_frames // (num_frames - 1)
+        positions = self.compute_uniform_positions(num_frames)
         
         extracted_frames = []
+        self.frame_indices = []
+        self.frame_timestamps = []
+        self.frame_hashes = []
+        
+        # 去重时加载帧哈希缓存，已缓存的重复帧无需再解码
+        hash_cache = None
+        if dedup_threshold is not None:
+            hash_cache = FrameHashCache(self.video_path, 'pts' if self.pts_index is not None else None)
+        
+        for frame_pos in positions:
+            # 候选位置：采样点本身，补位时再加上与下一采样点之间的位置
+            candidates = [frame_pos]
+            if hash_cache is not None and backfill:
+                for offset in (interval // 2, interval // 4, interval * 3 // 4):
+                    if offset > 0 and frame_pos + offset < total_frames:
+                        candidates.append(frame_pos + offset)
+            
+            for pos in candidates:
+                frame_hash = None
+                # 缓存按实际帧序号记录，挑选最佳帧时实际帧序号需解码后才能确定
+                if hash_cache is not None and quality_window <= 1:
+                    frame_hash = hash_cache.get(pos)
+                    if frame_hash is not None and is_duplicate(frame_hash, self.frame_hashes, dedup_threshold):
+                        continue
+                
+                # 读取帧
+                if quality_window > 1:
+                    pos, frame = self._read_best_frame(pos, quality_window, total_frames)
+                else:
+                    frame = self._read_frame(pos)
+                if frame is None:
+                    continue
+                
+                if hash_cache is not None:
+                    if frame_hash is None:
+                        frame_hash = hash_cache.get(pos)
+                    if frame_hash is None:
+                        frame_hash = compute_dhash(frame)
+                        hash_cache.set(pos, frame_hash)
+                    if is_duplicate(frame_hash, self.frame_hashes, dedup_threshold):
+                        continue
+                    self.frame_hashes.append(frame_hash)
+                
+                # 将BGR转换为RGB
+                if color == 'rgb':
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                extracted_frames.append(frame)
+                self.frame_indices.append(pos)
+                self.frame_timestamps.append(self.timestamp_of(pos))
+                break
+        
+        if hash_cache is not None:
+            hash_cache.save()
+        
+        return extracted_frames
+    
+    def create_buffer_pool(self, count=4):
+        """
+        按视频分辨率创建帧缓冲池
         
+        Args:
+            count (int): 缓冲区数量
+            
+        Returns:
+            FrameBufferPool: 帧缓冲池
+        """
+        return FrameBufferPool((self.video_info['height'], self.video_info['width'], 3), count)
+    
+    def iter_uniform_frames(self, num_frames=5, buffer_pool=None, color='rgb', acquire_timeout=None):
+        """
+        均匀间隔模式逐帧提取关键帧（使用帧缓冲池，不为每帧分配内存）
+        
+        解码直接写入缓冲区，颜色转换从中间缓冲区写入输出缓冲区。
+        每个返回的帧使用完毕后必须调用release，否则缓冲区耗尽时会阻塞等待。
+        
+        Args:
+            num_frames (int): 提取的帧数
+            buffer_pool (FrameBufferPool): 帧缓冲池，None则按视频分辨率创建
+            color (str): 帧的通道顺序，'rgb'或'bgr'（省去颜色转换）
+            acquire_timeout (float): 等待空闲缓冲区的最长时间（秒），None则一直等待
+            
+        Yields:
+            PooledFrame: 帧，frame_index和timestamp为帧序号和时间点（秒）
+        """
+        if not self.video_processor.cap or not self.video_processor.cap.isOpened():
+            return
+        
+        if buffer_pool is None:
+            buffer_pool = self.create_buffer_pool()
+        
+        self.frame_indices = []
+        self.frame_timestamps = []
+        
+        for frame_pos in self.compute_uniform_positions(num_frames):
+            self._seek(frame_pos)
+            pooled = self._read_pooled(buffer_pool, color, acquire_timeout)
+            if pooled is None:
+                continue
+            
+            pooled.frame_index = frame_pos
+            pooled.timestamp = self.timestamp_of(frame_pos)
+            self.frame_indices.append(frame_pos)
+            self.frame_timestamps.append(pooled.timestamp)
+            yield pooled
+    
+    def _read_pooled(self, buffer_pool, color='rgb', acquire_timeout=None):
+        """
+        读取当前位置的帧到缓冲池的缓冲区中
+        
+        Args:
+            buffer_pool (FrameBufferPool): 帧缓冲池
+            color (str): 帧的通道顺序，'rgb'或'bgr'
+            acquire_timeout (float): 等待空闲缓冲区的最长时间（秒）
+            
+        Returns:
+            PooledFrame: 帧，读取失败返回None
+        """
+        cap = self.video_processor.cap
+        pooled = buffer_pool.acquire(acquire_timeout)
+        
+        if color == 'bgr':
+            ret, frame = cap.read(pooled.array)
+        else:
+            # 先解码到中间缓冲区，再转换颜色写入输出缓冲区
+            ret, frame = cap.read(buffer_pool.scratch)
+            if ret:
+                buffer_pool.scratch = frame
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=pooled.array)
+        
+        if not ret:
+            pooled.release()
+            return None
+        
+        pooled.array = frame
+        return pooled
+    
+    def compute_uniform_positions(self, num_frames):
+        """
+        计算均匀间隔模式的采样帧位置（首尾帧必包含）；启用时间戳计时时按显示时间均匀采样
+        
+        Args:
+            num_frames (int): 提取的帧数，至少为2
+            
+        Returns:
+            list: 帧序号列表
+        """
+        if self.pts_index is not None:
+            return self.pts_index.uniform_positions(num_frames)
+        
+        num_frames = max(2, num_frames)
+        total_frames = self.video_info['total_frames']
+        interval = total_frames // (num_frames - 1)
+        
+        positions = []
         for i in range(num_frames):
             # 计算当前帧位置
             frame_pos = i * interval
             if frame_pos >= total_frames:
                 frame_pos = total_frames - 1
+            positions.append(frame_pos)
+        return positions
+    
+    def _read_frame(self, frame_pos):
+        """
+        读取指定位置的帧
+        
+        Args:
+            frame_pos (int): 帧序号
             
-            # 设置帧位置
-            self.video_processor.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
+        Returns:
+            numpy.ndarray: BGR帧图像，读取失败返回None
+        """
+        # 设置帧位置
+        self._seek(frame_pos)
+        
+        ret, frame = self.video_processor.cap.read()
+        if ret:
+            return frame
+        return None
+    
+    def _read_best_frame(self, frame_pos, window, total_frames):
+        """
+        读取采样点附近质量最佳的帧
+        
+        只定位一次，之后顺序解码窗口内的连续帧并逐帧评分，
+        额外开销约为窗口大小乘以顺序解码和低分辨率评分的开销。
+        
+        Args:
+            frame_pos (int): 采样点帧序号
+            window (int): 参与比较的连续帧数
+            total_frames (int): 视频总帧数
             
-            # 读取帧
+        Returns:
+            tuple: (最佳帧序号, BGR帧图像)，读取失败时帧图像为None
+        """
+        # 窗口以采样点为中心，并限制在视频范围内
+        start = max(0, min(frame_pos - window // 2, total_frames - window))
+        self._seek(start)
+        
+        best_pos, best_frame, best_score = frame_pos, None, -1.0
+        for pos in range(start, min(start + window, total_frames)):
             ret, frame = self.video_processor.cap.read()
-            if ret:
-                # 将BGR转换为RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                extracted_frames.append(frame_rgb)
+            if not ret:
+                break
+            score = score_frame_quality(frame)
+            if score > best_score:
+                best_pos, best_frame, best_score = pos, frame, score
         
-        return extracted_frames
+        return best_pos, best_frame
     
-    def save_frames(self, frames, output_dir, output_format='jpg', quality=95):
+    def save_frames(self, frames, output_dir, output_format='jpg', quality=95, color='rgb', encoder=None, sink=None):
         """
         保存提取的帧图像
         
         Args:
             frames (list): 帧图像列表
-            output_dir (str): 输出目录
-            output_format (str): 输出图片格式，jpg或png
-            quality (int): 图片质量，0-100，仅对jpg有效
+            output_dir (str): 输出目录；写入归档时为归档内的目录（可为空字符串）
+            output_format (str): 输出图片格式，jpg、png或webp
+            quality (int): 图片质量，0-100，对jpg和webp有效
+            color (str): 帧的通道顺序，'rgb'或'bgr'
+            encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端（默认PIL）
+            sink (ArchiveSink): 归档输出，编码后直接写入归档，None则写入文件
             
         Returns:
-            list: 保存的图片路径列表
+            list: 保存的图片路径列表（写入归档时为归档内的路径）
         """
         # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
+        if sink is None:
+            os.makedirs(output_dir, exist_ok=True)
         
         saved_paths = []
         
         # 获取视频文件名（不含扩展名）
         video_name = os.path.splitext(os.path.basename(self.video_path))[0]
         
+        if encoder is None and len(frames) > 0:
+            height, width = frames[0].shape[:2]
+            encoder = get_encoder(None, output_format, quality, (width, height))
+        
         for i, frame in enumerate(frames):
             # 生成文件名
             filename = f"{video_name}_{i+1:03d}.{output_format}"
             output_path = os.path.join(output_dir, filename)
             
             # 保存图片
-            img = Image.fromarray(frame)
-            if output_format.lower() == 'jpg':
-                img.save(output_path, 'JPEG', quality=quality)
-            else:
-                img.save(output_path, 'PNG')
+            saved_paths.append(self._save_frame(frame, output_path, output_format, quality, color, encoder, sink))
+        
+        return saved_paths
+    
+    def _save_frame(self, frame, output_path, output_format='jpg', quality=95, color='rgb', encoder=None, sink=None):
+        """
+        保存单张帧图像
+        
+        Args:
+            frame (numpy.ndarray): 帧图像
+            output_path (str): 输出路径（写入归档时为归档内的路径）
+            output_format (str): 输出图片格式，jpg、png或webp
+            quality (int): 图片质量，0-100，对jpg和webp有效
+            color (str): 帧的通道顺序，'rgb'或'bgr'
+            encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端
+            sink (ArchiveSink): 归档输出，None则写入文件
+            
+        Returns:
+            str: 保存的路径
+        """
+        if encoder is None:
+            encoder = get_encoder(None, output_format, quality, (frame.shape[1], frame.shape[0]))
+        
+        if sink is not None:
+            return sink.write(output_path, encoder.encode(frame, output_format, quality, color))
+        
+        # 先写临时文件再替换：中断时不会留下不完整的图片，
+        # 输出文件是缓存的硬链接时也只替换目录项，不改动缓存内容
+        with atomic_output(output_path) as temp_path:
+            encoder.save(frame, temp_path, output_format, quality, color)
+        return output_path
+    
+    def extract_to_dir(self, output_dir, num_frames=5, output_format='jpg', quality=95, frame_cache=None,
+                       encoder=None, sink=None, **extract_options):
+        """
+        均匀间隔模式提取关键帧并保存到目录
+        
+        Args:
+            output_dir (str): 输出目录
+            num_frames (int): 提取的帧数
+            output_format (str): 输出图片格式，jpg、png或webp
+            quality (int): 图片质量，0-100，对jpg和webp有效
+            frame_cache (FrameCache): 帧图片缓存，命中的帧直接从缓存取出，不再解码；
+                仅在未使用其他提取参数（去重、清晰画面挑选等）时生效，
+                此时逐帧提取保存并复用帧缓冲区
+            encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端；
+                帧按编码器原生的通道顺序提取，使用OpenCV后端时省去颜色转换
+            sink (ArchiveSink): 归档输出，帧编码后直接写入归档（此时output_dir为归档内的目录，不使用帧缓存）
+            **extract_options: 传给extract_uniform_frames的其他参数（如dedup_threshold、quality_window）
+            
+        Returns:
+            list: 保存的图片路径列表
+        """
+        plain_uniform = (extract_options.get('dedup_threshold') is None
+                         and extract_options.get('quality_window', 1) <= 1)
+        if encoder is None:
+            size = (self.video_info.get('width', 0), self.video_info.get('height', 0))
+            encoder = get_encoder(None, output_format, quality, size)
+        
+        if plain_uniform:
+            return self._extract_to_dir_streamed(output_dir, num_frames, output_format, quality, frame_cache, encoder,
+                                                 sink)
+        
+        frames = self.extract_uniform_frames(num_frames=num_frames, output_format=output_format,
+                                             quality=quality, color=encoder.native_color, **extract_options)
+        return self.save_frames(frames, output_dir, output_format=output_format, quality=quality,
+                                color=encoder.native_color, encoder=encoder, sink=sink)
+    
+    def _extract_to_dir_streamed(self, output_dir, num_frames, output_format, quality, frame_cache, encoder, sink=None):
+        """
+        均匀间隔逐帧提取并保存，帧缓冲区循环复用；使用帧图片缓存时只解码和编码未命中的帧
+        
+        Args:
+            output_dir (str): 输出目录
+            num_frames (int): 提取的帧数
+            output_format (str): 输出图片格式
+            quality (int): 图片质量，0-100
+            frame_cache (FrameCache): 帧图片缓存，None则不使用缓存
+            encoder (ImageEncoder): 图片编码器
+            sink (ArchiveSink): 归档输出，None则写入文件
             
-            saved_paths.append(output_path)
+        Returns:
+            list: 保存的图片路径列表
+        """
+        if not self.video_processor.cap or not self.video_processor.cap.isOpened():
+            return []
         
+        return self.extract_positions_to_dir(output_dir, self.compute_uniform_positions(num_frames),
+                                             output_format, quality, frame_cache, encoder, sink=sink)
+    
+    def extract_positions_to_dir(self, output_dir, positions, output_format='jpg', quality=95, frame_cache=None,
+                                 encoder=None, start_number=1, sink=None, callback=None):
+        """
+        逐帧提取指定位置的帧并保存，帧缓冲区循环复用；使用帧图片缓存时只解码和编码未命中的帧
+        
+        Args:
+            output_dir (str): 输出目录
+            positions (list): 帧序号列表
+            output_format (str): 输出图片格式
+            quality (int): 图片质量，0-100
+            frame_cache (FrameCache): 帧图片缓存，None则不使用缓存
+            encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端
+            start_number (int): 第一张图片的文件名序号（分批提取同一视频时避免重名）
+            sink (ArchiveSink): 归档输出，帧编码后直接写入归档（此时output_dir为归档内的目录，不使用帧缓存）
+            callback (callable): 进度回调函数，每处理完一个位置调用一次，参数为(已处理位置数, 总位置数)；
+                返回False时停止提取，已保存的帧照常返回
+            
+        Returns:
+            list: 保存的图片路径列表，frame_indices和frame_timestamps记录对应的帧序号和时间点
+        """
+        if not self.video_processor.cap or not self.video_processor.cap.isOpened():
+            return []
+        
+        if encoder is None:
+            size = (self.video_info.get('width', 0), self.video_info.get('height', 0))
+            encoder = get_encoder(None, output_format, quality, size)
+        
+        if sink is None:
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            # 帧缓存以文件形式存取，写入归档时不使用
+            frame_cache = None
+        video_name = os.path.splitext(os.path.basename(self.video_path))[0]
+        fingerprint = video_fingerprint(self.video_path) if frame_cache is not None else None
+        if fingerprint is not None and self.pts_index is not None:
+            # 按时间戳定位时同一帧序号可能对应不同画面，缓存分开存放
+            fingerprint += ':pts'
+        # 保存完一帧才读取下一帧，两个缓冲区即可
+        buffer_pool = self.create_buffer_pool(count=2)
+        
+        saved_paths = []
+        frame_indices = []
+        frame_timestamps = []
+        
+        for done, frame_pos in enumerate(positions, 1):
+            filename = f"{video_name}_{start_number + len(saved_paths):03d}.{output_format}"
+            output_path = os.path.join(output_dir, filename)
+            
+            if frame_cache is None or not frame_cache.fetch(fingerprint, frame_pos, output_format, quality,
+                                                            output_path, encoder.name):
+                self._seek(frame_pos)
+                pooled = self._read_pooled(buffer_pool, encoder.native_color)
+                if pooled is not None:
+                    with pooled:
+                        output_path = self._save_frame(pooled.array, output_path, output_format, quality,
+                                                       encoder.native_color, encoder, sink)
+                    if frame_cache is not None:
+                        frame_cache.store(fingerprint, frame_pos, output_format, quality, output_path,
+                                          encoder.name)
+                else:
+                    output_path = None
+            
+            if output_path is not None:
+                saved_paths.append(output_path)
+                frame_indices.append(frame_pos)
+                frame_timestamps.append(self.timestamp_of(frame_pos))
+            if callback and callback(done, len(positions)) is False:
+                break
+        
+        self.frame_indices = frame_indices
+        self.frame_timestamps = frame_timestamps
         return saved_paths
     
+    def extract_to_store(self, store_writer, num_frames=5):
+        """
+        均匀间隔模式提取关键帧并追加到帧数组存储（不经过图片编码）
+        
+        解码结果直接由缓冲池转换颜色写入存储的内存映射块，不产生中间图片。
+        
+        Args:
+            store_writer (FrameStoreWriter): 帧数组存储写入器
+            num_frames (int): 提取的帧数
+            
+        Returns:
+            list: 各帧在存储中的序号列表
+        """
+        store_indices = []
+        for pooled in self.iter_uniform_frames(num_frames, self.create_buffer_pool(count=2), color='bgr'):
+            with pooled:
+                store_indices.append(store_writer.append(pooled.array, pooled.frame_index, pooled.timestamp,
+                                                         color='bgr', source=self.video_path))
+        store_writer.flush()
+        return store_indices
+    
     def release(self):
         """释放资源"""
         self.video_processor.release()
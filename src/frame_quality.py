@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+画面质量评估模块
+负责评估帧画面的清晰度和曝光，用于在采样点附近挑选最佳画面
+"""
+
+import cv2
+import numpy as np
+
+
+def score_frame_quality(frame, max_side=160):
+    """
+    计算帧画面质量得分
+    
+    在缩小后的灰度图上计算拉普拉斯方差（清晰度），并按曝光情况打折：
+    平均亮度偏离中间调、过暗或过曝像素越多，得分越低。
+    模糊、转场黑场、闪白等画面得分明显偏低。
+    
+    Args:
+        frame (numpy.ndarray): BGR帧图像
+        max_side (int): 评估时的最长边像素
+        
+    Returns:
+        float: 质量得分，越大越好
+    """
+    height, width = frame.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    
+    # 清晰度：拉普拉斯方差
+    sharpness = cv2.Laplacian(gray, cv2.CV_32F).var()
+    
+    # 曝光：平均亮度与中间调的偏离程度，以及过暗/过曝像素比例
+    mean = gray.mean()
+    clipped = np.count_nonzero((gray < 16) | (gray > 239)) / gray.size
+    exposure = (1.0 - abs(mean - 128.0) / 128.0) * (1.0 - clipped)
+    
+    return float(sharpness * max(exposure, 0.05))
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧数组存储模块
+将提取的原始帧按块写入内存映射的.npy文件，并记录帧序号和时间点索引，
+可边提取边追加，读取方以内存映射方式直接访问，无需解码图片
+"""
+
+import os
+import json
+import cv2
+import numpy as np
+
+
+# 存储格式版本
+STORE_VERSION = 1
+
+# 存储级别：原始尺寸和缩小尺寸，各自保存在同名子目录中
+STORE_LEVELS = ('full', 'small')
+
+
+def _chunk_path(store_dir, level, chunk_index):
+    """块文件路径"""
+    return os.path.join(store_dir, level, f"chunk_{chunk_index:05d}.npy")
+
+
+class FrameStoreWriter:
+    """帧数组存储写入类，同一存储中所有帧尺寸一致，连续存放"""
+
+    def __init__(self, store_dir, chunk_frames=256, downscale_width=None, keep_full=True):
+        """
+        初始化；存储目录中已有数据时继续追加
+
+        Args:
+            store_dir (str): 存储目录
+            chunk_frames (int): 每个块文件的帧数
+            downscale_width (int): 同时保存缩小副本的宽度（高度按比例），None则不保存
+            keep_full (bool): 是否保存原始尺寸的帧（只需要缩小副本时可关闭）
+
+        Raises:
+            ValueError: 两种尺寸都不保存，或已有存储的参数与本次不一致
+        """
+        if not keep_full and not downscale_width:
+            raise ValueError("原始尺寸和缩小副本至少需要保存一种")
+
+        self.store_dir = store_dir
+        self.meta_path = os.path.join(store_dir, 'meta.json')
+        self.index_path = os.path.join(store_dir, 'index.jsonl')
+        os.makedirs(store_dir, exist_ok=True)
+
+        self.meta = {
+            'version': STORE_VERSION,
+            'count': 0,
+            'chunk_frames': chunk_frames,
+            'color': 'rgb',
+            'dtype': 'uint8',
+            'levels': {}
+        }
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != STORE_VERSION:
+                raise ValueError(f"存储格式版本不符：{self.meta.get('version')}")
+            levels = set(self.meta['levels'])
+            if levels and levels != self._wanted_levels(keep_full, downscale_width):
+                raise ValueError(f"已有存储的尺寸级别为{sorted(levels)}，与本次参数不一致")
+        self._truncate_index(self.meta['count'])
+        if self.meta['count'] == 0:
+            # 还没有刷新过任何帧：上次在首次刷新前异常退出时遗留的块文件形状和内容都不可信
+            self._remove_chunks()
+            self.meta['levels'] = {}
+        # 首次刷新前异常退出时，下次打开也能按元数据截断索引
+        self._write_meta()
+
+        self.keep_full = keep_full
+        self.downscale_width = downscale_width
+        self.count = self.meta['count']
+        self.chunk_frames = self.meta['chunk_frames']
+        # 当前打开的块：级别 -> (块序号, 内存映射数组)
+        self.chunks = {}
+        self.index_file = open(self.index_path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _wanted_levels(keep_full, downscale_width):
+        """本次需要保存的级别"""
+        levels = set()
+        if keep_full:
+            levels.add('full')
+        if downscale_width:
+            levels.add('small')
+        return levels
+
+    def _truncate_index(self, count):
+        """丢弃上次异常退出时多写的索引行（元数据中的帧数为准）"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if len(lines) != count:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[:count])
+
+    def _remove_chunks(self):
+        """删除各级别目录中已有的块文件"""
+        for level in STORE_LEVELS:
+            level_dir = os.path.join(self.store_dir, level)
+            if not os.path.isdir(level_dir):
+                continue
+            for name in os.listdir(level_dir):
+                if name.startswith('chunk_') and name.endswith('.npy'):
+                    os.remove(os.path.join(level_dir, name))
+
+    def _write_meta(self):
+        """原子写入元数据"""
+        temp_path = self.meta_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.meta_path)
+
+    def _level_shapes(self, frame_shape):
+        """
+        根据第一帧确定各级别的帧形状
+
+        Args:
+            frame_shape (tuple): 原始帧形状 (height, width, 3)
+
+        Returns:
+            dict: 级别 -> 帧形状
+        """
+        height, width = frame_shape[:2]
+        shapes = {}
+        if self.keep_full:
+            shapes['full'] = [height, width, 3]
+        if self.downscale_width:
+            small_width = min(self.downscale_width, width)
+            small_height = max(1, int(round(height * small_width / width)))
+            shapes['small'] = [small_height, small_width, 3]
+        return shapes
+
+    def _get_chunk(self, level, chunk_index):
+        """
+        获取可写入的块（不存在时创建）
+
+        Args:
+            level (str): 存储级别
+            chunk_index (int): 块序号
+
+        Returns:
+            numpy.memmap: 块数组，形状为 (chunk_frames, height, width, 3)
+        """
+        current = self.chunks.get(level)
+        if current is not None and current[0] == chunk_index:
+            return current[1]
+        if current is not None:
+            current[1].flush()
+
+        path = _chunk_path(self.store_dir, level, chunk_index)
+        if os.path.exists(path):
+            chunk = np.load(path, mmap_mode='r+')
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shape = (self.chunk_frames,) + tuple(self.meta['levels'][level])
+            chunk = np.lib.format.open_memmap(path, 'w+', np.uint8, shape)
+        self.chunks[level] = (chunk_index, chunk)
+        return chunk
+
+    def append(self, frame, frame_index=None, timestamp=None, color='rgb', source=None):
+        """
+        追加一帧
+
+        Args:
+            frame (numpy.ndarray): 帧图像（H×W×3，uint8）
+            frame_index (int): 帧在视频中的序号
+            timestamp (float): 时间点（秒）
+            color (str): 帧的通道顺序，'rgb'或'bgr'（存储中统一为RGB）
+            source (str): 来源视频路径，多个视频写入同一存储时用于区分
+
+        Returns:
+            int: 该帧在存储中的序号
+
+        Raises:
+            ValueError: 帧尺寸与存储中已有的帧不一致
+        """
+        if not self.meta['levels']:
+            self.meta['levels'] = self._level_shapes(frame.shape)
+        shapes = self._level_shapes(frame.shape)
+        if shapes != self.meta['levels']:
+            raise ValueError(f"帧尺寸{frame.shape[1]}×{frame.shape[0]}与存储中已有的帧不一致")
+
+        chunk_index, offset = divmod(self.count, self.chunk_frames)
+        full_slot = None
+        if 'full' in shapes:
+            full_slot = self._get_chunk('full', chunk_index)[offset]
+            if color == 'bgr':
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=full_slot)
+            else:
+                full_slot[...] = frame
+        if 'small' in shapes:
+            small_slot = self._get_chunk('small', chunk_index)[offset]
+            small_height, small_width = shapes['small'][:2]
+            source_frame = full_slot if full_slot is not None else frame
+            cv2.resize(source_frame, (small_width, small_height), dst=small_slot, interpolation=cv2.INTER_AREA)
+            if full_slot is None and color == 'bgr':
+                cv2.cvtColor(small_slot, cv2.COLOR_BGR2RGB, dst=small_slot)
+
+        record = {'frame_index': frame_index, 'timestamp': timestamp}
+        if source is not None:
+            record['source'] = source
+        self.index_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        self.count += 1
+        # 写满一块时刷新，读取方可以看到完整的块
+        if self.count % self.chunk_frames == 0:
+            self.flush()
+        return self.count - 1
+
+    def flush(self):
+        """将已写入的帧和索引落盘，并更新元数据中的帧数（读取方以此为准）"""
+        for _, chunk in self.chunks.values():
+            chunk.flush()
+        self.index_file.flush()
+        self.meta['count'] = self.count
+        self._write_meta()
+
+    def close(self):
+        """刷新并关闭存储"""
+        if self.index_file is None:
+            return
+        self.flush()
+        self.chunks = {}
+        self.index_file.close()
+        self.index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class FrameStore:
+    """帧数组存储读取类，帧以只读内存映射方式访问，不复制数据"""
+
+    def __init__(self, store_dir):
+        """
+        打开存储（只读取写入方最近一次刷新时的帧）
+
+        Args:
+            store_dir (str): 存储目录
+
+        Raises:
+            ValueError: 存储不存在或格式版本不符
+        """
+        try:
+            with open(os.path.join(store_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"无法读取帧存储：{e}")
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"存储格式版本不符：{self.meta.get('version')}")
+
+        self.store_dir = store_dir
+        self.count = self.meta['count']
+        self.chunk_frames = self.meta['chunk_frames']
+        self.levels = tuple(self.meta['levels'])
+        self._chunks = {}
+
+        records = []
+        with open(os.path.join(store_dir, 'index.jsonl'), 'r', encoding='utf-8') as f:
+            for line in f:
+                if len(records) >= self.count:
+                    break
+                records.append(json.loads(line))
+        self.records = records
+        self.frame_indices = np.array([r['frame_index'] if r['frame_index'] is not None else -1 for r in records],
+                                      dtype=np.int64)
+        self.timestamps = np.array([r['timestamp'] if r['timestamp'] is not None else np.nan for r in records],
+                                   dtype=np.float64)
+
+    def __len__(self):
+        return self.count
+
+    def shape(self, level='full'):
+        """
+        单帧形状
+
+        Args:
+            level (str): 存储级别，'full'或'small'
+
+        Returns:
+            tuple: (height, width, 3)
+        """
+        return tuple(self.meta['levels'][level])
+
+    def _chunk(self, level, chunk_index):
+        """以只读内存映射方式打开块（打开后缓存）"""
+        key = (level, chunk_index)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = np.load(_chunk_path(self.store_dir, level, chunk_index), mmap_mode='r')
+            self._chunks[key] = chunk
+        return chunk
+
+    def get(self, index, level='full'):
+        """
+        获取一帧（内存映射视图，不复制数据）
+
+        Args:
+            index (int): 帧在存储中的序号
+            level (str): 存储级别，'full'或'small'
+
+        Returns:
+            numpy.ndarray: RGB帧，形状为 (height, width, 3)
+
+        Raises:
+            IndexError: 序号超出范围
+            ValueError: 存储中没有该级别
+        """
+        if level not in self.levels:
+            raise ValueError(f"存储中没有{level}级别的帧")
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"帧序号超出范围：{index}")
+        chunk_index, offset = divmod(index, self.chunk_frames)
+        return self._chunk(level, chunk_index)[offset]
+
+    def __getitem__(self, index):
+        return self.get(index)
+
+    def iter_chunks(self, level='full'):
+        """
+        按块遍历全部帧（每块为一个连续的内存映射视图，适合批量送入模型）
+
+        Args:
+            level (str): 存储级别，'full'或'small'
+
+        Yields:
+            tuple: (第一帧的序号, 帧数组，形状为 (n, height, width, 3))
+        """
+        for start in range(0, self.count, self.chunk_frames):
+            chunk = self._chunk(level, start // self.chunk_frames)
+            yield start, chunk[:min(self.chunk_frames, self.count - start)]
@@ -6,18 +6,53 @@
 负责将提取的关键帧合成为宫格图
 """
 
+import io
 import os
+from contextlib import nullcontext
 from PIL import Image, ImageDraw, ImageFont
 import math
+import cv2
+import numpy as np
+from src.image_encoder import SUPPORTED_FORMATS, get_encoder, normalize_format
+from src.atomic_file import atomic_output
 
 
 class GridSynthesizer:
     """宫格合成器类"""
     
+    # 字体缓存，键为 (字体路径, 字号)，进程内所有合成器共享
+    _font_cache = {}
+    
     def __init__(self):
         """初始化"""
         pass
     
+    @classmethod
+    def get_font(cls, font_path=None, font_size=24):
+        """
+        获取字体（按路径和字号缓存，只加载一次）
+        
+        Args:
+            font_path (str): 字体路径，None则使用默认字体
+            font_size (int): 字体大小
+            
+        Returns:
+            ImageFont: 字体对象
+        """
+        key = (font_path, font_size)
+        font = cls._font_cache.get(key)
+        if font is None:
+            if font_path:
+                font = ImageFont.truetype(font_path, font_size)
+            else:
+                try:
+                    # Pillow 10.1及以上版本的默认字体支持指定字号
+                    font = ImageFont.load_default(font_size)
+                except TypeError:
+                    font = ImageFont.load_default()
+            cls._font_cache[key] = font
+        return font
+    
     def calculate_grid_layout(self, num_images):
         """
         计算最优宫格布局
@@ -42,20 +77,57 @@ class GridSynthesizer:
         
         return (rows, cols)
     
+    def cell_origin(self, index, cols, cell_width, cell_height, spacing=5, border=1, top=0):
+        """
+        计算格子左上角在画布上的位置
+        
+        Args:
+            index (int): 格子序号（按行优先）
+            cols (int): 列数
+            cell_width (int): 格子宽度
+            cell_height (int): 格子高度
+            spacing (int): 图片间距
+            border (int): 边框宽度
+            top (int): 顶部预留高度（如标题区域）
+            
+        Returns:
+            tuple: (x, y)
+        """
+        row, col = divmod(index, cols)
+        return (border + col * (cell_width + spacing), border + row * (cell_height + spacing) + top)
+    
     def synthesize_grid(self, image_paths, output_path, layout=None, spacing=5, border=1, border_color=(200, 200, 200), 
-                       output_size=None, fit_mode='center_crop'):
+                       output_size=None, fit_mode='center_crop', title=None, captions=None, font_path=None,
+                       title_font_size=24, caption_font_size=14, font_color=(0, 0, 0), alignment='center', margin=20,
+                       quality=None, encoder=None, progressive=False, optimize=False, resize_quality='best', sink=None):
         """
         合成宫格图
         
+        标题和每格说明文字（如时间戳）在合成时直接绘制到画布上，只需编码一次。
+        
         Args:
-            image_paths (list): 图片路径列表
-            output_path (str): 输出路径
+            image_paths (list): 图片路径列表，也可以是已在内存中的PIL Image对象
+            output_path (str): 输出路径（写入归档时为归档内的路径）
             layout (tuple): 自定义布局 (rows, cols)，None则自动计算
             spacing (int): 图片间距（像素）
             border (int): 边框宽度（像素）
             border_color (tuple): 边框颜色 (R, G, B)
             output_size (tuple): 输出尺寸 (width, height)，None则根据原始图片计算
             fit_mode (str): 图片适配模式，'center_crop'或'keep_aspect'
+            title (str): 标题文本，None则不添加标题
+            captions (list): 每格说明文字列表（如时间戳），与图片一一对应，None则不添加
+            font_path (str): 字体路径，None则使用默认字体
+            title_font_size (int): 标题字体大小
+            caption_font_size (int): 说明文字字体大小
+            font_color (tuple): 标题字体颜色 (R, G, B)
+            alignment (str): 标题对齐方式，'left', 'center', 'right'
+            margin (int): 标题与图片的间距
+            quality (int): 图片质量，0-100，对jpg和webp有效，None则使用75
+            encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端（默认PIL）
+            progressive (bool): 是否输出渐进式JPG
+            optimize (bool): 是否优化JPG霍夫曼表
+            resize_quality (str): 缩放质量档位，'best'（LANCZOS）、'balanced'或'fast'（适合大幅缩小）
+            sink (ArchiveSink): 归档输出，宫格图编码后直接写入归档，None则写入文件
             
         Returns:
             str: 合成的宫格图路径
@@ -72,22 +144,25 @@ class GridSynthesizer:
             rows, cols = layout
         
         # 加载第一张图片获取基础尺寸
-        with Image.open(image_paths[0]) as first_img:
+        with self._open_image(image_paths[0]) as first_img:
             img_width, img_height = first_img.size
         
+        # 标题区域高度
+        title_height = title_font_size + margin if title else 0
+        
         # 计算每个格子的尺寸
         if output_size is None:
             # 如果没有指定输出尺寸，使用原始图片尺寸
             cell_width = img_width
             cell_height = img_height
             output_width = cols * cell_width + (cols - 1) * spacing + 2 * border
-            output_height = rows * cell_height + (rows - 1) * spacing + 2 * border
+            output_height = rows * cell_height + (rows - 1) * spacing + 2 * border + title_height
         else:
             # 根据指定输出尺寸计算每个格子的尺寸
             output_width, output_height = output_size
-            # 减去边框和间距
+            # 减去边框、间距和标题区域
             available_width = output_width - 2 * border - (cols - 1) * spacing
-            available_height = output_height - 2 * border - (rows - 1) * spacing
+            available_height = output_height - 2 * border - (rows - 1) * spacing - title_height
             cell_width = available_width // cols
             cell_height = available_height // rows
         
@@ -95,6 +170,11 @@ class GridSynthesizer:
         grid_image = Image.new('RGB', (output_width, output_height), (255, 255, 255))
         draw = ImageDraw.Draw(grid_image)
         
+        # 预先计算文字排版
+        if title:
+            self._draw_title(draw, title, output_width, font_path, title_font_size, font_color, alignment, margin)
+        caption_layouts = self.layout_captions(captions, cell_width, cell_height, font_path, caption_font_size)
+        
         # 遍历所有图片位置
         for i in range(rows):
             for j in range(cols):
@@ -103,18 +183,17 @@ class GridSynthesizer:
                     break
                 
                 # 计算当前图片在画布上的位置
-                x = border + j * (cell_width + spacing)
-                y = border + i * (cell_height + spacing)
+                x, y = self.cell_origin(index, cols, cell_width, cell_height, spacing, border, title_height)
                 
                 # 加载并处理图片
-                with Image.open(image_paths[index]) as img:
+                with self._open_image(image_paths[index]) as img:
                     # 调整图片尺寸以适应格子
                     if fit_mode == 'center_crop':
                         # 中心裁剪
-                        img = self.center_crop(img, cell_width, cell_height)
+                        img = self.center_crop(img, cell_width, cell_height, resize_quality)
                     else:
                         # 保持纵横比，可能有黑边
-                        img = self.keep_aspect_ratio(img, cell_width, cell_height)
+                        img = self.keep_aspect_ratio(img, cell_width, cell_height, resize_quality)
                     
                     # 绘制边框
                     if border > 0:
@@ -123,14 +202,188 @@ class GridSynthesizer:
                     
                     # 粘贴图片到画布
                     grid_image.paste(img, (x, y))
+                
+                # 绘制说明文字
+                if index < len(caption_layouts) and caption_layouts[index]:
+                    self.draw_caption(draw, caption_layouts[index], x, y)
         
         # 保存合成图片
+        if sink is not None:
+            return self.save_image(grid_image, output_path, quality, encoder, progressive, optimize, sink)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        grid_image.save(output_path)
+        self.save_image(grid_image, output_path, quality, encoder, progressive, optimize)
         
         return output_path
     
-    def center_crop(self, img, target_width, target_height):
+    @staticmethod
+    def _open_image(source):
+        """
+        打开图片：路径用Image.open打开（用完关闭），内存中的图片直接使用（不关闭）
+        
+        Args:
+            source (str|Image): 图片路径或PIL Image对象
+            
+        Returns:
+            上下文管理器，进入时得到PIL Image对象
+        """
+        if isinstance(source, Image.Image):
+            return nullcontext(source)
+        return Image.open(source)
+    
+    def save_image(self, img, output_path, quality=None, encoder=None, progressive=False, optimize=False, sink=None):
+        """
+        按输出路径的扩展名编码并保存图片
+        
+        Args:
+            img (Image): PIL Image对象
+            output_path (str): 输出路径（写入归档时为归档内的路径）
+            quality (int): 图片质量，None则使用75
+            encoder (ImageEncoder): 图片编码器，None则使用配置中固定的后端
+            progressive (bool): 是否输出渐进式JPG
+            optimize (bool): 是否优化JPG霍夫曼表
+            sink (ArchiveSink): 归档输出，编码后直接写入归档，None则写入文件
+            
+        Returns:
+            str: 写入归档时返回归档内的路径，写入文件时返回None
+        """
+        output_format = normalize_format(os.path.splitext(output_path)[1] or 'jpg')
+        
+        if sink is not None:
+            if output_format not in SUPPORTED_FORMATS:
+                buffer = io.BytesIO()
+                img.save(buffer, Image.registered_extensions().get(os.path.splitext(output_path)[1].lower()))
+                return sink.write(output_path, buffer.getvalue())
+            quality = 75 if quality is None else quality
+            if encoder is None:
+                encoder = get_encoder(None, output_format, quality, img.size)
+            data = encoder.encode(np.asarray(img.convert('RGB')), output_format, quality, 'rgb', progressive, optimize)
+            return sink.write(output_path, data)
+        
+        # 先写临时文件再替换，中断时不会留下不完整的图片
+        with atomic_output(output_path) as temp_path:
+            if output_format not in SUPPORTED_FORMATS:
+                # 其他格式交给PIL按扩展名处理
+                img.save(temp_path)
+                return
+            
+            quality = 75 if quality is None else quality
+            if encoder is None:
+                encoder = get_encoder(None, output_format, quality, img.size)
+            encoder.save_image(img, temp_path, output_format, quality, progressive, optimize)
+    
+    def _draw_title(self, draw, title, image_width, font_path, font_size, font_color, alignment, margin):
+        """
+        在画布顶部绘制标题
+        
+        Args:
+            draw (ImageDraw): 画布的绘图对象
+            title (str): 标题文本
+            image_width (int): 画布宽度
+            font_path (str): 字体路径
+            font_size (int): 字体大小
+            font_color (tuple): 字体颜色 (R, G, B)
+            alignment (str): 对齐方式，'left', 'center', 'right'
+            margin (int): 标题与图片的间距
+        """
+        font = self.get_font(font_path, font_size)
+        
+        # 计算标题位置
+        text_bbox = draw.textbbox((0, 0), title, font=font)
+        text_width = text_bbox[2] - text_bbox[0]
+        text_height = text_bbox[3] - text_bbox[1]
+        
+        if alignment == 'left':
+            text_x = margin
+        elif alignment == 'center':
+            text_x = (image_width - text_width) // 2
+        else:  # right
+            text_x = image_width - text_width - margin
+        
+        text_y = (font_size - text_height) // 2
+        
+        draw.text((text_x, text_y), title, font=font, fill=font_color)
+    
+    def layout_captions(self, captions, cell_width, cell_height, font_path, font_size):
+        """
+        预先计算每格说明文字的排版（相对格子左上角的位置）
+        
+        Args:
+            captions (list): 说明文字列表
+            cell_width (int): 格子宽度
+            cell_height (int): 格子高度
+            font_path (str): 字体路径
+            font_size (int): 字体大小
+            
+        Returns:
+            list: 每格的排版信息 (文本, 字体, 文字位置, 背景框)，无文字的格子为None
+        """
+        if not captions:
+            return []
+        
+        font = self.get_font(font_path, font_size)
+        padding = max(2, font_size // 4)
+        layouts = []
+        
+        for caption in captions:
+            if not caption:
+                layouts.append(None)
+                continue
+            
+            # 文字放在格子左下角，带深色背景框
+            left, top, right, bottom = font.getbbox(caption)
+            box_width = min(right - left + 2 * padding, cell_width)
+            box_height = min(bottom - top + 2 * padding, cell_height)
+            box = (0, cell_height - box_height, box_width, cell_height)
+            text_pos = (padding - left, cell_height - box_height + padding - top)
+            layouts.append((caption, font, text_pos, box))
+        
+        return layouts
+    
+    def draw_caption(self, draw, caption_layout, x, y):
+        """
+        在格子中绘制说明文字
+        
+        Args:
+            draw (ImageDraw): 画布的绘图对象
+            caption_layout (tuple): layout_captions计算的排版信息
+            x (int): 格子左上角横坐标
+            y (int): 格子左上角纵坐标
+        """
+        caption, font, (text_x, text_y), (left, top, right, bottom) = caption_layout
+        draw.rectangle([x + left, y + top, x + right - 1, y + bottom - 1], fill=(0, 0, 0))
+        draw.text((x + text_x, y + text_y), caption, font=font, fill=(255, 255, 255))
+    
+    def resize_image(self, img, size, resize_quality='best'):
+        """
+        按指定质量档位缩放图片
+        
+        - best：全分辨率解码后LANCZOS缩放
+        - balanced：JPEG先按比例缩小解码（draft），再用reduce()整数倍缩小后LANCZOS缩放
+        - fast：JPEG先按比例缩小解码，较大倍数缩小时使用OpenCV区域插值（INTER_AREA）
+        
+        Args:
+            img (Image): PIL Image对象（JPEG图片需尚未加载像素，draft才能生效）
+            size (tuple): 目标尺寸 (width, height)
+            resize_quality (str): 质量档位，'best'、'balanced'或'fast'
+            
+        Returns:
+            Image: 缩放后的Image对象
+        """
+        if resize_quality == 'best':
+            return img.resize(size, Image.LANCZOS)
+        
+        # JPEG在解码阶段按1/2、1/4、1/8缩小，得到不小于目标尺寸的图片
+        img.draft('RGB', size)
+        
+        if resize_quality == 'balanced':
+            return img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        
+        if img.width >= size[0] * 2 and img.height >= size[1] * 2:
+            array = np.asarray(img.convert('RGB'))
+            return Image.fromarray(cv2.resize(array, size, interpolation=cv2.INTER_AREA))
+        return img.resize(size, Image.BILINEAR)
+    
+    def center_crop(self, img, target_width, target_height, resize_quality='best'):
         """
         中心裁剪图片
         
@@ -138,6 +391,7 @@ class GridSynthesizer:
             img (Image): PIL Image对象
             target_width (int): 目标宽度
             target_height (int): 目标高度
+            resize_quality (str): 缩放质量档位，'best'、'balanced'或'fast'
             
         Returns:
             Image: 裁剪后的Image对象
@@ -150,7 +404,7 @@ class GridSynthesizer:
         # 缩放图片
         scaled_width = int(img_width * scale)
         scaled_height = int(img_height * scale)
-        img = img.resize((scaled_width, scaled_height), Image.LANCZOS)
+        img = self.resize_image(img, (scaled_width, scaled_height), resize_quality)
         
         # 计算裁剪区域
         left = (scaled_width - target_width) // 2
@@ -161,7 +415,7 @@ class GridSynthesizer:
         # 裁剪
         return img.crop((left, top, right, bottom))
     
-    def keep_aspect_ratio(self, img, target_width, target_height):
+    def keep_aspect_ratio(self, img, target_width, target_height, resize_quality='best'):
         """
         保持纵横比缩放图片
         
@@ -169,6 +423,7 @@ class GridSynthesizer:
             img (Image): PIL Image对象
             target_width (int): 目标宽度
             target_height (int): 目标高度
+            resize_quality (str): 缩放质量档位，'best'、'balanced'或'fast'
             
         Returns:
             Image: 缩放后的Image对象
@@ -181,7 +436,7 @@ class GridSynthesizer:
         # 缩放图片
         scaled_width = int(img_width * scale)
         scaled_height = int(img_height * scale)
-        img = img.resize((scaled_width, scaled_height), Image.LANCZOS)
+        img = self.resize_image(img, (scaled_width, scaled_height), resize_quality)
         
         # 创建空白图片并居中粘贴
         result = Image.new('RGB', (target_width, target_height), (0, 0, 0))
@@ -196,6 +451,8 @@ class GridSynthesizer:
         """
         为宫格图添加标题
         
+        会重新解码并编码整张图片；新合成的宫格图应直接使用synthesize_grid的title参数。
+        
         Args:
             image_path (str): 原始图片路径
             title (str): 标题文本
@@ -220,29 +477,7 @@ class GridSynthesizer:
             
             # 绘制标题
             draw = ImageDraw.Draw(result)
-            
-            # 加载字体
-            if font_path:
-                font = ImageFont.truetype(font_path, font_size)
-            else:
-                font = ImageFont.load_default()
-            
-            # 计算标题位置
-            text_bbox = draw.textbbox((0, 0), title, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            
-            if alignment == 'left':
-                text_x = margin
-            elif alignment == 'center':
-                text_x = (img_width - text_width) // 2
-            else:  # right
-                text_x = img_width - text_width - margin
-            
-            text_y = (font_size - text_height) // 2
-            
-            # 绘制文字
-            draw.text((text_x, text_y), title, font=font, fill=font_color)
+            self._draw_title(draw, title, img_width, font_path, font_size, font_color, alignment, margin)
             
             # 保存结果
             result.save(output_path)
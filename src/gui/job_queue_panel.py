@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量任务队列面板
+可拖入多个视频排队处理，任务在共享的有界线程池中并发执行关键帧提取和宫格合成，
+支持逐任务进度、调整优先级和取消；帧和宫格图直接写入磁盘，信号只传递任务编号、进度和路径
+"""
+
+import os
+import threading
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSpinBox,
+                            QTableWidget, QTableWidgetItem, QProgressBar, QHeaderView, QAbstractItemView,
+                            QFileDialog)
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from src.frame_extractor import FrameExtractor
+from src.grid_synthesizer import GridSynthesizer
+
+
+# 任务状态
+STATUS_LABELS = {
+    'pending': '等待中',
+    'running': '处理中',
+    'done': '已完成',
+    'failed': '失败',
+    'cancelled': '已取消'
+}
+
+
+class JobSignals(QObject):
+    """
+    任务信号（所有任务共用，按任务编号区分）
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+
+class ExtractionJob(QRunnable):
+    """
+    单个视频的提取与合成任务
+    """
+
+    def __init__(self, job_id, video_path, params, signals):
+        """
+        初始化
+
+        Args:
+            job_id (int): 任务编号
+            video_path (str): 视频文件路径
+            params (dict): 处理参数：num_frames、output_format、quality、output_dir、layout、spacing、border
+            signals (JobSignals): 任务信号
+        """
+        super().__init__()
+        self.job_id = job_id
+        self.video_path = video_path
+        self.params = params
+        self.signals = signals
+        self.cancel_event = threading.Event()
+        # 由面板管理任务对象的生命周期
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        """请求取消（在下一帧开始前生效）"""
+        self.cancel_event.set()
+
+    def run(self):
+        """
+        逐帧提取并保存关键帧，再合成宫格图；每保存一帧报告一次进度
+        """
+        try:
+            grid_path = self._process()
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+            return
+        if grid_path is None:
+            self.signals.cancelled.emit(self.job_id)
+        else:
+            self.signals.finished.emit(self.job_id, grid_path)
+
+    def _process(self):
+        """
+        执行任务
+
+        Returns:
+            str: 宫格图路径，任务被取消返回None
+        """
+        params = self.params
+        output_format = params['output_format']
+        video_name = os.path.splitext(os.path.basename(self.video_path))[0]
+        # 不同目录下的同名视频各自输出，目录名带任务编号
+        output_dir = os.path.join(params['output_dir'], f"{self.job_id}_{video_name}")
+
+        extractor = FrameExtractor(self.video_path)
+        try:
+            if not extractor.initialize():
+                raise ValueError("无法加载视频文件")
+            positions = extractor.compute_uniform_positions(params['num_frames'])
+            # 宫格合成计为最后一步
+            steps = len(positions) + 1
+
+            def on_frame(done, total):
+                self.signals.progress.emit(self.job_id, done * 100 // steps)
+                return not self.cancel_event.is_set()
+
+            # 整个任务只调用一次，缓冲池和编码器只创建一次；每处理一帧报告进度并检查取消
+            saved_paths = extractor.extract_positions_to_dir(
+                output_dir, positions, output_format, params['quality'], callback=on_frame
+            )
+        finally:
+            extractor.release()
+        if self.cancel_event.is_set():
+            return None
+
+        if not saved_paths:
+            raise RuntimeError("没有提取到任何关键帧")
+
+        grid_path = os.path.join(output_dir, f"{video_name}_宫格图.{output_format}")
+        grid_path = GridSynthesizer().synthesize_grid(
+            saved_paths, grid_path, layout=params.get('layout'), spacing=params.get('spacing', 5),
+            border=params.get('border', 1), quality=params['quality']
+        )
+        if not grid_path:
+            raise RuntimeError("宫格图合成失败")
+        self.signals.progress.emit(self.job_id, 100)
+        return grid_path
+
+
+class JobQueuePanel(QWidget):
+    """
+    批量任务队列面板
+
+    等待中的任务由面板按列表顺序调度，线程池有空位时才提交，因此可以随时调整顺序或取消；
+    处理中的任务在下一帧开始前响应取消。
+    """
+
+    # 宫格图完成时发出（宫格图路径），供主窗口预览
+    grid_ready = pyqtSignal(str)
+
+    COLUMNS = ['视频', '状态', '进度', '输出']
+
+    def __init__(self, params_provider, parent=None):
+        """
+        初始化
+
+        Args:
+            params_provider (callable): 返回当前处理参数字典的函数（提交任务时调用）
+            parent (QWidget): 父控件
+        """
+        super().__init__(parent)
+        self.params_provider = params_provider
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(os.cpu_count() or 1)
+        self.signals = JobSignals()
+        self.signals.progress.connect(self.on_progress)
+        self.signals.finished.connect(self.on_finished)
+        self.signals.failed.connect(self.on_failed)
+        self.signals.cancelled.connect(self.on_cancelled)
+
+        # 任务编号 -> 任务；rows为表格中的任务编号顺序，等待中的任务按此顺序调度
+        self.jobs = {}
+        self.status = {}
+        self.rows = []
+        self.running = set()
+        self.next_id = 1
+
+        self.setAcceptDrops(True)
+        self.init_ui()
+
+    def init_ui(self):
+        """
+        初始化界面
+        """
+        layout = QVBoxLayout(self)
+
+        # 操作按钮
+        button_layout = QHBoxLayout()
+        self.btn_add = QPushButton("添加视频")
+        self.btn_add.clicked.connect(self.browse_videos)
+        button_layout.addWidget(self.btn_add)
+
+        self.btn_up = QPushButton("上移")
+        self.btn_up.clicked.connect(lambda: self.move_selected(-1))
+        button_layout.addWidget(self.btn_up)
+
+        self.btn_down = QPushButton("下移")
+        self.btn_down.clicked.connect(lambda: self.move_selected(1))
+        button_layout.addWidget(self.btn_down)
+
+        self.btn_cancel = QPushButton("取消")
+        self.btn_cancel.clicked.connect(self.cancel_selected)
+        button_layout.addWidget(self.btn_cancel)
+
+        self.btn_clear = QPushButton("清除已结束")
+        self.btn_clear.clicked.connect(self.clear_finished)
+        button_layout.addWidget(self.btn_clear)
+
+        button_layout.addStretch(1)
+
+        # 并发数，默认为CPU核心数
+        button_layout.addWidget(QLabel("并发数："))
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, max(32, self.pool.maxThreadCount()))
+        self.spin_workers.setValue(self.pool.maxThreadCount())
+        self.spin_workers.valueChanged.connect(self.set_max_workers)
+        button_layout.addWidget(self.spin_workers)
+
+        layout.addLayout(button_layout)
+
+        # 任务列表
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+
+        self.lbl_summary = QLabel("将MP4视频拖到此处，或点击“添加视频”")
+        layout.addWidget(self.lbl_summary)
+
+    def dragEnterEvent(self, event):
+        """拖入文件时接受MP4视频"""
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        """放下文件时加入队列"""
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        self.add_videos([p for p in paths if p.lower().endswith('.mp4')])
+
+    def browse_videos(self):
+        """
+        选择多个视频加入队列
+        """
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "选择MP4视频文件", "", "MP4视频 (*.mp4)")
+        self.add_videos(file_paths)
+
+    def add_videos(self, video_paths):
+        """
+        将视频加入队列（使用当前的处理参数）
+
+        Args:
+            video_paths (list): 视频文件路径列表
+        """
+        if not video_paths:
+            return
+        params = dict(self.params_provider())
+        for video_path in video_paths:
+            job_id = self.next_id
+            self.next_id += 1
+            self.jobs[job_id] = ExtractionJob(job_id, video_path, params, self.signals)
+            self.status[job_id] = 'pending'
+            self.rows.append(job_id)
+            self._append_row(job_id, video_path)
+        self.dispatch()
+
+    def _append_row(self, job_id, video_path):
+        """在表格末尾添加任务行"""
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        item = QTableWidgetItem(os.path.basename(video_path))
+        item.setToolTip(video_path)
+        self.table.setItem(row, 0, item)
+        self.table.setItem(row, 1, QTableWidgetItem(STATUS_LABELS['pending']))
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        self.table.setCellWidget(row, 2, progress_bar)
+        self.table.setItem(row, 3, QTableWidgetItem(""))
+
+    def _row_of(self, job_id):
+        """任务所在的行号"""
+        return self.rows.index(job_id)
+
+    def _set_status(self, job_id, status, output=None):
+        """更新任务状态和表格显示"""
+        self.status[job_id] = status
+        row = self._row_of(job_id)
+        self.table.item(row, 1).setText(STATUS_LABELS[status])
+        if output is not None:
+            self.table.item(row, 3).setText(output)
+            self.table.item(row, 3).setToolTip(output)
+        self.update_summary()
+
+    def dispatch(self):
+        """
+        按列表顺序提交等待中的任务，直到达到并发数
+        """
+        for job_id in self.rows:
+            if len(self.running) >= self.pool.maxThreadCount():
+                break
+            if self.status[job_id] != 'pending':
+                continue
+            self.running.add(job_id)
+            self._set_status(job_id, 'running')
+            self.pool.start(self.jobs[job_id])
+        self.update_summary()
+
+    def set_max_workers(self, count):
+        """
+        调整并发数（已在处理的任务不受影响）
+
+        Args:
+            count (int): 最多同时处理的任务数
+        """
+        self.pool.setMaxThreadCount(count)
+        self.dispatch()
+
+    def selected_job_ids(self):
+        """选中行对应的任务编号"""
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.rows[row] for row in rows]
+
+    def move_selected(self, offset):
+        """
+        上移或下移选中的任务（调整等待中任务的处理顺序）
+
+        Args:
+            offset (int): -1上移，1下移
+        """
+        selected = self.selected_job_ids()
+        if len(selected) != 1:
+            return
+        row = self._row_of(selected[0])
+        target = row + offset
+        if not 0 <= target < len(self.rows):
+            return
+
+        self.rows[row], self.rows[target] = self.rows[target], self.rows[row]
+        # 交换两行的内容（进度条控件无法移动，只交换数值）
+        for column in (0, 1, 3):
+            upper = self.table.takeItem(row, column)
+            lower = self.table.takeItem(target, column)
+            self.table.setItem(row, column, lower)
+            self.table.setItem(target, column, upper)
+        bar_a = self.table.cellWidget(row, 2)
+        bar_b = self.table.cellWidget(target, 2)
+        value_a, value_b = bar_a.value(), bar_b.value()
+        bar_a.setValue(value_b)
+        bar_b.setValue(value_a)
+        self.table.selectRow(target)
+
+    def cancel_selected(self):
+        """
+        取消选中的任务：等待中的任务直接取消，处理中的任务在下一帧开始前停止
+        """
+        for job_id in self.selected_job_ids():
+            status = self.status[job_id]
+            if status == 'pending':
+                self._set_status(job_id, 'cancelled')
+            elif status == 'running':
+                self.jobs[job_id].cancel()
+                self.table.item(self._row_of(job_id), 1).setText("正在取消")
+
+    def cancel_all(self):
+        """
+        取消全部任务（关闭窗口时调用），并等待处理中的任务停止
+        """
+        for job_id, status in self.status.items():
+            if status == 'pending':
+                self.status[job_id] = 'cancelled'
+            elif status == 'running':
+                self.jobs[job_id].cancel()
+        self.pool.waitForDone()
+
+    def clear_finished(self):
+        """
+        从列表中移除已完成、失败和已取消的任务
+        """
+        for job_id in list(self.rows):
+            if self.status[job_id] in ('done', 'failed', 'cancelled'):
+                self.table.removeRow(self._row_of(job_id))
+                self.rows.remove(job_id)
+                del self.jobs[job_id]
+                del self.status[job_id]
+        self.update_summary()
+
+    def on_progress(self, job_id, percent):
+        """任务进度更新"""
+        if job_id in self.jobs:
+            self.table.cellWidget(self._row_of(job_id), 2).setValue(percent)
+
+    def on_finished(self, job_id, grid_path):
+        """任务完成"""
+        self.running.discard(job_id)
+        self._set_status(job_id, 'done', grid_path)
+        self.grid_ready.emit(grid_path)
+        self.dispatch()
+
+    def on_failed(self, job_id, error_msg):
+        """任务失败"""
+        self.running.discard(job_id)
+        self._set_status(job_id, 'failed', error_msg)
+        self.dispatch()
+
+    def on_cancelled(self, job_id):
+        """处理中的任务已停止"""
+        self.running.discard(job_id)
+        self._set_status(job_id, 'cancelled')
+        self.dispatch()
+
+    def update_summary(self):
+        """
+        更新队列统计
+        """
+        counts = {status: 0 for status in STATUS_LABELS}
+        for status in self.status.values():
+            counts[status] += 1
+        self.lbl_summary.setText(
+            f"等待 {counts['pending']}，处理中 {counts['running']}/{self.pool.maxThreadCount()}，"
+            f"完成 {counts['done']}，失败 {counts['failed']}，取消 {counts['cancelled']}"
+        )
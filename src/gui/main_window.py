@@ -11,12 +11,14 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QLabel, QFileDialog, QSpinBox, 
                             QComboBox, QGroupBox, QGridLayout, QProgressBar, 
                             QTextEdit, QFrame, QSplitter, QScrollArea, 
-                            QMessageBox)
+                            QMessageBox, QTabWidget)
 from PyQt5.QtGui import QPixmap, QImage
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import numpy as np
 from src.frame_extractor import FrameExtractor
 from src.grid_synthesizer import GridSynthesizer
+from src.frame_cache import FrameCache
+from src.gui.job_queue_panel import JobQueuePanel
 
 
 class ExtractionThread(QThread):
@@ -27,13 +29,14 @@ class ExtractionThread(QThread):
     extraction_done = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, video_path, num_frames, output_format, quality, output_dir):
+    def __init__(self, video_path, num_frames, output_format, quality, output_dir, frame_cache=None):
         super().__init__()
         self.video_path = video_path
         self.num_frames = num_frames
         self.output_format = output_format
         self.quality = quality
         self.output_dir = output_dir
+        self.frame_cache = frame_cache
     
     def run(self):
         """
@@ -45,19 +48,13 @@ class ExtractionThread(QThread):
                 self.error_occurred.emit("无法加载视频文件")
                 return
             
-            # 提取关键帧
-            frames = extractor.extract_uniform_frames(
+            # 提取并保存关键帧（相同视频和参数的帧直接从缓存取出）
+            saved_paths = extractor.extract_to_dir(
+                self.output_dir,
                 num_frames=self.num_frames,
                 output_format=self.output_format,
-                quality=self.quality
-            )
-            
-            # 保存帧
-            saved_paths = extractor.save_frames(
-                frames, 
-                self.output_dir, 
-                output_format=self.output_format,
-                quality=self.quality
+                quality=self.quality,
+                frame_cache=self.frame_cache
             )
             
             extractor.release()
@@ -114,6 +111,7 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.init_ui()
         self.extracted_frame_paths = []
+        self.frame_cache = FrameCache()
     
     def init_ui(self):
         """
@@ -169,7 +167,7 @@ class MainWindow(QMainWindow):
         # 图片格式
         extraction_layout.addWidget(QLabel("图片格式："), 0, 2)
         self.combo_format = QComboBox()
-        self.combo_format.addItems(["jpg", "png"])
+        self.combo_format.addItems(["jpg", "png", "webp"])
         extraction_layout.addWidget(self.combo_format, 0, 3)
         
         # 图片质量
@@ -260,7 +258,16 @@ class MainWindow(QMainWindow):
         scroll_area.setWidgetResizable(True)
         right_layout.addWidget(scroll_area, 1)
         
-        splitter.addWidget(right_panel)
+        # 右侧分为预览和批量队列两个标签页
+        right_tabs = QTabWidget()
+        right_tabs.addTab(right_panel, "预览")
+        
+        # 批量队列：多个视频在共享线程池中并发处理，使用左侧的提取和合成设置
+        self.job_queue_panel = JobQueuePanel(self.current_job_params)
+        self.job_queue_panel.grid_ready.connect(lambda path: self.log(f"批量任务完成：{path}"))
+        right_tabs.addTab(self.job_queue_panel, "批量队列")
+        
+        splitter.addWidget(right_tabs)
         splitter.setStretchFactor(1, 3)  # 右侧预览区占3份
         
         main_layout.addWidget(splitter, 1)
@@ -269,6 +276,29 @@ class MainWindow(QMainWindow):
         self.save_path = os.path.join(os.path.expanduser("~"), "视频关键帧")
         self.lbl_save_path.setText(self.save_path)
     
+    def current_job_params(self):
+        """
+        获取当前的提取和合成参数（批量队列添加任务时使用）
+        """
+        layout_str = self.combo_layout.currentText()
+        layout = None if layout_str == "自动计算" else tuple(map(int, layout_str.split("×")))
+        return {
+            'num_frames': self.spin_num_frames.value(),
+            'output_format': self.combo_format.currentText(),
+            'quality': self.spin_quality.value(),
+            'output_dir': self.save_path,
+            'layout': layout,
+            'spacing': self.spin_spacing.value(),
+            'border': self.spin_border.value()
+        }
+    
+    def closeEvent(self, event):
+        """
+        关闭窗口时取消批量队列中的任务
+        """
+        self.job_queue_panel.cancel_all()
+        super().closeEvent(event)
+    
     def import_video(self):
         """
         导入视频文件
@@ -326,7 +356,8 @@ class MainWindow(QMainWindow):
             num_frames,
             output_format,
             quality,
-            self.save_path
+            self.save_path,
+            self.frame_cache
         )
         
         # 连接信号槽
@@ -347,6 +378,8 @@ class MainWindow(QMainWindow):
         """
         self.extracted_frame_paths = saved_paths
         self.log_output.append(f"关键帧提取完成，共提取 {len(saved_paths)} 张图片")
+        stats = self.frame_cache.stats
+        self.log_output.append(f"帧缓存：命中 {stats['hits']} 次，未命中 {stats['misses']} 次")
         
         # 显示预览
         self.show_frame_preview(saved_paths)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+监视文件夹模块
+轮询监视目录，视频文件大小和修改时间在一段时间内不再变化后才加入处理队列，
+由有界进程池执行关键帧提取和宫格合成，小文件优先处理，并统计队列深度和吞吐量
+"""
+
+import os
+import time
+import heapq
+import shutil
+import threading
+import multiprocessing
+from collections import deque
+from src.work_queue import run_pipeline
+
+
+# 监视的视频扩展名，与VideoProcessor.load_video支持的格式一致（只处理MP4），其他格式留在原处不处理
+VIDEO_EXTENSIONS = ('.mp4',)
+
+# 写入中的临时文件后缀（下载工具、拷贝工具常用），这类文件不会被处理
+PARTIAL_SUFFIXES = ('.part', '.tmp', '.crdownload', '.download', '.partial', '.filepart')
+
+
+def _init_worker():
+    """工作进程初始化：每个进程只占用一个OpenCV线程，由进程池负责并行"""
+    import cv2
+    cv2.setNumThreads(1)
+
+
+def is_candidate(filename):
+    """
+    判断文件名是否为待处理的视频（忽略隐藏文件和写入中的临时文件）
+
+    Args:
+        filename (str): 文件名
+
+    Returns:
+        bool: 是否需要监视
+    """
+    name = filename.lower()
+    if name.startswith('.') or name.endswith(PARTIAL_SUFFIXES):
+        return False
+    return name.endswith(VIDEO_EXTENSIONS)
+
+
+class HotFolderWatcher:
+    """监视文件夹处理类"""
+
+    def __init__(self, watch_dir, output_dir, workers=None, settle_seconds=5.0, pipeline_options=None,
+                 done_dir=None, failed_dir=None):
+        """
+        初始化
+
+        Args:
+            watch_dir (str): 监视目录
+            output_dir (str): 输出根目录，每个视频保存在以文件名命名的子目录中
+            workers (int): 同时处理的视频数，None则使用CPU核心数
+            settle_seconds (float): 文件大小和修改时间保持不变多久后视为写入完成（秒）
+            pipeline_options (dict): 处理参数，如num_frames、output_format、quality、make_grid、show_timestamps
+            done_dir (str): 处理成功后将视频移入的目录，None则保留在原处
+            failed_dir (str): 处理失败后将视频移入的目录，None则保留在原处
+        """
+        self.watch_dir = watch_dir
+        self.output_dir = output_dir
+        self.workers = workers or multiprocessing.cpu_count()
+        self.settle_seconds = settle_seconds
+        self.pipeline_options = dict(pipeline_options or {})
+        self.done_dir = done_dir
+        self.failed_dir = failed_dir
+
+        # 监视中的文件：路径 -> {'signature': (大小, 修改时间), 'since': 最近一次变化的时间, 'seen': 首次发现的时间}
+        self.tracked = {}
+        # 待处理队列：(文件大小, 序号, 路径, 签名)，文件越小越先处理
+        self.heap = []
+        self.queued = set()
+        # 处理中：路径 -> (签名, 开始时间)
+        self.in_flight = {}
+        # 已处理过的文件：路径 -> 签名，内容未变化的文件不会重复处理
+        self.processed = {}
+        self.sequence = 0
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.completed_times = deque(maxlen=1000)
+        self.latencies = deque(maxlen=1000)
+        self.counters = {'events': 0, 'coalesced': 0, 'requeued': 0, 'processed': 0, 'failed': 0}
+        self.pool = None
+        self.callback = None
+
+    def scan(self):
+        """
+        扫描监视目录，更新文件状态；稳定的文件加入待处理队列
+
+        同一文件在稳定之前的多次变化（写入、拷贝的多次事件）只记录为一个待处理项。
+
+        Returns:
+            int: 本次新加入队列的文件数
+        """
+        now = time.monotonic()
+        present = set()
+        try:
+            entries = list(os.scandir(self.watch_dir))
+        except OSError:
+            return 0
+
+        added = 0
+        for entry in entries:
+            if not is_candidate(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            path = entry.path
+            present.add(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            state = self.tracked.get(path)
+            if state is None:
+                if self.processed.get(path) == signature:
+                    continue
+                self.tracked[path] = {'signature': signature, 'since': now, 'seen': now}
+                self.counters['events'] += 1
+                continue
+
+            if state['signature'] != signature:
+                # 文件仍在写入：重新计时，多次变化合并为一个事件
+                state['signature'] = signature
+                state['since'] = now
+                self.counters['coalesced'] += 1
+                continue
+
+            if stat.st_size > 0 and now - state['since'] >= self.settle_seconds and path not in self.queued:
+                with self.lock:
+                    if path in self.in_flight:
+                        continue
+                heapq.heappush(self.heap, (stat.st_size, self.sequence, path, signature))
+                self.sequence += 1
+                self.queued.add(path)
+                added += 1
+
+        # 已删除或移走的文件不再监视
+        for path in list(self.tracked):
+            if path not in present and path not in self.queued:
+                del self.tracked[path]
+        return added
+
+    def dispatch(self):
+        """
+        在有空闲工作进程时从队列取出最小的文件提交处理
+
+        提交前再次检查文件状态，排队期间又发生变化的文件回到监视状态重新计时。
+
+        Returns:
+            int: 提交的文件数
+        """
+        submitted = 0
+        while self.heap:
+            with self.lock:
+                if len(self.in_flight) >= self.workers:
+                    break
+            size, _, path, signature = heapq.heappop(self.heap)
+            self.queued.discard(path)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.tracked.pop(path, None)
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != signature:
+                state = self.tracked.setdefault(path, {'seen': time.monotonic()})
+                state['signature'] = (stat.st_size, stat.st_mtime_ns)
+                state['since'] = time.monotonic()
+                self.counters['requeued'] += 1
+                continue
+
+            payload = dict(self.pipeline_options, video_path=path, output_dir=self.output_dir)
+            with self.lock:
+                self.in_flight[path] = (signature, time.monotonic())
+            self.pool.apply_async(run_pipeline, (payload,),
+                                  callback=lambda result, p=path: self._finish(p, result, None),
+                                  error_callback=lambda error, p=path: self._finish(p, None, error))
+            submitted += 1
+            self._notify('started', path, None)
+        return submitted
+
+    def _finish(self, path, result, error):
+        """任务结束回调（在进程池的结果线程中执行）"""
+        now = time.monotonic()
+        with self.lock:
+            signature, _ = self.in_flight.pop(path)
+            state = self.tracked.pop(path, None)
+            self.processed[path] = signature
+            self.completed_times.append(now)
+            if state is not None:
+                self.latencies.append(now - state['seen'])
+            self.counters['failed' if error else 'processed'] += 1
+
+        target_dir = self.failed_dir if error else self.done_dir
+        if target_dir:
+            try:
+                os.makedirs(target_dir, exist_ok=True)
+                shutil.move(path, os.path.join(target_dir, os.path.basename(path)))
+            except OSError:
+                pass
+        self._notify('failed' if error else 'done', path, str(error) if error else result)
+
+    def _notify(self, event, path, info):
+        """调用事件回调"""
+        if self.callback:
+            self.callback(event, path, info)
+
+    def stats(self, window=60.0):
+        """
+        获取运行统计
+
+        Args:
+            window (float): 吞吐量统计的时间窗口（秒）
+
+        Returns:
+            dict: 监视中、排队中、处理中的文件数，累计计数，窗口内吞吐量（个/分钟）和平均延迟（秒）
+        """
+        now = time.monotonic()
+        with self.lock:
+            recent = sum(1 for t in self.completed_times if now - t <= window)
+            latencies = list(self.latencies)
+            in_flight = len(self.in_flight)
+        return dict(
+            self.counters,
+            watching=max(0, len(self.tracked) - len(self.queued) - in_flight),
+            queue_depth=len(self.heap),
+            in_flight=in_flight,
+            workers=self.workers,
+            throughput_per_min=round(recent * 60.0 / window, 2),
+            mean_latency=round(sum(latencies) / len(latencies), 2) if latencies else None
+        )
+
+    def run(self, poll_interval=1.0, callback=None, idle_exit=None):
+        """
+        持续监视并处理，直到调用stop()
+
+        Args:
+            poll_interval (float): 扫描间隔（秒）
+            callback (callable): 事件回调函数，参数为(事件, 视频路径, 信息)，
+                事件为'started'、'done'（信息为处理结果）或'failed'（信息为错误信息）
+            idle_exit (float): 没有任何待处理文件多久后退出（秒），None则一直运行
+
+        Returns:
+            dict: 统计信息
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.callback = callback
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker)
+        idle_since = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                self.scan()
+                self.dispatch()
+
+                with self.lock:
+                    busy = bool(self.in_flight)
+                if busy or self.heap or self.tracked:
+                    idle_since = time.monotonic()
+                elif idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    break
+                self.stop_event.wait(poll_interval)
+        finally:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        return self.stats()
+
+    def stop(self):
+        """通知run()在本次扫描后退出（已提交的任务会处理完）"""
+        self.stop_event.set()
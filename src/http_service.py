@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地HTTP服务模块
+以常驻进程池提供视频信息解析、关键帧提取和宫格合成接口，
+工作进程预先加载OpenCV和PIL，并通过解码句柄池复用已打开的视频，避免每个请求重复启动、导入和解析
+"""
+
+import json
+import time
+import threading
+import multiprocessing
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def _warm_worker():
+    """工作进程初始化：预先导入并初始化图像处理库"""
+    import cv2
+    from PIL import Image
+    import src.frame_extractor
+    import src.grid_synthesizer
+
+    # 每个工作进程只占用一个OpenCV线程，由进程池负责并行
+    cv2.setNumThreads(1)
+    Image.init()
+
+
+def _task_info(params):
+    """视频信息解析任务"""
+    from src.video_processor import VideoProcessor
+    from src.capture_pool import get_default_pool
+
+    processor = VideoProcessor(get_default_pool())
+    try:
+        if not processor.load_video(params['video_path']):
+            raise ValueError(f"无法加载视频文件：{params['video_path']}")
+        return processor.get_video_info()
+    finally:
+        processor.release()
+
+
+def _task_extract(params):
+    """关键帧提取任务"""
+    from src.frame_extractor import FrameExtractor
+    from src.capture_pool import get_default_pool
+
+    extractor = FrameExtractor(params['video_path'], capture_pool=get_default_pool())
+    try:
+        if not extractor.initialize():
+            raise ValueError(f"无法加载视频文件：{params['video_path']}")
+        saved_paths = extractor.extract_to_dir(
+            params['output_dir'],
+            num_frames=params.get('num_frames', 5),
+            output_format=params.get('output_format', 'jpg'),
+            quality=params.get('quality', 95),
+            **params.get('options', {})
+        )
+        return {
+            'paths': saved_paths,
+            'frame_indices': extractor.frame_indices,
+            'frame_timestamps': extractor.frame_timestamps
+        }
+    finally:
+        extractor.release()
+
+
+def _task_grid(params):
+    """宫格合成任务"""
+    from src.grid_synthesizer import GridSynthesizer
+
+    options = dict(params.get('options', {}))
+    for key in ('layout', 'border_color', 'output_size', 'font_color'):
+        if options.get(key) is not None:
+            options[key] = tuple(options[key])
+
+    result_path = GridSynthesizer().synthesize_grid(params['image_paths'], params['output_path'], **options)
+    return {'path': result_path}
+
+
+class LatencyStats:
+    """接口耗时统计类（线程安全）"""
+
+    def __init__(self, window=1000):
+        """
+        初始化
+
+        Args:
+            window (int): 每个接口保留最近多少次请求的耗时
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.counters = {}
+
+    def record(self, endpoint, latency, status):
+        """
+        记录一次请求
+
+        Args:
+            endpoint (str): 接口路径
+            latency (float): 耗时（秒）
+            status (int): HTTP状态码
+        """
+        with self.lock:
+            counter = self.counters.setdefault(endpoint, {'requests': 0, 'errors': 0, 'rejected': 0})
+            counter['requests'] += 1
+            if status == 503:
+                # 被拒绝的请求不计入耗时分位数
+                counter['rejected'] += 1
+                return
+            if status >= 400:
+                counter['errors'] += 1
+            self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(latency)
+
+    def snapshot(self):
+        """
+        获取统计快照
+
+        Returns:
+            dict: 每个接口的请求数、错误数、拒绝数和未被拒绝请求的耗时分位数（毫秒）
+        """
+        result = {}
+        with self.lock:
+            for endpoint, counter in self.counters.items():
+                values = sorted(self.latencies.get(endpoint, []))
+                stats = dict(counter)
+                if values:
+                    stats.update({
+                        'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                        'p50_ms': round(values[int(0.50 * (len(values) - 1))] * 1000, 2),
+                        'p95_ms': round(values[int(0.95 * (len(values) - 1))] * 1000, 2),
+                        'p99_ms': round(values[int(0.99 * (len(values) - 1))] * 1000, 2),
+                        'max_ms': round(values[-1] * 1000, 2)
+                    })
+                result[endpoint] = stats
+        return result
+
+
+class ThumbnailService:
+    """本地缩略图/宫格图HTTP服务类"""
+
+    # 接口路径与任务函数的对应关系
+    TASKS = {
+        '/info': _task_info,
+        '/extract': _task_extract,
+        '/grid': _task_grid
+    }
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, queue_size=None, timeout=600):
+        """
+        初始化
+
+        Args:
+            host (str): 监听地址
+            port (int): 监听端口，0表示自动分配
+            workers (int): 工作进程数，None则使用CPU核心数
+            queue_size (int): 等待队列长度，队列满时返回503，None则为工作进程数的2倍
+            timeout (float): 单个任务的最长等待时间（秒）
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.timeout = timeout
+        self.stats = LatencyStats()
+
+        # 进程池在HTTP线程启动前创建
+        self.pool = multiprocessing.Pool(self.workers, initializer=_warm_worker)
+        self.slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self.pending_lock = threading.Lock()
+        self.pending = 0
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+
+    def _make_handler(self):
+        """创建绑定到当前服务的请求处理类"""
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self._send_json(200, service.metrics())
+                elif self.path == '/health':
+                    self._send_json(200, {'status': 'ok'})
+                else:
+                    self._send_json(404, {'error': '接口不存在'})
+
+            def do_POST(self):
+                start = time.perf_counter()
+                task = service.TASKS.get(self.path)
+                if task is None:
+                    status, body = 404, {'error': '接口不存在'}
+                else:
+                    try:
+                        length = int(self.headers.get('Content-Length', 0))
+                        params = json.loads(self.rfile.read(length) or b'{}')
+                        status, body = service.submit(task, params)
+                    except ValueError as e:
+                        status, body = 400, {'error': f"请求格式错误：{e}"}
+
+                latency = time.perf_counter() - start
+                body['latency_ms'] = round(latency * 1000, 2)
+                headers = {'Retry-After': '1'} if status == 503 else None
+                self._send_json(status, body, headers)
+                service.stats.record(self.path, latency, status)
+
+            def _send_json(self, status, body, headers=None):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # 访问日志由耗时统计代替
+                pass
+
+        return Handler
+
+    def submit(self, task, params):
+        """
+        提交任务到进程池并等待结果
+
+        Args:
+            task (callable): 任务函数
+            params (dict): 请求参数
+
+        Returns:
+            tuple: (HTTP状态码, 响应内容)
+        """
+        # 正在执行和排队的任务已满时直接拒绝，由客户端稍后重试
+        if not self.slots.acquire(blocking=False):
+            return 503, {'error': '服务繁忙，请稍后重试'}
+
+        with self.pending_lock:
+            self.pending += 1
+        # 名额在任务真正结束时（进程池回调中）归还：请求超时返回504后任务仍在工作进程中运行，
+        # 此时归还名额会让实际执行和排队的任务超出上限
+        try:
+            async_result = self.pool.apply_async(task, (params,), callback=self._task_done,
+                                                 error_callback=self._task_done)
+        except Exception as e:
+            self._task_done(None)
+            return 500, {'error': str(e)}
+
+        try:
+            result = async_result.get(self.timeout)
+            return 200, {'result': result}
+        except multiprocessing.TimeoutError:
+            return 504, {'error': '任务超时'}
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    def _task_done(self, _):
+        """任务结束（成功或出错）时由进程池的结果线程调用，归还名额"""
+        with self.pending_lock:
+            self.pending -= 1
+        self.slots.release()
+
+    def metrics(self):
+        """
+        获取服务运行指标
+
+        Returns:
+            dict: 工作进程数、队列长度、当前任务数和各接口耗时统计
+        """
+        with self.pending_lock:
+            pending = self.pending
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': pending,
+            'endpoints': self.stats.snapshot()
+        }
+
+    def serve_forever(self):
+        """启动服务（阻塞直到shutdown）"""
+        self.server.serve_forever()
+
+    def start(self):
+        """
+        在后台线程中启动服务
+
+        Returns:
+            threading.Thread: 服务线程
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        """停止服务并关闭进程池"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.terminate()
+        self.pool.join()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片编码模块
+提供PIL和OpenCV两种编码后端，支持JPG（含渐进式/优化）、PNG和WebP，
+并可通过基准测试为指定格式、质量和尺寸选出最快的后端并写入配置
+"""
+
+import io
+import time
+import cv2
+import numpy as np
+from PIL import Image
+from src.config import load_config, save_config
+
+
+# 支持的图片格式
+SUPPORTED_FORMATS = ('jpg', 'png', 'webp')
+
+
+def normalize_format(output_format):
+    """
+    规范化图片格式名称
+    
+    Args:
+        output_format (str): 图片格式，如'jpg'、'JPEG'、'png'、'webp'
+        
+    Returns:
+        str: 'jpg'、'png'或'webp'
+    """
+    output_format = output_format.lower().lstrip('.')
+    return 'jpg' if output_format == 'jpeg' else output_format
+
+
+class ImageEncoder:
+    """图片编码器基类"""
+    
+    # 后端名称
+    name = None
+    # 后端原生的通道顺序，传入相同顺序的帧可省去颜色转换
+    native_color = 'rgb'
+    
+    def encode(self, frame, output_format='jpg', quality=95, color='rgb', progressive=False, optimize=False):
+        """
+        编码帧图像
+        
+        Args:
+            frame (numpy.ndarray): 帧图像（H×W×3，uint8）
+            output_format (str): 图片格式，jpg、png或webp
+            quality (int): 图片质量，0-100，对jpg和webp有效
+            color (str): 帧的通道顺序，'rgb'或'bgr'
+            progressive (bool): 是否输出渐进式JPG
+            optimize (bool): 是否优化JPG霍夫曼表（体积更小，编码稍慢）
+            
+        Returns:
+            bytes: 编码后的图片数据
+        """
+        raise NotImplementedError
+    
+    def save(self, frame, output_path, output_format='jpg', quality=95, color='rgb', progressive=False,
+             optimize=False):
+        """
+        编码并保存帧图像
+        
+        Args:
+            frame (numpy.ndarray): 帧图像
+            output_path (str): 输出路径
+            其余参数同encode
+        """
+        data = self.encode(frame, output_format, quality, color, progressive, optimize)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+    
+    def save_image(self, img, output_path, output_format='jpg', quality=95, progressive=False, optimize=False):
+        """
+        编码并保存PIL图片
+        
+        Args:
+            img (Image): PIL Image对象（RGB）
+            output_path (str): 输出路径
+            其余参数同encode
+        """
+        self.save(np.asarray(img.convert('RGB')), output_path, output_format, quality, 'rgb', progressive, optimize)
+
+
+class PILEncoder(ImageEncoder):
+    """PIL编码后端"""
+    
+    name = 'pil'
+    native_color = 'rgb'
+    
+    def _save_to(self, img, target, output_format, quality, progressive, optimize):
+        """按格式保存PIL图片到文件路径或文件对象"""
+        output_format = normalize_format(output_format)
+        if output_format == 'jpg':
+            img.save(target, 'JPEG', quality=quality, progressive=progressive, optimize=optimize)
+        elif output_format == 'webp':
+            img.save(target, 'WEBP', quality=quality)
+        else:
+            img.save(target, 'PNG')
+    
+    def encode(self, frame, output_format='jpg', quality=95, color='rgb', progressive=False, optimize=False):
+        if color == 'bgr':
+            frame = frame[:, :, ::-1]
+        buffer = io.BytesIO()
+        self._save_to(Image.fromarray(frame), buffer, output_format, quality, progressive, optimize)
+        return buffer.getvalue()
+    
+    def save(self, frame, output_path, output_format='jpg', quality=95, color='rgb', progressive=False,
+             optimize=False):
+        if color == 'bgr':
+            frame = frame[:, :, ::-1]
+        self._save_to(Image.fromarray(frame), output_path, output_format, quality, progressive, optimize)
+    
+    def save_image(self, img, output_path, output_format='jpg', quality=95, progressive=False, optimize=False):
+        self._save_to(img, output_path, output_format, quality, progressive, optimize)
+
+
+class OpenCVEncoder(ImageEncoder):
+    """OpenCV编码后端（直接编码BGR帧，无需颜色转换）"""
+    
+    name = 'opencv'
+    native_color = 'bgr'
+    
+    def encode(self, frame, output_format='jpg', quality=95, color='rgb', progressive=False, optimize=False):
+        if color == 'rgb':
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        
+        output_format = normalize_format(output_format)
+        if output_format == 'jpg':
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(quality),
+                      cv2.IMWRITE_JPEG_PROGRESSIVE, int(progressive),
+                      cv2.IMWRITE_JPEG_OPTIMIZE, int(optimize)]
+        elif output_format == 'webp':
+            params = [cv2.IMWRITE_WEBP_QUALITY, max(1, int(quality))]
+        else:
+            params = [cv2.IMWRITE_PNG_COMPRESSION, 6]
+        
+        ok, data = cv2.imencode(f'.{output_format}', frame, params)
+        if not ok:
+            raise ValueError(f"OpenCV无法编码{output_format}格式")
+        return data.tobytes()
+
+
+# 可用的编码后端
+ENCODERS = {
+    PILEncoder.name: PILEncoder,
+    OpenCVEncoder.name: OpenCVEncoder
+}
+
+# 未选择时使用的默认后端
+DEFAULT_ENCODER = PILEncoder.name
+
+# 配置中固定的编码后端，首次使用时读取，本进程内固定新后端时清空重新读取
+_pinned_encoders = None
+
+
+def _config_key(output_format, quality, size):
+    """配置中固定编码后端的键"""
+    return f"{normalize_format(output_format)}:q{quality}:{size[0]}x{size[1]}"
+
+
+def _load_pinned_encoders():
+    """
+    获取配置中固定的编码后端（只在首次调用时读取配置文件）
+    
+    Returns:
+        dict: 配置键 -> 后端名称
+    """
+    global _pinned_encoders
+    if _pinned_encoders is None:
+        _pinned_encoders = dict(load_config().get('encoders', {}))
+    return _pinned_encoders
+
+
+def get_encoder(name=None, output_format='jpg', quality=95, size=None):
+    """
+    获取编码器
+    
+    未指定名称时，依次使用配置中为该格式/质量/尺寸固定的后端、为该格式固定的后端和默认后端。
+    固定的后端在进程内只读取一次配置；其他进程修改配置后需重新启动才会生效。
+    
+    Args:
+        name (str): 后端名称，'pil'或'opencv'
+        output_format (str): 图片格式
+        quality (int): 图片质量
+        size (tuple): 图片尺寸 (width, height)
+        
+    Returns:
+        ImageEncoder: 编码器
+    """
+    if name is None:
+        pinned = _load_pinned_encoders()
+        if size is not None:
+            name = pinned.get(_config_key(output_format, quality, size))
+        name = name or pinned.get(normalize_format(output_format)) or DEFAULT_ENCODER
+    
+    encoder_class = ENCODERS.get(name)
+    if encoder_class is None:
+        raise ValueError(f"未知的编码后端：{name}")
+    return encoder_class()
+
+
+def benchmark_encoders(output_format='jpg', quality=95, size=(1920, 1080), repeats=5, color='bgr',
+                       progressive=False, optimize=False):
+    """
+    对所有编码后端进行基准测试
+    
+    使用带纹理的合成画面，传入解码器原生的BGR帧，计时包含必要的颜色转换。
+    
+    Args:
+        output_format (str): 图片格式
+        quality (int): 图片质量
+        size (tuple): 测试画面尺寸 (width, height)
+        repeats (int): 每个后端重复编码次数
+        color (str): 输入帧的通道顺序
+        progressive (bool): 是否输出渐进式JPG
+        optimize (bool): 是否优化JPG
+        
+    Returns:
+        dict: 后端名称 -> {'seconds': 平均每张耗时, 'bytes': 编码后大小}，编码失败的后端不在结果中
+    """
+    width, height = size
+    rng = np.random.default_rng(0)
+    # 平滑渐变叠加噪声，接近真实画面的压缩难度
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    frame = np.clip(gradient + rng.normal(0, 20, (height, width, 3)), 0, 255).astype(np.uint8)
+    
+    results = {}
+    for name, encoder_class in ENCODERS.items():
+        encoder = encoder_class()
+        try:
+            data = encoder.encode(frame, output_format, quality, color, progressive, optimize)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                encoder.encode(frame, output_format, quality, color, progressive, optimize)
+            elapsed = (time.perf_counter() - start) / repeats
+        except (ValueError, OSError, cv2.error):
+            continue
+        results[name] = {'seconds': elapsed, 'bytes': len(data)}
+    return results
+
+
+def select_fastest_encoder(output_format='jpg', quality=95, size=(1920, 1080), repeats=5, pin=True):
+    """
+    选出当前机器上最快的编码后端，并可写入配置固定下来
+    
+    Args:
+        output_format (str): 图片格式
+        quality (int): 图片质量
+        size (tuple): 图片尺寸 (width, height)
+        repeats (int): 每个后端重复编码次数
+        pin (bool): 是否写入配置
+        
+    Returns:
+        tuple: (最快的后端名称, 基准测试结果)
+    """
+    results = benchmark_encoders(output_format, quality, size, repeats)
+    if not results:
+        return (DEFAULT_ENCODER, results)
+    
+    fastest = min(results, key=lambda name: results[name]['seconds'])
+    if pin:
+        config = load_config()
+        encoders = config.setdefault('encoders', {})
+        encoders[_config_key(output_format, quality, size)] = fastest
+        encoders[normalize_format(output_format)] = fastest
+        save_config(config)
+        global _pinned_encoders
+        _pinned_encoders = None
+    return (fastest, results)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+实时跟随模块
+跟踪仍在录制（持续增长）的视频文件，只解码新追加的内容，并定时更新滚动宫格图
+"""
+
+import os
+import time
+import cv2
+from PIL import Image, ImageDraw
+from src.grid_synthesizer import GridSynthesizer
+from src.video_processor import format_timestamp
+
+
+class LiveContactSheet:
+    """实时宫格图类，宫格中保留最近的若干个采样帧"""
+
+    def __init__(self, video_path, output_path, cells=9, sample_interval=10.0, cell_size=(320, 180),
+                 spacing=5, border=1, border_color=(200, 200, 200), quality=85, show_timestamps=True,
+                 encoder=None):
+        """
+        初始化
+
+        Args:
+            video_path (str): 视频文件路径（录制中的文件建议使用分片MP4）
+            output_path (str): 宫格图输出路径
+            cells (int): 宫格格子数，即保留的最近采样帧数
+            sample_interval (float): 采样间隔（秒）
+            cell_size (tuple): 格子尺寸 (width, height)
+            spacing (int): 图片间距
+            border (int): 边框宽度
+            border_color (tuple): 边框颜色 (R, G, B)
+            quality (int): 输出图片质量
+            show_timestamps (bool): 是否在每格标注时间戳
+            encoder (ImageEncoder): 图片编码后端，None则按配置自动选择
+        """
+        self.video_path = video_path
+        self.output_path = output_path
+        self.cells = max(1, cells)
+        self.sample_interval = sample_interval
+        self.cell_width, self.cell_height = cell_size
+        self.spacing = spacing
+        self.border = border
+        self.border_color = border_color
+        self.quality = quality
+        self.show_timestamps = show_timestamps
+        self.encoder = encoder
+
+        self.synthesizer = GridSynthesizer()
+        self.rows, self.cols = self.synthesizer.calculate_grid_layout(self.cells)
+        # 各格子的最新采样帧：(帧索引, 时间戳, 缩放后的格子图片)；第n个采样帧放入第n % cells格，
+        # 宫格填满后新帧只替换最旧的一格，其他格子位置不变
+        self.samples = [None] * self.cells
+        self.sample_count = 0
+        # 每个格子当前绘制的帧索引，用于判断哪些格子需要重绘
+        self.slots = [None] * self.cells
+        self.canvas = None
+
+        # 跟随进度
+        self.fps = None
+        self.next_frame = 0
+        self.next_sample_time = 0.0
+        self.last_size = -1
+        self.stats = {'polls': 0, 'decoded_frames': 0, 'samples': 0, 'redrawn_cells': 0, 'renders': 0}
+
+    def poll(self):
+        """
+        检查文件是否增长，并从上次的位置继续解码新追加的帧
+
+        每次重新打开视频（解码器会缓存打开时的文件长度），只读取容器头，
+        不调用ffprobe；定位到上次解码的位置后顺序读取，非采样帧只grab（仍需解码），
+        跳过retrieve中的像素格式转换和复制。
+
+        Returns:
+            int: 新增的采样帧数
+        """
+        self.stats['polls'] += 1
+        try:
+            size = os.path.getsize(self.video_path)
+        except OSError:
+            return 0
+        if size == self.last_size:
+            return 0
+
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            # 文件头尚未写完（如分片MP4还没有写出第一个分片）
+            cap.release()
+            return 0
+
+        try:
+            if self.fps is None:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                if fps <= 0:
+                    return 0
+                self.fps = fps
+
+            if self.next_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, self.next_frame)
+
+            new_samples = 0
+            while cap.grab():
+                frame_index = self.next_frame
+                self.next_frame += 1
+                self.stats['decoded_frames'] += 1
+
+                timestamp = frame_index / self.fps
+                if timestamp + 1e-6 < self.next_sample_time:
+                    continue
+
+                ret, frame = cap.retrieve()
+                if not ret:
+                    continue
+                self.samples[self.sample_count % self.cells] = (frame_index, timestamp, self._make_tile(frame))
+                self.sample_count += 1
+                self.next_sample_time = timestamp + self.sample_interval
+                new_samples += 1
+        finally:
+            cap.release()
+
+        self.last_size = size
+        self.stats['samples'] += new_samples
+        return new_samples
+
+    def _make_tile(self, frame):
+        """
+        将BGR帧中心裁剪缩放为格子图片
+
+        Args:
+            frame (numpy.ndarray): BGR帧
+
+        Returns:
+            Image: 格子图片
+        """
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return self.synthesizer.center_crop(img, self.cell_width, self.cell_height, resize_quality='fast')
+
+    def render(self):
+        """
+        更新宫格图，只重绘内容发生变化的格子
+
+        Returns:
+            int: 重绘的格子数，没有变化时不写出文件并返回0
+        """
+        if self.canvas is None:
+            width = self.cols * self.cell_width + (self.cols - 1) * self.spacing + 2 * self.border
+            height = self.rows * self.cell_height + (self.rows - 1) * self.spacing + 2 * self.border
+            self.canvas = Image.new('RGB', (width, height), self.border_color)
+
+        draw = ImageDraw.Draw(self.canvas)
+        redrawn = 0
+        for index, sample in enumerate(self.samples):
+            if sample is None or self.slots[index] == sample[0]:
+                continue
+            frame_index, timestamp, tile = sample
+
+            x, y = self.synthesizer.cell_origin(index, self.cols, self.cell_width, self.cell_height,
+                                                self.spacing, self.border)
+            self.canvas.paste(tile, (x, y))
+            if self.show_timestamps:
+                layout = self.synthesizer.layout_captions([format_timestamp(timestamp)], self.cell_width,
+                                                          self.cell_height, None, 14)[0]
+                self.synthesizer.draw_caption(draw, layout, x, y)
+            self.slots[index] = frame_index
+            redrawn += 1
+
+        if redrawn:
+            # save_image先写临时文件再替换，查看方不会读到写了一半的图片
+            self.synthesizer.save_image(self.canvas, self.output_path, self.quality, self.encoder)
+            self.stats['redrawn_cells'] += redrawn
+            self.stats['renders'] += 1
+
+        return redrawn
+
+    def update(self):
+        """
+        检查文件增长并在有新采样帧时更新宫格图
+
+        Returns:
+            int: 重绘的格子数
+        """
+        if self.poll():
+            return self.render()
+        return 0
+
+    def follow(self, refresh_interval=5.0, idle_timeout=60.0, callback=None):
+        """
+        持续跟随视频文件，直到文件停止增长超过idle_timeout秒
+
+        Args:
+            refresh_interval (float): 检查间隔（秒）
+            idle_timeout (float): 文件停止增长多久后结束（秒），None则一直跟随
+            callback (callable): 每次更新宫格图后的回调函数，参数为重绘的格子数
+
+        Returns:
+            dict: 统计信息
+        """
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        last_growth = time.monotonic()
+        while True:
+            previous_size = self.last_size
+            redrawn = self.update()
+            if self.last_size != previous_size:
+                last_growth = time.monotonic()
+            if redrawn and callback:
+                callback(redrawn)
+
+            if idle_timeout is not None and time.monotonic() - last_growth >= idle_timeout:
+                break
+            time.sleep(refresh_interval)
+
+        return dict(self.stats)
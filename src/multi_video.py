@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多视频合并模块
+在进程池中并行提取多个视频的关键帧，每帧在输出顺序中的位置预先确定，
+提取完成即返回并绘制到对应的格子中，合成一张或多张宫格图
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image, ImageDraw
+from src.grid_synthesizer import GridSynthesizer
+from src.video_processor import format_timestamp
+
+
+def _init_worker():
+    """工作进程初始化：每个进程只占用一个OpenCV线程，由进程池负责并行"""
+    import cv2
+    cv2.setNumThreads(1)
+
+
+def _extract_chunk(task):
+    """
+    提取一个视频中一段采样帧（在工作进程中执行）
+
+    Args:
+        task (dict): 任务参数
+
+    Returns:
+        dict: 视频序号、采样序号和对应的图片路径、帧序号、时间点
+    """
+    from src.frame_extractor import FrameExtractor
+    from src.capture_pool import get_default_pool
+
+    result = {'video_index': task['video_index'], 'start': task['start'], 'end': task['end'], 'frames': []}
+    # 同一工作进程处理同一视频的后续分段时复用已打开的解码句柄
+    extractor = FrameExtractor(task['video_path'], capture_pool=get_default_pool())
+    try:
+        if not extractor.initialize():
+            return result
+        positions = extractor.compute_uniform_positions(task['num_frames'])
+        positions = positions[task['start']:task['end']]
+        paths = extractor.extract_positions_to_dir(task['output_dir'], positions, task['output_format'],
+                                                   task['quality'], start_number=task['start'] + 1)
+        # 读取失败的帧会被跳过，按顺序对应回采样序号
+        offset = 0
+        for path, frame_index, timestamp in zip(paths, extractor.frame_indices, extractor.frame_timestamps):
+            while positions[offset] != frame_index:
+                offset += 1
+            result['frames'].append((task['start'] + offset, path, frame_index, timestamp))
+            offset += 1
+    finally:
+        extractor.release()
+    return result
+
+
+class MultiVideoExtractor:
+    """多视频并行提取器类"""
+
+    # 帧的排列顺序
+    ORDERS = ('grouped', 'interleaved')
+
+    def __init__(self, video_paths, max_workers=None):
+        """
+        初始化
+
+        Args:
+            video_paths (list): 视频文件路径列表
+            max_workers (int): 工作进程数，None则使用CPU核心数
+        """
+        self.video_paths = list(video_paths)
+        self.max_workers = max_workers
+
+    def plan(self, num_frames):
+        """
+        计算每个视频的采样帧数（与均匀间隔模式一致，至少为2）
+
+        Args:
+            num_frames (int): 每个视频提取的帧数
+
+        Returns:
+            int: 每个视频的采样帧数
+        """
+        return max(2, num_frames)
+
+    def rank(self, video_index, number, order='grouped'):
+        """
+        计算帧在输出顺序中的排序键
+
+        Args:
+            video_index (int): 视频序号
+            number (int): 帧在该视频中的采样序号
+            order (str): 'grouped'按视频分组，'interleaved'按采样时间点交错
+                （各视频在相同相对时间点的帧相邻）
+
+        Returns:
+            tuple: 排序键
+        """
+        if order == 'interleaved':
+            return (number, video_index)
+        return (video_index, number)
+
+    def iter_frames(self, output_dir, num_frames=5, order='grouped', output_format='jpg', quality=95,
+                    chunk_size=4):
+        """
+        并行提取全部视频的关键帧，每个分段完成时立即返回其中的帧
+
+        每个视频的采样帧按chunk_size分段提交到进程池，输出顺序中靠前的分段优先提交；
+        返回顺序取决于完成顺序，每帧的position为其在输出顺序中的固定位置，
+        不必等待前面的帧，也不受其他视频提取失败的影响。
+
+        Args:
+            output_dir (str): 帧图片输出目录，每个视频保存在以序号和文件名命名的子目录中
+            num_frames (int): 每个视频提取的帧数
+            order (str): 排列顺序，'grouped'或'interleaved'
+            output_format (str): 输出图片格式
+            quality (int): 图片质量，0-100
+            chunk_size (int): 每个任务提取的帧数
+
+        Yields:
+            dict: 帧信息，包括position（输出顺序中的位置）、video_index、video_path、number（视频内采样序号）、
+                path、frame_index、timestamp；提取失败的帧也会返回，此时path、frame_index和timestamp为None
+
+        Raises:
+            ValueError: 排列顺序不支持
+        """
+        if order not in self.ORDERS:
+            raise ValueError(f"不支持的排列顺序：{order}")
+
+        count = self.plan(num_frames)
+        chunk_size = max(1, chunk_size)
+        tasks = []
+        for video_index, video_path in enumerate(self.video_paths):
+            video_name = os.path.splitext(os.path.basename(video_path))[0]
+            video_dir = os.path.join(output_dir, f"{video_index + 1:02d}_{video_name}")
+            for start in range(0, count, chunk_size):
+                tasks.append({
+                    'video_index': video_index, 'video_path': video_path, 'output_dir': video_dir,
+                    'num_frames': count, 'start': start, 'end': min(start + chunk_size, count),
+                    'output_format': output_format, 'quality': quality
+                })
+        # 输出顺序中靠前的分段优先执行
+        tasks.sort(key=lambda task: self.rank(task['video_index'], task['start'], order))
+
+        # 全部采样帧按输出顺序排列，排序键 -> 位置
+        ranks = sorted(self.rank(v, n, order) for v in range(len(self.video_paths)) for n in range(count))
+        positions = {rank: position for position, rank in enumerate(ranks)}
+
+        with ProcessPoolExecutor(self.max_workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_extract_chunk, task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                video_index = result['video_index']
+                extracted = {number: (path, frame_index, timestamp)
+                             for number, path, frame_index, timestamp in result['frames']}
+                for number in range(result['start'], result['end']):
+                    path, frame_index, timestamp = extracted.get(number, (None, None, None))
+                    yield {
+                        'position': positions[self.rank(video_index, number, order)],
+                        'video_index': video_index,
+                        'video_path': self.video_paths[video_index],
+                        'number': number,
+                        'path': path,
+                        'frame_index': frame_index,
+                        'timestamp': timestamp
+                    }
+
+
+class StreamingGridComposer:
+    """逐格合成宫格图类，每收到一张图片立即绘制到其位置对应的格子中"""
+
+    def __init__(self, output_path, total_cells, max_per_grid=None, cell_size=None, spacing=5, border=1,
+                 border_color=(200, 200, 200), quality=95, caption_font_size=14, resize_quality='balanced'):
+        """
+        初始化
+
+        Args:
+            output_path (str): 输出路径，拆分为多张宫格图时自动添加序号（如“xxx_01.jpg”）
+            total_cells (int): 预计的图片总数，用于确定每张宫格图的布局
+            max_per_grid (int): 每张宫格图最多的格子数，None则全部合成为一张
+            cell_size (tuple): 格子尺寸 (width, height)，None则使用最先放入的图片的尺寸
+            spacing (int): 图片间距
+            border (int): 边框宽度
+            border_color (tuple): 边框颜色 (R, G, B)
+            quality (int): 输出图片质量
+            caption_font_size (int): 说明文字字体大小
+            resize_quality (str): 缩放质量档位，'best'、'balanced'或'fast'
+        """
+        self.output_path = output_path
+        self.total_cells = max(1, total_cells)
+        self.max_per_grid = max_per_grid or self.total_cells
+        self.cell_size = cell_size
+        self.spacing = spacing
+        self.border = border
+        self.border_color = border_color
+        self.quality = quality
+        self.caption_font_size = caption_font_size
+        self.resize_quality = resize_quality
+
+        self.synthesizer = GridSynthesizer()
+        self.grid_count = (self.total_cells + self.max_per_grid - 1) // self.max_per_grid
+        # 宫格图序号 -> 输出路径
+        self.output_paths = {}
+        # 尚未保存的宫格图：宫格图序号 -> {'canvas', 'draw', 'cols'}
+        self.grids = {}
+        # 各宫格图已放入或已确定留空的格子数
+        self.settled = {}
+        # 已放入的图片数
+        self.added = 0
+
+    def grid_path(self, grid_index):
+        """
+        第grid_index张宫格图的输出路径
+
+        Args:
+            grid_index (int): 宫格图序号（从0开始）
+
+        Returns:
+            str: 输出路径
+        """
+        if self.grid_count == 1:
+            return self.output_path
+        base, ext = os.path.splitext(self.output_path)
+        return f"{base}_{grid_index + 1:02d}{ext}"
+
+    def _grid_cells(self, grid_index):
+        """第grid_index张宫格图的格子数"""
+        return min(self.max_per_grid, self.total_cells - grid_index * self.max_per_grid)
+
+    def _get_grid(self, grid_index):
+        """获取宫格图的画布（不存在时按该宫格图的格子数创建）"""
+        grid = self.grids.get(grid_index)
+        if grid is None:
+            rows, cols = self.synthesizer.calculate_grid_layout(max(1, self._grid_cells(grid_index)))
+            cell_width, cell_height = self.cell_size
+            width = cols * cell_width + (cols - 1) * self.spacing + 2 * self.border
+            height = rows * cell_height + (rows - 1) * self.spacing + 2 * self.border
+            canvas = Image.new('RGB', (width, height), self.border_color)
+            grid = {'canvas': canvas, 'draw': ImageDraw.Draw(canvas), 'cols': cols}
+            self.grids[grid_index] = grid
+        return grid
+
+    def add(self, image_path, caption=None, position=None):
+        """
+        将一张图片绘制到其位置对应的格子，所在宫格图的格子全部确定时立即保存
+
+        Args:
+            image_path (str): 图片路径
+            caption (str): 说明文字，None则不添加
+            position (int): 在全部格子中的位置（从0开始），None则为已放入图片数（按到达顺序排列）
+
+        Returns:
+            str: 本次完成并保存的宫格图路径，未完成返回None
+        """
+        if position is None:
+            position = self.added
+        grid_index, cell_index = divmod(position, self.max_per_grid)
+
+        with Image.open(image_path) as img:
+            if self.cell_size is None:
+                self.cell_size = img.size
+            grid = self._get_grid(grid_index)
+            cell_width, cell_height = self.cell_size
+            tile = self.synthesizer.center_crop(img, cell_width, cell_height, self.resize_quality)
+
+        x, y = self.synthesizer.cell_origin(cell_index, grid['cols'], cell_width, cell_height,
+                                            self.spacing, self.border)
+        grid['canvas'].paste(tile.convert('RGB'), (x, y))
+        if caption:
+            layout = self.synthesizer.layout_captions([caption], cell_width, cell_height, None,
+                                                      self.caption_font_size)[0]
+            self.synthesizer.draw_caption(grid['draw'], layout, x, y)
+
+        self.added += 1
+        return self._settle(grid_index)
+
+    def skip(self, position):
+        """
+        将一个格子确定为空白（对应的帧提取失败），其他格子的位置不变
+
+        Args:
+            position (int): 在全部格子中的位置（从0开始）
+
+        Returns:
+            str: 本次完成并保存的宫格图路径，未完成返回None
+        """
+        return self._settle(position // self.max_per_grid)
+
+    def _settle(self, grid_index):
+        """记录宫格图中又确定了一个格子，全部确定时保存（全部留空的宫格图不保存）"""
+        self.settled[grid_index] = self.settled.get(grid_index, 0) + 1
+        if self.settled[grid_index] >= self._grid_cells(grid_index) and grid_index in self.grids:
+            return self._flush(grid_index)
+        return None
+
+    def _flush(self, grid_index):
+        """保存一张宫格图"""
+        grid = self.grids.pop(grid_index)
+        path = self.grid_path(grid_index)
+        output_dir = os.path.dirname(path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.synthesizer.save_image(grid['canvas'], path, self.quality)
+        grid['canvas'].close()
+        self.output_paths[grid_index] = path
+        return path
+
+    def finish(self):
+        """
+        保存尚未完成的宫格图（部分帧提取失败时对应格子保持空白）
+
+        Returns:
+            list: 全部宫格图路径（按宫格图序号排列）
+        """
+        for grid_index in sorted(self.grids):
+            self._flush(grid_index)
+        return [self.output_paths[i] for i in sorted(self.output_paths)]
+
+
+def _video_size(video_path):
+    """
+    读取视频分辨率
+
+    Args:
+        video_path (str): 视频文件路径
+
+    Returns:
+        tuple: (width, height)，无法读取时返回None
+    """
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    finally:
+        cap.release()
+    return size if size[0] > 0 and size[1] > 0 else None
+
+
+def merge_videos_to_grids(video_paths, output_path, num_frames=5, order='grouped', max_per_grid=None,
+                          frames_dir=None, cell_size=None, spacing=5, border=1, show_captions=True,
+                          output_format='jpg', quality=95, max_workers=None, callback=None):
+    """
+    从多个视频并行提取关键帧并合成宫格图
+
+    Args:
+        video_paths (list): 视频文件路径列表
+        output_path (str): 宫格图输出路径
+        num_frames (int): 每个视频提取的帧数
+        order (str): 排列顺序，'grouped'按视频分组，'interleaved'按采样时间点交错
+        max_per_grid (int): 每张宫格图最多的格子数，None则合成为一张
+        frames_dir (str): 关键帧保存目录，None则为输出路径旁的“xxx_frames”目录
+        cell_size (tuple): 格子尺寸 (width, height)，None则使用第一个视频的分辨率
+        spacing (int): 图片间距
+        border (int): 边框宽度
+        show_captions (bool): 是否在每格标注视频序号和时间戳
+        output_format (str): 关键帧图片格式
+        quality (int): 图片质量，0-100
+        max_workers (int): 工作进程数，None则使用CPU核心数
+        callback (callable): 每放入一格后的回调函数，参数为(已放入格数, 总格数)
+
+    Returns:
+        list: 宫格图路径列表
+    """
+    extractor = MultiVideoExtractor(video_paths, max_workers)
+    total = extractor.plan(num_frames) * len(extractor.video_paths)
+    if total == 0:
+        return []
+
+    if frames_dir is None:
+        frames_dir = os.path.splitext(output_path)[0] + '_frames'
+    if cell_size is None:
+        # 帧到达顺序不确定，格子尺寸取第一个视频的分辨率，而不是最先到达的帧
+        cell_size = _video_size(extractor.video_paths[0])
+    composer = StreamingGridComposer(output_path, total, max_per_grid, cell_size, spacing, border,
+                                     quality=quality)
+
+    for frame in extractor.iter_frames(frames_dir, num_frames, order, output_format, quality):
+        if frame['path'] is None:
+            composer.skip(frame['position'])
+            continue
+        caption = None
+        if show_captions:
+            caption = f"#{frame['video_index'] + 1} {format_timestamp(frame['timestamp'])}"
+        composer.add(frame['path'], caption, frame['position'])
+        if callback:
+            callback(composer.added, total)
+
+    return composer.finish()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+感知哈希模块
+负责计算帧画面的差值哈希（dHash），用于识别近似重复的画面
+"""
+
+import os
+import json
+import cv2
+import numpy as np
+from src.config import get_cache_dir
+from src.video_processor import video_fingerprint
+
+
+def compute_dhash(frame, hash_size=8):
+    """
+    计算帧图像的差值哈希
+    
+    先将帧缩小到 (hash_size+1)×hash_size 再比较相邻像素亮度，
+    计算量只与缩略图大小有关，远小于解码一帧的开销。
+    
+    Args:
+        frame (numpy.ndarray): BGR帧图像
+        hash_size (int): 哈希边长，默认8（即64位哈希）
+        
+    Returns:
+        int: 哈希值
+    """
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(hash_a, hash_b):
+    """
+    计算两个哈希值的汉明距离
+    
+    Args:
+        hash_a (int): 哈希值
+        hash_b (int): 哈希值
+        
+    Returns:
+        int: 不同的位数
+    """
+    return bin(hash_a ^ hash_b).count('1')
+
+
+def is_duplicate(frame_hash, known_hashes, threshold):
+    """
+    判断哈希值是否与已有哈希近似重复
+    
+    Args:
+        frame_hash (int): 待判断的哈希值
+        known_hashes (list): 已接受的哈希值列表
+        threshold (int): 汉明距离阈值，小于等于该值视为重复
+        
+    Returns:
+        bool: 是否重复
+    """
+    return any(hamming_distance(frame_hash, known) <= threshold for known in known_hashes)
+
+
+class FrameHashCache:
+    """帧哈希缓存类，按视频指纹保存每帧的哈希值，供多次运行复用"""
+    
+    def __init__(self, video_path, variant=None):
+        """
+        初始化并加载已有缓存
+        
+        Args:
+            video_path (str): 视频文件路径
+            variant (str): 帧序号含义不同时（如按时间戳定位）使用的独立缓存名称，None则使用默认缓存
+        """
+        name = video_fingerprint(video_path) + (f"-{variant}" if variant else '')
+        self.cache_path = os.path.join(get_cache_dir('frame_hashes'), f"{name}.json")
+        self.hashes = {}
+        self.modified = False
+        
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.hashes = {int(k): int(v, 16) for k, v in json.load(f).items()}
+            except (OSError, ValueError):
+                self.hashes = {}
+    
+    def get(self, frame_index):
+        """
+        获取指定帧的哈希值
+        
+        Args:
+            frame_index (int): 帧序号
+            
+        Returns:
+            int: 哈希值，未缓存则返回None
+        """
+        return self.hashes.get(frame_index)
+    
+    def set(self, frame_index, frame_hash):
+        """
+        记录指定帧的哈希值
+        
+        Args:
+            frame_index (int): 帧序号
+            frame_hash (int): 哈希值
+        """
+        self.hashes[frame_index] = frame_hash
+        self.modified = True
+    
+    def save(self):
+        """保存缓存（无变化时跳过）"""
+        if not self.modified:
+            return
+        
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump({str(k): f"{v:016x}" for k, v in self.hashes.items()}, f)
+        self.modified = False
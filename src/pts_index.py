@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+显示时间戳索引模块
+通过ffprobe扫描视频流的数据包（只解析容器，不解码画面）得到每一帧的实际显示时间（PTS），
+用于可变帧率视频的准确时长、逐帧时间点和按时间均匀采样；扫描结果按视频指纹缓存
+"""
+
+import os
+import subprocess
+import cv2
+import numpy as np
+from src.config import get_cache_dir
+from src.atomic_file import atomic_output
+from src.video_processor import video_fingerprint
+
+
+# 时间比较的容差（秒），吸收毫秒换算带来的浮点误差，远小于任何帧间隔
+TIME_TOLERANCE = 1e-4
+
+
+def build_probe_command(video_path, ffprobe_cmd='ffprobe'):
+    """
+    构建逐个输出视频流数据包显示时间的ffprobe命令
+
+    Args:
+        video_path (str): 视频文件路径
+        ffprobe_cmd (str): ffprobe命令
+
+    Returns:
+        list: 命令参数列表
+    """
+    return [
+        ffprobe_cmd, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time', '-of', 'csv=p=0', video_path
+    ]
+
+
+def scan_packet_pts(video_path, ffprobe_cmd='ffprobe'):
+    """
+    用ffprobe扫描视频流的数据包时间戳（不解码）
+
+    Args:
+        video_path (str): 视频文件路径
+        ffprobe_cmd (str): ffprobe命令
+
+    Returns:
+        numpy.ndarray: 各帧显示时间（秒，float64，按数据包顺序，未排序）
+
+    Raises:
+        RuntimeError: ffprobe不存在、运行失败或没有可用的时间戳
+    """
+    command = build_probe_command(video_path, ffprobe_cmd)
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise RuntimeError(f"无法运行ffprobe：{e}")
+
+    values = []
+    for line in process.stdout:
+        # 缺少时间戳的数据包输出为N/A，跳过
+        field = line.split(b',', 1)[0].strip()
+        if field and field != b'N/A':
+            values.append(float(field))
+    stderr = process.stderr.read().decode('utf-8', errors='replace')
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffprobe运行失败：{stderr.strip()}")
+    if not values:
+        raise RuntimeError("视频流没有可用的时间戳")
+    return np.asarray(values, dtype=np.float64)
+
+
+def scan_decoded_pts(video_path):
+    """
+    没有ffprobe时的后备方案：用OpenCV逐帧grab（不做颜色转换）读取各帧的显示时间
+
+    需要完整解码一遍，仅在ffprobe不可用时使用，结果同样会被缓存。
+
+    Args:
+        video_path (str): 视频文件路径
+
+    Returns:
+        numpy.ndarray: 各帧显示时间（秒，float64）
+
+    Raises:
+        RuntimeError: 视频无法打开或没有读取到任何帧
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频文件：{video_path}")
+    values = []
+    try:
+        while cap.grab():
+            values.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+    finally:
+        cap.release()
+    if not values:
+        raise RuntimeError(f"没有读取到任何帧：{video_path}")
+    return np.asarray(values, dtype=np.float64)
+
+
+class PtsIndex:
+    """显示时间戳索引类"""
+
+    def __init__(self, timestamps, source='ffprobe'):
+        """
+        初始化
+
+        Args:
+            timestamps (numpy.ndarray): 各帧显示时间（秒），顺序不限
+            source (str): 时间戳来源，'ffprobe'或'decode'
+        """
+        timestamps = np.sort(np.asarray(timestamps, dtype=np.float64))
+        # 数据包按解码顺序输出，排序后即显示顺序；时间从第一帧开始计
+        self.start_time = float(timestamps[0]) if len(timestamps) else 0.0
+        self.timestamps = timestamps - self.start_time
+        self.source = source
+
+    @property
+    def frame_count(self):
+        """帧数"""
+        return len(self.timestamps)
+
+    @property
+    def frame_durations(self):
+        """各帧显示时长（秒），最后一帧按中位数估计"""
+        if self.frame_count < 2:
+            return np.zeros(self.frame_count, dtype=np.float64)
+        deltas = np.diff(self.timestamps)
+        return np.append(deltas, np.median(deltas))
+
+    @property
+    def duration(self):
+        """时长（秒）：最后一帧的显示时间加上其显示时长"""
+        if self.frame_count == 0:
+            return 0.0
+        return float(self.timestamps[-1] + self.frame_durations[-1])
+
+    @property
+    def average_fps(self):
+        """平均帧率"""
+        duration = self.duration
+        return self.frame_count / duration if duration > 0 else 0.0
+
+    def fps_range(self):
+        """
+        获取瞬时帧率的范围
+
+        Returns:
+            tuple: (最低帧率, 最高帧率)，帧数不足时为(0, 0)
+        """
+        deltas = np.diff(self.timestamps)
+        deltas = deltas[deltas > 0]
+        if len(deltas) == 0:
+            return 0.0, 0.0
+        return float(1.0 / deltas.max()), float(1.0 / deltas.min())
+
+    def is_variable(self, tolerance=0.05):
+        """
+        判断是否为可变帧率
+
+        Args:
+            tolerance (float): 帧间隔相对中位数的允许偏差比例
+
+        Returns:
+            bool: 帧间隔偏差超过允许范围时为True
+        """
+        deltas = np.diff(self.timestamps)
+        if len(deltas) < 2:
+            return False
+        median = np.median(deltas)
+        if median <= 0:
+            return False
+        return bool(np.any(np.abs(deltas - median) > median * tolerance))
+
+    def time_of(self, frame_index):
+        """
+        获取帧的显示时间
+
+        Args:
+            frame_index (int): 帧序号（显示顺序）
+
+        Returns:
+            float: 显示时间（秒）
+        """
+        frame_index = min(max(0, int(frame_index)), self.frame_count - 1)
+        return float(self.timestamps[frame_index])
+
+    def index_at(self, times):
+        """
+        获取指定时间点正在显示的帧序号（显示时间不晚于该时间点的最后一帧）
+
+        Args:
+            times (float|numpy.ndarray): 时间点（秒）
+
+        Returns:
+            int|numpy.ndarray: 帧序号
+        """
+        indices = np.searchsorted(self.timestamps, np.asarray(times) + TIME_TOLERANCE, side='right') - 1
+        indices = np.clip(indices, 0, self.frame_count - 1)
+        return int(indices) if np.ndim(indices) == 0 else indices
+
+    def nearest_index(self, time):
+        """
+        获取显示时间最接近指定时间点的帧序号，用于把解码器报告的时间换算回帧序号
+
+        Args:
+            time (float): 时间点（秒）
+
+        Returns:
+            int: 帧序号
+        """
+        index = int(np.searchsorted(self.timestamps, time))
+        if index >= self.frame_count:
+            return self.frame_count - 1
+        if index > 0 and time - self.timestamps[index - 1] < self.timestamps[index] - time:
+            return index - 1
+        return index
+
+    def uniform_positions(self, num_frames):
+        """
+        按时间均匀采样的帧位置（首尾帧必包含）
+
+        Args:
+            num_frames (int): 采样帧数，至少为2
+
+        Returns:
+            list: 帧序号列表
+        """
+        num_frames = max(2, num_frames)
+        targets = np.linspace(0.0, self.timestamps[-1], num_frames)
+        return [int(i) for i in self.index_at(targets)]
+
+
+def _cache_path(video_path):
+    """
+    获取视频对应的时间戳缓存路径
+
+    Args:
+        video_path (str): 视频文件路径
+
+    Returns:
+        str: 缓存文件路径
+    """
+    return os.path.join(get_cache_dir('pts_index'), f"{video_fingerprint(video_path)}.npz")
+
+
+def load_pts_index(video_path, ffprobe_cmd='ffprobe', allow_decode=True, use_cache=True):
+    """
+    获取视频的显示时间戳索引：优先读取缓存，否则用ffprobe扫描数据包，
+    ffprobe不可用时按需退回逐帧解码
+
+    Args:
+        video_path (str): 视频文件路径
+        ffprobe_cmd (str): ffprobe命令
+        allow_decode (bool): ffprobe不可用时是否允许逐帧解码读取时间戳
+        use_cache (bool): 是否读写缓存
+
+    Returns:
+        PtsIndex: 时间戳索引，无法获取时返回None
+    """
+    cache_path = _cache_path(video_path) if use_cache else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as data:
+                return PtsIndex(data['timestamps'], str(data['source']))
+        except (OSError, ValueError, KeyError):
+            # 缓存损坏时重新扫描
+            pass
+
+    try:
+        timestamps, source = scan_packet_pts(video_path, ffprobe_cmd), 'ffprobe'
+    except RuntimeError:
+        if not allow_decode:
+            return None
+        try:
+            timestamps, source = scan_decoded_pts(video_path), 'decode'
+        except RuntimeError:
+            return None
+
+    if cache_path:
+        with atomic_output(cache_path) as temp_path:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, timestamps=timestamps, source=np.array(source))
+    return PtsIndex(timestamps, source)
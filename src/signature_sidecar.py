@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频特征摘要模块
+预先分析一遍视频，按秒保存小尺寸缩略图、亮度直方图和画面变化分数，
+之后切换提取模式或帧数时直接从摘要中规划帧位置，只解码最终选中的帧
+"""
+
+import os
+import json
+import shutil
+import cv2
+import numpy as np
+from PIL import Image
+from src.config import get_cache_dir
+from src.grid_synthesizer import GridSynthesizer
+from src.video_processor import video_fingerprint
+
+
+# 摘要格式版本，格式变化后旧摘要自动失效（版本2：缩略图高度按视频宽高比计算）
+SIGNATURE_VERSION = 2
+
+# 摘要中的数组，每个保存为一个.npy文件，读取时以内存映射方式打开
+SIGNATURE_ARRAYS = ('frame_indices', 'timestamps', 'thumbnails', 'histograms', 'scene_scores')
+
+
+def get_signature_dir(video_path):
+    """
+    获取视频特征摘要的保存目录
+
+    Args:
+        video_path (str): 视频文件路径
+
+    Returns:
+        str: 摘要目录路径（可能尚不存在）
+    """
+    return os.path.join(get_cache_dir('signatures'), video_fingerprint(video_path))
+
+
+def build_signature(video_path, samples_per_second=1.0, thumb_width=64, histogram_bins=32, callback=None):
+    """
+    顺序解码一遍视频，生成特征摘要
+
+    非采样帧只grab（仍需解码），跳过retrieve中的像素格式转换和复制；
+    数组通过内存映射直接写入文件，内存占用与视频时长无关。
+    先写入临时目录，完成后再整体替换，中断或出错时删除临时目录，不会留下不完整的摘要。
+
+    Args:
+        video_path (str): 视频文件路径
+        samples_per_second (float): 每秒采样数
+        thumb_width (int): 缩略图宽度，高度按视频宽高比计算（竖屏和4:3视频不变形）
+        histogram_bins (int): 亮度直方图分箱数
+        callback (callable): 进度回调函数，参数为(已处理帧数, 总帧数)
+
+    Returns:
+        VideoSignature: 特征摘要，视频无法打开返回None
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        cap.release()
+        return None
+
+    temp_dir = None
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if fps <= 0 or total_frames <= 0 or width <= 0 or height <= 0:
+            return None
+        thumb_height = max(2, int(round(height * thumb_width / width / 2)) * 2)
+        thumb_size = (thumb_width, thumb_height)
+
+        # 采样帧序号：每隔1/samples_per_second秒一帧
+        step = fps / samples_per_second
+        targets = np.unique(np.round(np.arange(0, total_frames, step)).astype(np.int64))
+        targets = targets[targets < total_frames]
+        capacity = len(targets)
+
+        signature_dir = get_signature_dir(video_path)
+        temp_dir = f"{signature_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+
+        open_memmap = np.lib.format.open_memmap
+        arrays = {
+            'frame_indices': open_memmap(os.path.join(temp_dir, 'frame_indices.npy'), 'w+', np.int64, (capacity,)),
+            'timestamps': open_memmap(os.path.join(temp_dir, 'timestamps.npy'), 'w+', np.float64, (capacity,)),
+            'thumbnails': open_memmap(os.path.join(temp_dir, 'thumbnails.npy'), 'w+', np.uint8,
+                                      (capacity, thumb_height, thumb_width, 3)),
+            'histograms': open_memmap(os.path.join(temp_dir, 'histograms.npy'), 'w+', np.float32,
+                                      (capacity, histogram_bins)),
+            'scene_scores': open_memmap(os.path.join(temp_dir, 'scene_scores.npy'), 'w+', np.float32, (capacity,))
+        }
+
+        count = 0
+        frame_index = 0
+        previous_gray = None
+        previous_hist = None
+        while count < capacity and cap.grab():
+            if frame_index == targets[count]:
+                ret, frame = cap.retrieve()
+                if ret:
+                    thumb = cv2.resize(frame, thumb_size, interpolation=cv2.INTER_AREA)
+                    gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+                    hist = cv2.calcHist([gray], [0], None, [histogram_bins], [0, 256]).ravel()
+                    hist /= max(hist.sum(), 1.0)
+
+                    # 画面变化分数：缩略图平均像素差与直方图差异各占一半，范围0-1
+                    if previous_gray is None:
+                        score = 0.0
+                    else:
+                        pixel_diff = float(cv2.absdiff(gray, previous_gray).mean()) / 255.0
+                        hist_diff = float(np.abs(hist - previous_hist).sum()) / 2.0
+                        score = 0.5 * pixel_diff + 0.5 * hist_diff
+
+                    arrays['frame_indices'][count] = frame_index
+                    arrays['timestamps'][count] = frame_index / fps
+                    arrays['thumbnails'][count] = cv2.cvtColor(thumb, cv2.COLOR_BGR2RGB)
+                    arrays['histograms'][count] = hist
+                    arrays['scene_scores'][count] = score
+                    previous_gray, previous_hist = gray, hist
+                    count += 1
+                else:
+                    # 解码失败的采样点跳过，后续采样点不变
+                    targets = np.delete(targets, count)
+                    capacity = len(targets)
+            frame_index += 1
+            if callback and frame_index % 250 == 0:
+                callback(frame_index, total_frames)
+    except BaseException:
+        # 解码中途出错或被中断：删除临时目录（内存映射在Linux/macOS上可直接删除，Windows上尽力而为）
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    finally:
+        cap.release()
+
+    if count == 0:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return None
+
+    try:
+        for array in arrays.values():
+            array.flush()
+        del arrays
+
+        meta = {
+            'version': SIGNATURE_VERSION,
+            'count': count,
+            'fps': fps,
+            'total_frames': total_frames,
+            'samples_per_second': samples_per_second,
+            'thumb_size': list(thumb_size),
+            'histogram_bins': histogram_bins
+        }
+        with open(os.path.join(temp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(signature_dir, ignore_errors=True)
+        os.replace(temp_dir, signature_dir)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    return VideoSignature(signature_dir)
+
+
+class VideoSignature:
+    """视频特征摘要类，数组以只读内存映射方式打开，读取不复制数据"""
+
+    def __init__(self, signature_dir):
+        """
+        初始化并打开摘要
+
+        Args:
+            signature_dir (str): 摘要目录
+
+        Raises:
+            ValueError: 摘要不存在、已损坏或版本不符
+        """
+        try:
+            with open(os.path.join(signature_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != SIGNATURE_VERSION:
+                raise ValueError(f"摘要版本不符：{self.meta.get('version')}")
+
+            count = self.meta['count']
+            for name in SIGNATURE_ARRAYS:
+                array = np.load(os.path.join(signature_dir, f"{name}.npy"), mmap_mode='r')
+                setattr(self, name, array[:count])
+        except (OSError, KeyError) as e:
+            raise ValueError(f"无法读取视频特征摘要：{e}")
+
+        self.signature_dir = signature_dir
+        self.fps = self.meta['fps']
+        self.total_frames = self.meta['total_frames']
+
+    @classmethod
+    def load(cls, video_path):
+        """
+        加载视频的特征摘要
+
+        Args:
+            video_path (str): 视频文件路径
+
+        Returns:
+            VideoSignature: 特征摘要，不存在或已失效返回None
+        """
+        signature_dir = get_signature_dir(video_path)
+        if not os.path.isdir(signature_dir):
+            return None
+        try:
+            return cls(signature_dir)
+        except ValueError:
+            return None
+
+    @classmethod
+    def load_or_build(cls, video_path, **build_options):
+        """
+        加载视频的特征摘要，不存在时生成
+
+        Args:
+            video_path (str): 视频文件路径
+            **build_options: 传给build_signature的参数
+
+        Returns:
+            VideoSignature: 特征摘要，视频无法打开返回None
+        """
+        return cls.load(video_path) or build_signature(video_path, **build_options)
+
+    def plan_uniform(self, num_frames=5):
+        """
+        均匀间隔模式：按均匀间隔规划帧位置（首尾帧必包含）
+
+        Args:
+            num_frames (int): 帧数，至少为2
+
+        Returns:
+            list: 帧序号列表
+        """
+        num_frames = max(2, num_frames)
+        interval = self.total_frames // (num_frames - 1)
+        return [min(i * interval, self.total_frames - 1) for i in range(num_frames)]
+
+    def plan_scene(self, num_frames=None, threshold=0.15, min_gap=2.0):
+        """
+        关键场景模式：画面变化分数超过阈值的采样点判定为关键帧（开头画面必包含）
+
+        Args:
+            num_frames (int): 最多的帧数，超出时保留变化分数最高的，None则不限
+            threshold (float): 变化分数阈值（0-1）
+            min_gap (float): 相邻关键帧的最小间隔（秒），避免同一转场选出多帧
+
+        Returns:
+            list: 按时间排序的帧序号列表
+        """
+        candidates = np.flatnonzero(self.scene_scores > threshold)
+        # 变化分数从高到低挑选，与已选帧间隔过近的跳过
+        candidates = candidates[np.argsort(-self.scene_scores[candidates], kind='stable')]
+        selected = [0]
+        for sample in candidates:
+            if num_frames is not None and len(selected) >= num_frames:
+                break
+            timestamp = self.timestamps[sample]
+            if all(abs(timestamp - self.timestamps[other]) >= min_gap for other in selected):
+                selected.append(int(sample))
+        return sorted(int(self.frame_indices[sample]) for sample in selected)
+
+    def plan_hybrid(self, num_frames=5, max_extra=None, threshold=0.15, min_gap=2.0):
+        """
+        混合模式：先按均匀间隔规划基础帧，再补充画面变化明显的关键帧
+
+        Args:
+            num_frames (int): 均匀间隔的基础帧数
+            max_extra (int): 最多补充的关键帧数，None则与基础帧数相同
+            threshold (float): 变化分数阈值（0-1）
+            min_gap (float): 补充帧与其他帧的最小间隔（秒）
+
+        Returns:
+            list: 按时间排序的帧序号列表
+        """
+        base = self.plan_uniform(num_frames)
+        max_extra = num_frames if max_extra is None else max_extra
+        min_gap_frames = min_gap * self.fps
+
+        candidates = np.flatnonzero(self.scene_scores > threshold)
+        candidates = candidates[np.argsort(-self.scene_scores[candidates], kind='stable')]
+        selected = list(base)
+        extra = 0
+        for sample in candidates:
+            if extra >= max_extra:
+                break
+            frame_index = int(self.frame_indices[sample])
+            if all(abs(frame_index - other) >= min_gap_frames for other in selected):
+                selected.append(frame_index)
+                extra += 1
+        return sorted(selected)
+
+    def plan(self, mode='uniform', num_frames=5, **options):
+        """
+        按提取模式规划帧位置
+
+        Args:
+            mode (str): 'uniform'、'scene'或'hybrid'
+            num_frames (int): 帧数（关键场景模式为最多帧数，混合模式为基础帧数）
+            **options: 对应模式的其他参数
+
+        Returns:
+            list: 帧序号列表
+
+        Raises:
+            ValueError: 提取模式不支持
+        """
+        if mode == 'uniform':
+            return self.plan_uniform(num_frames)
+        if mode == 'scene':
+            return self.plan_scene(num_frames, **options)
+        if mode == 'hybrid':
+            return self.plan_hybrid(num_frames, **options)
+        raise ValueError(f"不支持的提取模式：{mode}")
+
+    def nearest_samples(self, frame_indices):
+        """
+        查找与帧位置最接近的采样点
+
+        Args:
+            frame_indices (list): 帧序号列表
+
+        Returns:
+            numpy.ndarray: 采样点序号数组
+        """
+        frame_indices = np.asarray(frame_indices)
+        if len(self.frame_indices) == 1:
+            return np.zeros(len(frame_indices), dtype=np.int64)
+        right = np.clip(np.searchsorted(self.frame_indices, frame_indices), 1, len(self.frame_indices) - 1)
+        left = right - 1
+        closer_left = (frame_indices - self.frame_indices[left]) <= (self.frame_indices[right] - frame_indices)
+        return np.where(closer_left, left, right)
+
+    def preview_thumbnails(self, frame_indices):
+        """
+        获取帧位置对应的缩略图，用于不解码视频即时预览规划结果
+
+        Args:
+            frame_indices (list): 帧序号列表
+
+        Returns:
+            numpy.ndarray: RGB缩略图数组，形状为 (帧数, 高, 宽, 3)
+        """
+        return self.thumbnails[self.nearest_samples(frame_indices)]
+
+    def save_preview(self, frame_indices, output_path, spacing=2, quality=85):
+        """
+        用摘要中的缩略图合成预览宫格图（不解码视频）
+
+        Args:
+            frame_indices (list): 帧序号列表
+            output_path (str): 输出路径
+            spacing (int): 图片间距
+            quality (int): 图片质量
+
+        Returns:
+            str: 输出路径，没有帧时返回None
+        """
+        if len(frame_indices) == 0:
+            return None
+
+        synthesizer = GridSynthesizer()
+        thumbnails = self.preview_thumbnails(frame_indices)
+        rows, cols = synthesizer.calculate_grid_layout(len(thumbnails))
+        cell_height, cell_width = thumbnails.shape[1:3]
+        canvas = Image.new('RGB', (cols * cell_width + (cols + 1) * spacing, rows * cell_height + (rows + 1) * spacing),
+                           (200, 200, 200))
+        for index, thumbnail in enumerate(thumbnails):
+            x, y = synthesizer.cell_origin(index, cols, cell_width, cell_height, spacing, spacing)
+            canvas.paste(Image.fromarray(thumbnail), (x, y))
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        synthesizer.save_image(canvas, output_path, quality)
+        return output_path
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+播放器拖动预览缩略图模块
+每隔固定秒数截取一张小缩略图，拼接为雪碧图，并生成WebVTT文件记录每段时间对应的雪碧图坐标
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from src.video_processor import VideoProcessor
+from src.grid_synthesizer import GridSynthesizer
+from src.image_encoder import get_encoder
+
+
+# 采样帧的读取方式：ffmpeg在解码进程内完成抽帧和缩小，只把缩略图传回；OpenCV逐帧grab后缩小采样帧
+SPRITE_BACKENDS = ('auto', 'ffmpeg', 'opencv')
+
+# ffmpeg快速解码选项：跳过去块滤波和不被参考的帧（如B帧）。缩略图只有一两百像素宽，画质差别看不出来；
+# 采样时间点恰好是被跳过的帧时改取前一个解码的帧，偏差在一两帧以内
+FAST_DECODE_OPTIONS = ['-skip_loop_filter', 'all', '-skip_frame', 'noref']
+
+
+def format_vtt_timestamp(seconds):
+    """
+    将秒数格式化为WebVTT时间戳
+
+    Args:
+        seconds (float): 时间（秒）
+
+    Returns:
+        str: 时间戳，格式为“时:分:秒.毫秒”（如“00:01:23.500”）
+    """
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+class SpriteThumbnailGenerator:
+    """雪碧图缩略图生成器类"""
+
+    def __init__(self, video_path, interval=10.0, thumb_width=160, columns=10, rows=10, output_format='jpg',
+                 quality=75, workers=None, backend='auto', fast_decode=True, ffmpeg_cmd='ffmpeg'):
+        """
+        初始化
+
+        Args:
+            video_path (str): 视频文件路径
+            interval (float): 缩略图间隔（秒）
+            thumb_width (int): 缩略图宽度，高度按视频比例计算
+            columns (int): 每张雪碧图的列数
+            rows (int): 每张雪碧图的行数
+            output_format (str): 雪碧图格式，jpg、png或webp
+            quality (int): 图片质量，0-100
+            workers (int): 并行编码雪碧图的线程数，None则按CPU核心数（最多4个）
+            backend (str): 'ffmpeg'、'opencv'或'auto'（找到ffmpeg时使用ffmpeg）
+            fast_decode (bool): 使用ffmpeg时是否跳过去块滤波和不被参考的帧，
+                缩略图可能与采样时间点相差一两帧
+            ffmpeg_cmd (str): ffmpeg命令
+
+        Raises:
+            ValueError: 读取方式不支持
+        """
+        if backend not in SPRITE_BACKENDS:
+            raise ValueError(f"不支持的读取方式：{backend}")
+        self.video_path = video_path
+        self.interval = interval
+        self.thumb_width = thumb_width
+        self.columns = max(1, columns)
+        self.rows = max(1, rows)
+        self.output_format = output_format
+        self.quality = quality
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.backend = backend
+        self.fast_decode = fast_decode
+        self.ffmpeg_cmd = ffmpeg_cmd
+        self.synthesizer = GridSynthesizer()
+
+    def generate(self, output_dir, base_url='', callback=None):
+        """
+        生成雪碧图和WebVTT文件
+
+        只顺序解码一遍视频。使用ffmpeg时由fps和scale滤镜在解码进程内抽帧并缩小，
+        管道只传回缩略图的原始像素，并可跳过去块滤波和不被参考的帧以减少解码量；
+        使用OpenCV时每帧仍需grab（完整分辨率完整解码），只有采样帧做颜色转换并缩小。缩略图直接写入当前雪碧图，
+        每张雪碧图填满后交给线程池编码，解码同时进行。
+
+        Args:
+            output_dir (str): 输出目录
+            base_url (str): WebVTT中雪碧图地址的前缀（如“/thumbs/”），默认使用相对文件名
+            callback (callable): 进度回调函数，参数为(已处理帧数, 总帧数)
+
+        Returns:
+            dict: 结果，包括vtt（WebVTT路径）、sprites（雪碧图路径列表）、thumbnails（缩略图数量）、
+                backend（实际使用的读取方式），视频无法加载返回None
+
+        Raises:
+            RuntimeError: ffmpeg运行失败
+        """
+        processor = VideoProcessor()
+        if not processor.load_video(self.video_path):
+            return None
+
+        try:
+            video_info = processor.get_video_info()
+            fps = video_info.get('fps', 0)
+            total_frames = video_info.get('total_frames', 0)
+            if fps <= 0 or total_frames <= 0:
+                return None
+
+            width, height = video_info['width'], video_info['height']
+            thumb_height = max(2, int(round(height * self.thumb_width / width / 2)) * 2)
+            thumb_size = (self.thumb_width, thumb_height)
+
+            os.makedirs(output_dir, exist_ok=True)
+            video_name = os.path.splitext(os.path.basename(self.video_path))[0]
+            encoder = get_encoder(None, self.output_format, self.quality,
+                                  (self.columns * self.thumb_width, self.rows * thumb_height))
+
+            backend = self.backend
+            if backend == 'auto':
+                backend = 'ffmpeg' if shutil.which(self.ffmpeg_cmd) else 'opencv'
+            if backend == 'ffmpeg':
+                samples = self._iter_ffmpeg_samples(thumb_size, fps, total_frames, callback)
+            else:
+                samples = self._iter_samples(processor.cap, fps, total_frames, callback)
+
+            cues = []
+            sprite_paths = []
+            per_sheet = self.columns * self.rows
+            sheet = None
+            pending = []
+
+            with ThreadPoolExecutor(self.workers) as executor:
+                for index, (start, frame) in enumerate(samples):
+                    cell = index % per_sheet
+                    if cell == 0:
+                        sheet = np.zeros((self.rows * thumb_height, self.columns * self.thumb_width, 3), np.uint8)
+                        sprite_name = f"{video_name}_sprite_{len(sprite_paths) + 1:03d}.{self.output_format}"
+                        sprite_paths.append(os.path.join(output_dir, sprite_name))
+
+                    x, y = self.synthesizer.cell_origin(cell, self.columns, self.thumb_width, thumb_height, 0, 0)
+                    cell_view = sheet[y:y + thumb_height, x:x + self.thumb_width]
+                    if frame.shape[:2] == (thumb_height, self.thumb_width):
+                        cell_view[...] = frame
+                    else:
+                        cv2.resize(frame, thumb_size, dst=cell_view, interpolation=cv2.INTER_AREA)
+                    cues.append((start, os.path.basename(sprite_paths[-1]), x, y, thumb_size))
+
+                    if cell == per_sheet - 1:
+                        pending.append(executor.submit(self._save_sheet, encoder, sheet, sprite_paths[-1]))
+                        sheet = None
+                        # 限制排队等待编码的雪碧图数量，控制内存占用
+                        if len(pending) > self.workers:
+                            pending.pop(0).result()
+
+                if sheet is not None:
+                    # 最后一张雪碧图只保留用到的行
+                    used_rows = (len(cues) - 1) % per_sheet // self.columns + 1
+                    pending.append(executor.submit(self._save_sheet, encoder, sheet[:used_rows * thumb_height],
+                                                   sprite_paths[-1]))
+                for future in pending:
+                    future.result()
+
+            vtt_path = os.path.join(output_dir, f"{video_name}_thumbnails.vtt")
+            self._write_vtt(vtt_path, cues, video_info.get('duration') or total_frames / fps, base_url)
+            return {'vtt': vtt_path, 'sprites': sprite_paths, 'thumbnails': len(cues), 'backend': backend}
+        finally:
+            processor.release()
+
+    def _iter_samples(self, cap, fps, total_frames, callback=None):
+        """
+        顺序读取视频，按间隔返回采样帧
+
+        Args:
+            cap (cv2.VideoCapture): 已打开的视频
+            fps (float): 帧率
+            total_frames (int): 总帧数
+            callback (callable): 进度回调函数
+
+        Yields:
+            tuple: (时间点（秒）, BGR帧图像（原始分辨率）)
+        """
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        frame = None
+        frame_index = 0
+        next_time = 0.0
+        while cap.grab():
+            if frame_index / fps + 1e-6 >= next_time:
+                ret, frame = cap.retrieve(frame)
+                if ret:
+                    yield frame_index / fps, frame
+                    next_time += self.interval
+            frame_index += 1
+            if callback and frame_index % 1000 == 0:
+                callback(frame_index, total_frames)
+
+    def _iter_ffmpeg_samples(self, thumb_size, fps, total_frames, callback=None):
+        """
+        由ffmpeg的fps和scale滤镜抽帧并缩小，从管道读取缩略图
+
+        Args:
+            thumb_size (tuple): 缩略图尺寸 (width, height)
+            fps (float): 视频帧率（用于换算进度）
+            total_frames (int): 总帧数
+            callback (callable): 进度回调函数
+
+        Yields:
+            tuple: (时间点（秒）, BGR缩略图)
+
+        Raises:
+            RuntimeError: ffmpeg不存在或运行失败
+        """
+        width, height = thumb_size
+        command = [self.ffmpeg_cmd, '-hide_banner', '-nostats', '-loglevel', 'error']
+        if self.fast_decode:
+            command += FAST_DECODE_OPTIONS
+        # round=up：第k张缩略图取显示时间恰为k×间隔的帧，与OpenCV方式一致（默认取整会取到区间内其他帧）
+        command += [
+            '-an', '-sn', '-dn', '-i', self.video_path,
+            '-vf', f"fps=1/{self.interval:g}:round=up,scale={width}:{height}:flags=area",
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'
+        ]
+        frame_bytes = width * height * 3
+        # 错误输出写入临时文件，避免管道写满后ffmpeg阻塞
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+            except OSError as e:
+                raise RuntimeError(f"无法运行ffmpeg：{e}")
+            try:
+                index = 0
+                while True:
+                    data = process.stdout.read(frame_bytes)
+                    if len(data) < frame_bytes:
+                        break
+                    start = index * self.interval
+                    yield start, np.frombuffer(data, np.uint8).reshape(height, width, 3)
+                    index += 1
+                    if callback:
+                        callback(min(total_frames, int(start * fps)), total_frames)
+                process.wait()
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace')
+                raise RuntimeError(f"ffmpeg运行失败：{stderr.strip()}")
+
+    def _save_sheet(self, encoder, sheet, sprite_path):
+        """
+        编码并保存一张雪碧图（在线程池中运行）
+
+        Args:
+            encoder (ImageEncoder): 图片编码器
+            sheet (numpy.ndarray): BGR雪碧图
+            sprite_path (str): 输出路径
+        """
+        encoder.save(sheet, sprite_path, self.output_format, self.quality, 'bgr')
+
+    def _write_vtt(self, vtt_path, cues, duration, base_url=''):
+        """
+        写出WebVTT缩略图轨道
+
+        Args:
+            vtt_path (str): 输出路径
+            cues (list): [(开始时间, 雪碧图文件名, x, y, (宽, 高)), ...]
+            duration (float): 视频时长（秒），作为最后一段的结束时间
+            base_url (str): 雪碧图地址前缀
+        """
+        lines = ['WEBVTT', '']
+        for i, (start, sprite_name, x, y, (width, height)) in enumerate(cues):
+            end = cues[i + 1][0] if i + 1 < len(cues) else max(duration, start)
+            lines.append(f"{format_vtt_timestamp(start)} --> {format_vtt_timestamp(end)}")
+            lines.append(f"{base_url}{sprite_name}#xywh={x},{y},{width},{height}")
+            lines.append('')
+
+        with open(vtt_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+长图合成模块
+负责将关键帧按纵向或横向拼接为长图（对比模式）
+"""
+
+import os
+from PIL import Image
+from src.atomic_file import atomic_output
+
+
+class StripSynthesizer:
+    """长图合成器类"""
+
+    # JPEG单边最大像素为65535，留出余量
+    JPEG_MAX_LENGTH = 65500
+
+    def __init__(self, max_part_length=16000, max_part_pixels=16 * 1024 * 1024):
+        """
+        初始化
+
+        Args:
+            max_part_length (int): 单张长图在拼接方向上的最大像素长度，超出后自动拆分为多张编号长图
+            max_part_pixels (int): 单张长图的最大像素数，决定内存占用上限：每段画布为RGB，
+                占用约max_part_pixels×3字节（默认约48MB），不随统一边长（宽图）变大
+        """
+        self.max_part_length = max_part_length
+        self.max_part_pixels = max_part_pixels
+
+    def plan_strip(self, image_paths, direction='vertical', size=None, spacing=0, output_format='jpg'):
+        """
+        规划长图分段（只读取图片文件头，不解码像素）
+
+        Args:
+            image_paths (list): 图片路径列表
+            direction (str): 拼接方向，'vertical'或'horizontal'
+            size (int): 统一宽度（纵向）或统一高度（横向），None则使用第一张图片的尺寸
+            spacing (int): 图片间距（像素）
+            output_format (str): 输出图片格式，用于确定单边像素上限
+
+        Returns:
+            tuple: (统一边长, 分段列表)，每个分段为[(图片路径, 宽, 高), ...]
+        """
+        if not image_paths:
+            return (0, [])
+
+        max_length = self.max_part_length
+        if output_format.lower() in ('jpg', 'jpeg'):
+            max_length = min(max_length, self.JPEG_MAX_LENGTH)
+
+        parts = []
+        current_part = []
+        current_length = 0
+        common_size = size
+        part_length_limit = None
+
+        for path in image_paths:
+            with Image.open(path) as img:
+                img_width, img_height = img.size
+
+            if common_size is None:
+                common_size = img_width if direction == 'vertical' else img_height
+            if part_length_limit is None:
+                # 分段长度同时受像素数限制：统一边长越大，每段越短
+                part_length_limit = min(max_length, max(1, self.max_part_pixels // common_size))
+
+            # 按统一边长等比例缩放，并限制拼接方向长度不超过单张上限
+            if direction == 'vertical':
+                width = common_size
+                height = min(max(1, round(img_height * common_size / img_width)), max_length)
+                length = height
+            else:
+                height = common_size
+                width = min(max(1, round(img_width * common_size / img_height)), max_length)
+                length = width
+
+            # 当前分段放不下时另起一段（单张就超过像素上限的图片独占一段，不做变形压缩）
+            extra = length + (spacing if current_part else 0)
+            if current_part and current_length + extra > part_length_limit:
+                parts.append(current_part)
+                current_part = []
+                current_length = 0
+                extra = length
+
+            current_part.append((path, width, height))
+            current_length += extra
+
+        if current_part:
+            parts.append(current_part)
+
+        return (common_size, parts)
+
+    def synthesize_strip(self, image_paths, output_path, direction='vertical', size=None, spacing=0,
+                         background=(255, 255, 255), quality=95):
+        """
+        合成长图
+
+        逐段分配画布，逐张加载、缩放并追加图片，每段写出后立即释放，与图片总数无关。
+        峰值内存约为一段画布（不超过max_part_pixels×3字节；单张图片缩放后就超过上限时为该图片的大小）
+        加上当前一张图片解码和缩放所需的内存。
+
+        Args:
+            image_paths (list): 图片路径列表
+            output_path (str): 输出路径，拆分为多段时自动添加序号（如“xxx_长图_01.jpg”）
+            direction (str): 拼接方向，'vertical'或'horizontal'
+            size (int): 统一宽度（纵向）或统一高度（横向），None则使用第一张图片的尺寸
+            spacing (int): 图片间距（像素）
+            background (tuple): 背景颜色 (R, G, B)
+            quality (int): 图片质量，0-100，仅对jpg有效
+
+        Returns:
+            list: 合成的长图路径列表
+        """
+        output_format = os.path.splitext(output_path)[1].lstrip('.').lower() or 'jpg'
+        common_size, parts = self.plan_strip(image_paths, direction, size, spacing, output_format)
+        if not parts:
+            return []
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        base, ext = os.path.splitext(output_path)
+        output_paths = []
+
+        for part_index, part in enumerate(parts):
+            # 计算当前分段画布尺寸
+            if direction == 'vertical':
+                part_length = sum(h for _, _, h in part) + spacing * (len(part) - 1)
+                canvas_size = (common_size, part_length)
+            else:
+                part_length = sum(w for _, w, _ in part) + spacing * (len(part) - 1)
+                canvas_size = (part_length, common_size)
+
+            canvas = Image.new('RGB', canvas_size, background)
+            offset = 0
+
+            for path, width, height in part:
+                with Image.open(path) as img:
+                    # JPEG可在解码阶段直接缩小，减少解码量
+                    img.draft('RGB', (width, height))
+                    tile = img.convert('RGB').resize((width, height), Image.LANCZOS)
+
+                if direction == 'vertical':
+                    canvas.paste(tile, (0, offset))
+                    offset += height + spacing
+                else:
+                    canvas.paste(tile, (offset, 0))
+                    offset += width + spacing
+                tile.close()
+
+            if len(parts) == 1:
+                part_path = output_path
+            else:
+                part_path = f"{base}_{part_index + 1:02d}{ext}"
+
+            with atomic_output(part_path) as temp_path:
+                if output_format in ('jpg', 'jpeg'):
+                    canvas.save(temp_path, 'JPEG', quality=quality)
+                else:
+                    canvas.save(temp_path)
+            canvas.close()
+
+            output_paths.append(part_path)
+
+        return output_paths
@@ -7,18 +7,66 @@
 """
 
 import os
+import hashlib
 import cv2
 import ffmpeg
 
 
+def format_timestamp(seconds):
+    """
+    将秒数格式化为时间戳字符串
+    
+    Args:
+        seconds (float): 时间（秒）
+        
+    Returns:
+        str: 时间戳，格式为“时:分:秒.百分秒”（如“00:01:23.50”）
+    """
+    seconds = max(0.0, seconds)
+    hours = int(seconds // 3600)
+    minutes = int(seconds % 3600 // 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds % 60:05.2f}"
+
+
+def video_fingerprint(video_path, sample_size=65536):
+    """
+    计算视频文件指纹
+    
+    由文件大小、修改时间以及文件首尾数据的哈希组成，无需读取整个文件，
+    文件被替换或修改后指纹随之变化。
+    
+    Args:
+        video_path (str): 视频文件路径
+        sample_size (int): 首尾各读取的字节数
+        
+    Returns:
+        str: 指纹字符串
+    """
+    stat = os.stat(video_path)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+    with open(video_path, 'rb') as f:
+        digest.update(f.read(sample_size))
+        if stat.st_size > sample_size:
+            f.seek(max(sample_size, stat.st_size - sample_size))
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
 class VideoProcessor:
     """视频处理器类"""
     
-    def __init__(self):
-        """初始化"""
+    def __init__(self, capture_pool=None):
+        """
+        初始化
+        
+        Args:
+            capture_pool (CapturePool): 解码句柄池，None则每次独立打开视频
+        """
         self.video_path = None
         self.cap = None
         self.video_info = {}
+        self.capture_pool = capture_pool
+        self.lease = None
     
     def load_video(self, video_path):
         """
@@ -38,6 +86,16 @@ class VideoProcessor:
             return False
         
         self.video_path = video_path
+        
+        # 使用句柄池时租用已打开的句柄
+        if self.capture_pool is not None:
+            self.release()
+            self.lease = self.capture_pool.acquire(video_path)
+            if self.lease is None:
+                return False
+            self.cap = self.lease.cap
+            return True
+        
         self.cap = cv2.VideoCapture(video_path)
         
         if not self.cap.isOpened():
@@ -45,16 +103,26 @@ class VideoProcessor:
         
         return True
     
-    def get_video_info(self):
+    def get_video_info(self, probe=None):
         """
         获取视频信息
         
+        Args:
+            probe (dict): 预先获取的ffprobe结果，None则在此调用ffmpeg.probe
+            
         Returns:
             dict: 视频信息字典
         """
         if not self.cap or not self.cap.isOpened():
             return {}
         
+        # 句柄池中已缓存该文件的信息时直接使用
+        if self.lease is not None and probe is None:
+            cached_info = self.lease.video_info
+            if cached_info:
+                self.video_info = cached_info
+                return self.video_info
+        
         # 使用OpenCV获取基本信息
         fps = self.cap.get(cv2.CAP_PROP_FPS)
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -66,12 +134,20 @@ class VideoProcessor:
         
         # 使用ffmpeg获取更详细的信息
         try:
-            probe = ffmpeg.probe(self.video_path)
+            if probe is None:
+                probe = ffmpeg.probe(self.video_path)
             video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
             if video_stream:
                 # 从ffmpeg获取文件大小
                 file_size = os.path.getsize(self.video_path)
                 
+                # 可变帧率视频中总帧数除以帧率并不等于时长，优先使用容器记录的时长
+                container_duration = video_stream.get('duration') or probe.get('format', {}).get('duration')
+                try:
+                    duration = float(container_duration) if container_duration else duration
+                except ValueError:
+                    pass
+                
                 self.video_info = {
                     'filename': os.path.basename(self.video_path),
                     'file_path': self.video_path,
@@ -99,6 +175,9 @@ class VideoProcessor:
                 'codec': 'unknown'
             }
         
+        if self.lease is not None:
+            self.lease.video_info = self.video_info
+        
         return self.video_info
     
     def get_frame_at_time(self, time_seconds):
@@ -128,8 +207,12 @@ class VideoProcessor:
         return None
     
     def release(self):
-        """释放资源"""
-        if self.cap and self.cap.isOpened():
+        """释放资源（使用句柄池时归还句柄）"""
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+            self.cap = None
+        elif self.cap and self.cap.isOpened():
             self.cap.release()
             self.cap = None
     
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享目录任务队列模块
+任务以文件形式保存在共享存储的队列目录中，多台机器上的任意数量工作进程通过原子重命名领取任务，
+领取后定期更新文件修改时间作为心跳，超时未更新的任务重新排队，失败的任务按次数重试
+"""
+
+import os
+import json
+import time
+import socket
+import hashlib
+import threading
+from src.frame_extractor import FrameExtractor
+from src.grid_synthesizer import GridSynthesizer
+from src.video_processor import format_timestamp
+
+
+# 队列目录中的状态子目录
+QUEUE_STATES = ('pending', 'claimed', 'done', 'failed')
+
+
+def default_worker_id():
+    """
+    生成默认的工作进程标识：主机名-进程号（不含“.”，用于任务文件名）
+
+    Returns:
+        str: 工作进程标识
+    """
+    host = socket.gethostname().replace('.', '_').replace(os.sep, '_') or 'host'
+    return f"{host}-{os.getpid()}"
+
+
+class QueueJob:
+    """已领取的任务类"""
+
+    def __init__(self, job_id, attempt, worker_id, path, payload):
+        """
+        初始化
+
+        Args:
+            job_id (str): 任务标识
+            attempt (int): 第几次执行（从1开始）
+            worker_id (str): 领取任务的工作进程标识
+            path (str): 任务文件当前路径（claimed目录中）
+            payload (dict): 任务内容
+        """
+        self.job_id = job_id
+        self.attempt = attempt
+        self.worker_id = worker_id
+        self.path = path
+        self.payload = payload
+
+
+class WorkQueue:
+    """共享目录任务队列类
+
+    任务文件在状态目录之间只通过rename移动（同一文件系统内为原子操作），不改写内容：
+    - pending/<任务>.a<已执行次数>.json
+    - claimed/<任务>.a<执行次数>.<工作进程>.json（文件名含工作进程标识，租约过期被收回后原领取者无法再提交）
+    - done/<任务>.json、failed/<任务>.json
+    """
+
+    def __init__(self, queue_dir, lease_timeout=300.0, max_attempts=3):
+        """
+        初始化（目录不存在则创建）
+
+        Args:
+            queue_dir (str): 队列目录（多台机器共享时应位于共享存储上）
+            lease_timeout (float): 租约超时（秒），超过该时间没有心跳的任务重新排队
+            max_attempts (int): 每个任务最多执行次数（含租约超时的次数）
+        """
+        self.queue_dir = queue_dir
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max(1, max_attempts)
+        for state in QUEUE_STATES + ('tmp', 'results'):
+            os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+
+    def _state_dir(self, state):
+        """状态目录路径"""
+        return os.path.join(self.queue_dir, state)
+
+    def _find(self, job_id):
+        """
+        查找任务当前所在的状态
+
+        Returns:
+            str: 状态名称，不存在返回None
+        """
+        prefix = job_id + '.'
+        for state in QUEUE_STATES:
+            if any(name.startswith(prefix) for name in os.listdir(self._state_dir(state))):
+                return state
+        return None
+
+    def enqueue(self, video_path, **options):
+        """
+        添加任务（同一视频和参数的任务只会添加一次）
+
+        Args:
+            video_path (str): 视频文件路径（各工作进程都需能以该路径访问）
+            **options: 处理参数，如output_dir、num_frames、output_format、quality、make_grid、show_timestamps
+
+        Returns:
+            str: 任务标识，已存在时返回None
+        """
+        payload = dict(options, video_path=os.path.abspath(video_path))
+        key = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        job_id = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        if self._find(job_id) is not None:
+            return None
+
+        # 先写入临时目录再移入pending，领取方不会读到写了一半的任务
+        temp_path = os.path.join(self._state_dir('tmp'), f"{job_id}.{default_worker_id()}.json")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self._state_dir('pending'), f"{job_id}.a0.json"))
+        return job_id
+
+    def _server_now(self):
+        """
+        获取存储端的当前时间（通过更新时钟文件的修改时间），避免各机器时钟不一致时误判租约超时
+
+        Returns:
+            float: 时间戳（秒）
+        """
+        clock_path = os.path.join(self.queue_dir, '.clock')
+        with open(clock_path, 'a'):
+            pass
+        os.utime(clock_path, None)
+        return os.stat(clock_path).st_mtime
+
+    def reap_expired(self):
+        """
+        将租约超时（心跳停止）的任务移回pending
+
+        Returns:
+            int: 重新排队的任务数
+        """
+        now = self._server_now()
+        reaped = 0
+        claimed_dir = self._state_dir('claimed')
+        for name in os.listdir(claimed_dir):
+            path = os.path.join(claimed_dir, name)
+            try:
+                if now - os.stat(path).st_mtime < self.lease_timeout:
+                    continue
+                job_id, attempt = name.split('.')[:2]
+                os.rename(path, os.path.join(self._state_dir('pending'), f"{job_id}.{attempt}.json"))
+                reaped += 1
+            except (OSError, ValueError):
+                # 任务已被领取者提交或被其他进程收回
+                continue
+        return reaped
+
+    def claim(self, worker_id):
+        """
+        领取一个待处理任务（先收回租约超时的任务）
+
+        Args:
+            worker_id (str): 工作进程标识（不含“.”）
+
+        Returns:
+            QueueJob: 领取到的任务，没有可领取的任务返回None
+        """
+        self.reap_expired()
+        pending_dir = self._state_dir('pending')
+        for name in sorted(os.listdir(pending_dir)):
+            try:
+                job_id, attempt_part, _ = name.split('.')
+                attempt = int(attempt_part[1:]) + 1
+            except ValueError:
+                continue
+
+            claimed_path = os.path.join(self._state_dir('claimed'), f"{job_id}.a{attempt}.{worker_id}.json")
+            try:
+                # 多个进程同时领取时只有一个rename成功
+                os.rename(os.path.join(pending_dir, name), claimed_path)
+                # rename不改变修改时间，立即心跳，避免被当作超时任务收回
+                os.utime(claimed_path, None)
+            except OSError:
+                continue
+
+            try:
+                with open(claimed_path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+            except (OSError, ValueError) as e:
+                self._move_to_failed(claimed_path, job_id, f"任务文件无法读取：{e}")
+                continue
+
+            job = QueueJob(job_id, attempt, worker_id, claimed_path, payload)
+            if attempt > self.max_attempts:
+                self._move_to_failed(claimed_path, job_id, f"已达到最大执行次数（{self.max_attempts}）")
+                continue
+            return job
+        return None
+
+    def heartbeat(self, job):
+        """
+        续约（更新任务文件的修改时间）
+
+        Args:
+            job (QueueJob): 任务
+
+        Returns:
+            bool: 是否续约成功，False表示租约已超时被收回
+        """
+        try:
+            os.utime(job.path, None)
+            return True
+        except OSError:
+            return False
+
+    def complete(self, job, result=None):
+        """
+        提交任务完成
+
+        Args:
+            job (QueueJob): 任务
+            result (dict): 处理结果，保存到results目录
+
+        Returns:
+            bool: 是否提交成功，False表示租约已被收回（任务会由其他工作进程重新处理）
+        """
+        try:
+            os.rename(job.path, os.path.join(self._state_dir('done'), f"{job.job_id}.json"))
+        except OSError:
+            return False
+
+        self._write_result(job.job_id, {'status': 'done', 'worker': job.worker_id, 'attempt': job.attempt,
+                                 'result': result})
+        # 完成记录（追加写入），用于审计每个任务的完成次数
+        with open(os.path.join(self.queue_dir, 'completed.log'), 'a', encoding='utf-8') as f:
+            f.write(f"{job.job_id} {job.worker_id} {job.attempt}\n")
+        return True
+
+    def fail(self, job, error):
+        """
+        提交任务失败，未达到最大执行次数时重新排队
+
+        Args:
+            job (QueueJob): 任务
+            error (str): 错误信息
+
+        Returns:
+            str: 任务的新状态，'pending'或'failed'，租约已被收回返回None
+        """
+        if job.attempt < self.max_attempts:
+            try:
+                os.rename(job.path, os.path.join(self._state_dir('pending'), f"{job.job_id}.a{job.attempt}.json"))
+            except OSError:
+                return None
+            return 'pending'
+
+        if not self._move_to_failed(job.path, job.job_id, error):
+            return None
+        return 'failed'
+
+    def _move_to_failed(self, path, job_id, error):
+        """将任务移入failed并记录错误"""
+        try:
+            os.rename(path, os.path.join(self._state_dir('failed'), f"{job_id}.json"))
+        except OSError:
+            return False
+        self._write_result(job_id, {'status': 'failed', 'error': error})
+        return True
+
+    def _write_result(self, job_id, content):
+        """原子写入任务结果"""
+        temp_path = os.path.join(self._state_dir('tmp'), f"{job_id}.{default_worker_id()}.result.json")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self._state_dir('results'), f"{job_id}.json"))
+
+    def counts(self):
+        """
+        统计各状态的任务数
+
+        Returns:
+            dict: 状态 -> 任务数
+        """
+        return {state: len(os.listdir(self._state_dir(state))) for state in QUEUE_STATES}
+
+
+def run_pipeline(payload):
+    """
+    执行关键帧提取和宫格合成
+
+    Args:
+        payload (dict): 任务内容
+
+    Returns:
+        dict: 处理结果（关键帧路径、帧序号、时间点和宫格图路径）
+
+    Raises:
+        ValueError: 视频无法加载
+        RuntimeError: 没有提取到关键帧
+    """
+    video_path = payload['video_path']
+    output_format = payload.get('output_format', 'jpg')
+    quality = payload.get('quality', 95)
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    output_dir = os.path.join(payload.get('output_dir') or os.path.dirname(video_path), video_name)
+
+    extractor = FrameExtractor(video_path)
+    try:
+        if not extractor.initialize():
+            raise ValueError(f"无法加载视频文件：{video_path}")
+        paths = extractor.extract_to_dir(output_dir, num_frames=payload.get('num_frames', 5),
+                                         output_format=output_format, quality=quality)
+        timestamps = list(extractor.frame_timestamps)
+        result = {'paths': paths, 'frame_indices': list(extractor.frame_indices), 'frame_timestamps': timestamps}
+    finally:
+        extractor.release()
+
+    if not paths:
+        raise RuntimeError("没有提取到任何关键帧")
+
+    if payload.get('make_grid', True):
+        captions = [format_timestamp(t) for t in timestamps] if payload.get('show_timestamps') else None
+        grid_path = os.path.join(output_dir, f"{video_name}_宫格图.{output_format}")
+        result['grid_path'] = GridSynthesizer().synthesize_grid(paths, grid_path, captions=captions, quality=quality)
+    return result
+
+
+class QueueWorker:
+    """队列工作进程类"""
+
+    def __init__(self, queue, worker_id=None, poll_interval=2.0, heartbeat_interval=None):
+        """
+        初始化
+
+        Args:
+            queue (WorkQueue): 任务队列
+            worker_id (str): 工作进程标识，None则使用“主机名-进程号”
+            poll_interval (float): 没有任务时的等待间隔（秒）
+            heartbeat_interval (float): 心跳间隔（秒），None则为租约超时的1/3
+        """
+        self.queue = queue
+        self.worker_id = (worker_id or default_worker_id()).replace('.', '_')
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or max(0.1, queue.lease_timeout / 3)
+        self.stats = {'completed': 0, 'failed': 0, 'retried': 0, 'lost': 0}
+
+    def run(self, max_jobs=None, exit_when_empty=False, callback=None):
+        """
+        循环领取并处理任务
+
+        Args:
+            max_jobs (int): 最多处理的任务数，None则不限
+            exit_when_empty (bool): 队列中没有待处理和处理中的任务时退出
+            callback (callable): 每个任务结束后的回调函数，参数为(任务, 结果)，
+                结果为'done'、'pending'（稍后重试）、'failed'或'lost'（租约被收回）
+
+        Returns:
+            dict: 统计信息
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                if exit_when_empty:
+                    counts = self.queue.counts()
+                    if counts['pending'] == 0 and counts['claimed'] == 0:
+                        break
+                time.sleep(self.poll_interval)
+                continue
+
+            outcome = self.process(job)
+            processed += 1
+            if callback:
+                callback(job, outcome)
+        return dict(self.stats)
+
+    def process(self, job):
+        """
+        处理一个任务，处理期间由后台线程定期心跳
+
+        Args:
+            job (QueueJob): 任务
+
+        Returns:
+            str: 'done'、'pending'、'failed'或'lost'
+        """
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_interval):
+                if not self.queue.heartbeat(job):
+                    lost.set()
+                    return
+
+        heartbeat_thread = threading.Thread(target=beat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            result = run_pipeline(job.payload)
+            error = None
+        except Exception as e:
+            result = None
+            error = str(e)
+        finally:
+            stop.set()
+            heartbeat_thread.join()
+
+        if lost.is_set():
+            outcome = None
+        elif error is None:
+            outcome = 'done' if self.queue.complete(job, result) else None
+        else:
+            outcome = self.queue.fail(job, error)
+
+        if outcome is None:
+            self.stats['lost'] += 1
+            return 'lost'
+        if outcome == 'done':
+            self.stats['completed'] += 1
+        elif outcome == 'pending':
+            self.stats['retried'] += 1
+        else:
+            self.stats['failed'] += 1
+        return outcome